@@ -0,0 +1,234 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime
+import logging
+
+import numpy as np
+
+import llm_registry
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Cosine similarity needed to reuse an answer, for the sentence-embedding
+# model (all-MiniLM-L6-v2): paraphrases of one question ("What is my CGPA?",
+# "Tell me the CGPA") score above it, different questions on the same topic
+# below. Questions that differ in negation, numbers, polarity or named
+# entities can still score high, so the guards below reject those outright.
+SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.80"))
+MAX_ENTRIES_PER_STUDENT = 200
+MAX_CACHED_VECTORS = 20000  # question embeddings kept in memory
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+_RAW_WORD_RE = re.compile(r"[A-Za-z0-9+#]+")
+_NEGATION_RE = re.compile(r"n't\b")
+# Function words only. Polarity and evaluative words ("good", "bad", "level"),
+# negations and numbers carry the meaning of a question and must stay.
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "was", "were", "be", "do", "does", "did",
+    "i", "me", "my", "mine", "you", "your", "he", "she", "his", "her", "their",
+    "this", "that", "these", "those", "of", "to", "in", "on", "for", "with",
+    "about", "and", "or", "can", "could", "please", "tell", "give", "show", "what",
+    "how", "s",
+}
+_NEGATIONS = {"not", "no", "never", "nor", "without"}
+# Words whose opposite turns a question around ("good" vs "bad"); two
+# questions only match if they use the same ones
+_POLARITY_WORDS = {
+    "good", "bad", "better", "worse", "best", "worst", "strong", "weak",
+    "strength", "weakness", "hard", "easy", "high", "low", "higher", "lower",
+    "top", "bottom", "most", "least", "more", "less", "above", "below",
+    "increase", "decrease", "improve", "decline", "improving", "declining",
+    "pass", "fail", "passed", "failed", "ready", "unready", "positive", "negative",
+    "first", "last", "before", "after", "min", "max", "minimum", "maximum",
+}
+
+
+def _normalize_word(word: str) -> str:
+    """Very light stemming so 'weaknesses'/'weakness' and 'projects'/'project' collide."""
+    for suffix in ("nesses", "ness", "ies", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+_POLARITY_STEMS = {_normalize_word(w) for w in _POLARITY_WORDS}
+
+
+def question_tokens(text: str) -> list:
+    """Normalised content words of a question; "isn't" becomes "is not"."""
+    text = _NEGATION_RE.sub(" not", (text or "").lower())
+    return [_normalize_word(w) for w in _WORD_RE.findall(text) if w not in _STOPWORDS]
+
+
+def _entities(text: str) -> set:
+    """Capitalised words after the first, and acronyms: names like Google, DSA, CGPA."""
+    words = _RAW_WORD_RE.findall(text or "")
+    return {_normalize_word(w.lower()) for i, w in enumerate(words)
+            if (i > 0 and w[0].isupper()) or (len(w) > 1 and w.isupper())}
+
+
+def question_guards(text: str) -> dict:
+    """The parts of a question that must agree for two questions to share an answer."""
+    tokens = question_tokens(text)
+    return {
+        'tokens': frozenset(tokens),
+        'negated': any(t in _NEGATIONS for t in tokens),
+        'numbers': frozenset(t for t in tokens if any(c.isdigit() for c in t)),
+        'polarity': frozenset(t for t in tokens if t in _POLARITY_STEMS),
+        'entities': frozenset(_entities(text)),
+    }
+
+
+def guards_agree(a: dict, b: dict) -> bool:
+    """False if the questions differ in negation, numbers, polarity or a named entity."""
+    return (a['negated'] == b['negated']
+            and a['numbers'] == b['numbers']
+            and a['polarity'] == b['polarity']
+            # An entity of either question must appear (in any case) in the other
+            and a['entities'] <= b['tokens'] and b['entities'] <= a['tokens'])
+
+
+def _embed_documents(texts):
+    return llm_registry.get_embeddings().embed_documents(texts)
+
+
+class SemanticAnswerCache:
+    """
+    Per-student cache of QA answers, matched by question similarity.
+
+    Questions are embedded with the local sentence-embedding model shared
+    with retrieval. An answer is only reused for the same student *and* the
+    same profile fingerprint, so updated student data never returns an
+    outdated answer, and only if the questions also pass question_guards:
+    "hard vs easy", "good vs bad", "ready vs not ready" or "Google vs
+    Amazon" never share an answer, however close their embeddings are.
+
+    If the embedding model is unavailable, only questions with the same
+    normalised content words match.
+    """
+
+    def __init__(self, cache_file='answer_cache.json', threshold=SIMILARITY_THRESHOLD, embed_fn=None):
+        self.cache_file = os.path.join(os.path.dirname(__file__), cache_file)
+        self.threshold = threshold
+        self._embed_fn = embed_fn or _embed_documents
+        self._lock = threading.Lock()
+        self._entries = self._load_cache()
+        self._vectors = {}  # question -> normalised embedding
+        self.hits = 0
+        self.misses = 0
+        self.exact_fallbacks = 0
+        self.latency_saved = 0.0
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+                return {}
+        except (json.JSONDecodeError, FileNotFoundError):
+            return {}
+
+    def _save_cache(self):
+        # Write a private temp file and swap it in, so readers never see a partial file
+        tmp = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp, self.cache_file)
+
+    def _embed(self, questions):
+        """
+        Normalised embeddings of the questions as a matrix, reusing earlier
+        ones; None if the model is unavailable.
+        """
+        with self._lock:
+            known = {q: self._vectors[q] for q in questions if q in self._vectors}
+        missing = list(dict.fromkeys(q for q in questions if q not in known))
+        if missing:
+            try:
+                vectors = np.asarray(self._embed_fn(missing), dtype=np.float32)
+            except Exception as e:
+                logger.warning(f"Question embedding failed, matching exact questions only: {e}")
+                return None
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            known.update(zip(missing, vectors / norms))
+            with self._lock:
+                self._vectors.update((q, known[q]) for q in missing)
+        return np.vstack([known[q] for q in questions])
+
+    def lookup(self, enrollment_no, profile_fp, question):
+        """Returns (answer, similarity) for the closest prior question, or (None, best_similarity)."""
+        enrollment_no = str(enrollment_no)
+        with self._lock:
+            entries = [e for e in self._entries.get(enrollment_no, []) if e.get('profile') == profile_fp]
+        if not entries:
+            with self._lock:
+                self.misses += 1
+            return None, 0.0
+
+        guards = question_guards(question)
+        candidates = [e for e in entries if guards_agree(guards, question_guards(e['question']))]
+        # Embed outside the lock; the model call is the slow part
+        vectors = self._embed([question] + [e['question'] for e in candidates]) if candidates else None
+
+        with self._lock:
+            best_entry, similarity = None, 0.0
+            if vectors is not None:
+                similarities = vectors[1:] @ vectors[0]
+                best = int(np.argmax(similarities))
+                similarity = float(similarities[best])
+                if similarity >= self.threshold:
+                    best_entry = candidates[best]
+            elif candidates:
+                self.exact_fallbacks += 1
+                best_entry = next((e for e in candidates
+                                   if question_guards(e['question'])['tokens'] == guards['tokens']), None)
+                similarity = 1.0 if best_entry else 0.0
+            if best_entry is not None:
+                self.hits += 1
+                self.latency_saved += best_entry.get('latency_seconds', 0.0)
+                return best_entry['answer'], similarity
+            self.misses += 1
+            return None, similarity
+
+    def store(self, enrollment_no, profile_fp, question, answer, latency_seconds):
+        enrollment_no = str(enrollment_no)
+        entry = {
+            'question': question,
+            'answer': answer,
+            'profile': profile_fp,
+            'latency_seconds': round(latency_seconds, 3),
+            'timestamp': datetime.now().isoformat()
+        }
+        with self._lock:
+            entries = self._entries.setdefault(enrollment_no, [])
+            entries.append(entry)
+            del entries[:-MAX_ENTRIES_PER_STUDENT]
+            if len(self._vectors) > MAX_CACHED_VECTORS:
+                # Keep only the embeddings of stored questions
+                kept = {e['question'] for student in self._entries.values() for e in student}
+                self._vectors = {q: v for q, v in self._vectors.items() if q in kept}
+            try:
+                self._save_cache()
+            except OSError as e:
+                logger.error(f"Failed to persist answer cache: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stored = [e for entries in self._entries.values() for e in entries]
+        avg_llm_latency = (sum(e.get('latency_seconds', 0.0) for e in stored) / len(stored)) if stored else 0.0
+        return {
+            'entries': len(stored),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'similarity_threshold': self.threshold,
+            'exact_match_fallbacks': self.exact_fallbacks,
+            'latency_saved_seconds': round(self.latency_saved, 2),
+            'avg_llm_latency_seconds': round(avg_llm_latency, 2)
+        }
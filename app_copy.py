@@ -2,6 +2,7 @@
 
 from flask import Flask, jsonify, request, render_template, redirect, url_for
 import os
+import threading
 # Import the RAG system class
 from rag_system import StudentApiRAG
 import logging # Import logging module
@@ -26,6 +27,9 @@ os.makedirs('templates', exist_ok=True)
 try:
     app.rag_system = StudentApiRAG() # <-- This line is key
     logger.info("RAG System initialized successfully.")
+    # Heavy clients are built lazily; warm them off the request path
+    if os.getenv("RAG_WARMUP", "1") != "0":
+        threading.Thread(target=app.rag_system.warm_up, daemon=True).start()
 except Exception as e:
     logger.error(f"Failed to initialize RAG System: {e}")
     # Depending on your needs, you might want to exit here or disable related features
@@ -81,6 +85,52 @@ def get_students_list():
 def favicon():
     return '', 204
 
+import http_client
+
+@app.route('/api/metrics/http', methods=['GET'])
+def get_http_metrics():
+    """Endpoint for per-host latency and error metrics of outbound scraper requests."""
+    return jsonify(http_client.get_metrics())
+
+import context_builder
+
+@app.route('/api/metrics/startup', methods=['GET'])
+def get_startup_metrics():
+    """Endpoint for per-component RAG initialization timings."""
+    if not app.rag_system:
+        return jsonify({'error': 'RAG system not available'}), 500
+    return jsonify(app.rag_system.get_startup_report())
+
+@app.route('/api/metrics/prompts', methods=['GET'])
+def get_prompt_metrics():
+    """Endpoint for per-operation prompt token counts against their context budgets."""
+    return jsonify(context_builder.prompt_stats.get_stats())
+
+import llm_registry
+
+@app.route('/api/metrics/llm', methods=['GET'])
+def get_llm_metrics():
+    """Endpoint for shared LLM client usage and concurrency per role."""
+    return jsonify(llm_registry.get_stats())
+
+import llm_metrics
+
+@app.route('/api/metrics/llm/calls', methods=['GET'])
+def get_llm_call_metrics():
+    """
+    Rolling per-operation summary of LLM calls (latency, TTFT, tokens,
+    retries, estimated cost) plus the most recent calls (?recent=N).
+    """
+    recent = min(request.args.get('recent', 20, type=int), 200)
+    return jsonify(dict(llm_metrics.metrics.get_summary(), recent_calls=llm_metrics.metrics.recent_calls(recent)))
+
+from single_flight import single_flight
+
+@app.route('/api/metrics/coalescing', methods=['GET'])
+def get_coalescing_metrics():
+    """Endpoint for how many identical concurrent calls shared one execution."""
+    return jsonify(single_flight.get_stats())
+
 # --- Job Analysis Route (Corrected) ---
 @app.route('/api/job-analysis', methods=['POST'])
 def analyze_job_application_route():
@@ -117,6 +167,9 @@ def analyze_job_application_route():
                 'error': 'Job application link/description and enrollment number are required.'
             }), 400
 
+        if _wants_async():
+            return _submit_job('job_analysis', {'job_input': job_input, 'enrollment_no': enrollment_no})
+
         logger.info(f"Initiating job application analysis for input: {job_input[:50]}... and student: {enrollment_no}")
         # Call the analyze_job_application method on the RAG system instance with both arguments
         result = app.rag_system.analyze_job_application(job_input, enrollment_no)
@@ -276,8 +329,20 @@ def get_student_report(enrollment_no: str):
         return jsonify({'error': 'Internal server error: Report system not available.'}), 500
 
     try:
+        # ?refresh=1 forces a regeneration even if the profile hasn't changed
+        force_refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+        if _wants_async():
+            return _submit_job('report', {'enrollment_no': enrollment_no, 'force_refresh': force_refresh})
+        if not force_refresh:
+            cached_report = app.rag_system.get_cached_report(enrollment_no)
+            if cached_report is not None:
+                logger.info(f"Serving cached report for enrollment: {enrollment_no}")
+                response = jsonify(cached_report)
+                response.headers['X-Report-Cache'] = 'HIT'
+                return response
+
         logger.info(f"Generating report for enrollment: {enrollment_no}")
-        report_data = app.rag_system.generate_structured_report(enrollment_no)
+        report_data = app.rag_system.generate_structured_report(enrollment_no, force_refresh=True)
         
         if report_data.get("error"):
              logger.warning(f"Report generation error for {enrollment_no}: {report_data['error']}")
@@ -291,11 +356,76 @@ def get_student_report(enrollment_no: str):
             except Exception as e:
                 logger.error(f"Failed to save report: {e}")
 
-        return jsonify(report_data)
+        response = jsonify(report_data)
+        response.headers['X-Report-Cache'] = 'BYPASS' if force_refresh else 'MISS'
+        return response
     except Exception as e:
         logger.error(f"Error generating report for {enrollment_no}: {e}",exc_info=True)
         return jsonify({'error': 'Failed to generate report.'}), 500
 
+from batch_reports import BatchReportRunner, DEFAULT_CONCURRENCY
+
+app.batch_runner = BatchReportRunner(app.rag_system, app.report_manager) if app.rag_system else None
+
+@app.route('/api/batch/reports', methods=['POST'])
+def start_batch_reports():
+    """Starts a batch report job for `enrollments` (or every student); returns its id."""
+    if not app.batch_runner:
+        return jsonify({'error': 'RAG system not available'}), 500
+    data = request.get_json(silent=True) or {}
+    enrollments = data.get('enrollments') or []
+    if not isinstance(enrollments, list):
+        return jsonify({'error': 'enrollments must be a list'}), 400
+    try:
+        job = app.batch_runner.create_job(
+            enrollments,
+            concurrency=data.get('concurrency', DEFAULT_CONCURRENCY),
+            force_refresh=bool(data.get('force_refresh', False))
+        )
+        app.batch_runner.start(job['id'])
+        return jsonify({'job_id': job['id'], 'total': len(job['enrollments'])}), 202
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/batch/reports', methods=['GET'])
+def list_batch_reports():
+    if not app.batch_runner:
+        return jsonify({'error': 'RAG system not available'}), 500
+    return jsonify(app.batch_runner.list_jobs())
+
+@app.route('/api/batch/reports/<job_id>', methods=['GET'])
+def get_batch_report_job(job_id: str):
+    """Job state: status, per-student results and the throughput/token summary."""
+    if not app.batch_runner:
+        return jsonify({'error': 'RAG system not available'}), 500
+    job = app.batch_runner.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Batch job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/batch/reports/<job_id>/resume', methods=['POST'])
+def resume_batch_report_job(job_id: str):
+    """Re-runs the students of a job that are not done yet."""
+    if not app.batch_runner:
+        return jsonify({'error': 'RAG system not available'}), 500
+    if not app.batch_runner.get_job(job_id):
+        return jsonify({'error': 'Batch job not found'}), 404
+    try:
+        app.batch_runner.start(job_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'job_id': job_id}), 202
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Endpoint for LLM result cache statistics."""
+    if not app.rag_system:
+        return jsonify({'error': 'RAG system not available'}), 500
+    return jsonify({
+        'reports': app.rag_system.report_cache.get_stats(),
+        'answers': app.rag_system.answer_cache.get_stats()
+    })
+
 @app.route('/api/reports/history/<enrollment_no>', methods=['GET'])
 def get_report_history(enrollment_no):
     """Endpoint to get report history for a student."""
@@ -340,6 +470,10 @@ def generate_resume():
         if not enrollment_no or not job_description:
             return jsonify({'error': 'Missing enrollment_no or job_description'}), 400
 
+        if _wants_async():
+            return _submit_job('resume', {'enrollment_no': enrollment_no, 'job_description': job_description,
+                                          'company': company, 'role': role})
+
         logger.info(f"Generating tailored resume for {enrollment_no} at {company}")
         resume_content = app.rag_system.generate_tailored_resume(enrollment_no, job_description)
         
@@ -426,6 +560,79 @@ def get_dashboard_students():
     except Exception as e:
         logger.error(f"Error fetching dashboard data: {e}", exc_info=True)
         return jsonify({'error': 'Failed to fetch dashboard data'}), 500
+# --- Background jobs ---
+# ?async=1 on /api/report, /api/job-analysis and /api/resume/generate queues
+# the work and returns 202 with a job id instead of holding the worker.
+from job_queue import JobQueue, JobError
+
+def _wants_async() -> bool:
+    return request.args.get('async', '').lower() in ('1', 'true', 'yes')
+
+def _submit_job(kind: str, payload: dict):
+    job_id = app.job_queue.submit(kind, payload)
+    logger.info(f"Queued {kind} job {job_id}")
+    return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': f'/api/jobs/{job_id}'}), 202
+
+def _report_job(payload, progress):
+    """Generates a report; the sections written so far are published as progress."""
+    enrollment_no = payload['enrollment_no']
+    partial_report = {}
+    for event, data in app.rag_system.stream_structured_report(enrollment_no, force_refresh=payload['force_refresh']):
+        if event == 'progress':
+            progress({'section': data['section']})
+        elif event == 'section':
+            partial_report[data['name']] = data['data']
+            progress({'report': partial_report})
+        else:
+            report_data = data['report']
+            if report_data.get('error'):
+                raise JobError(report_data['error'])
+            if not data['cached'] and not data.get('coalesced') and app.report_manager:
+                try:
+                    app.report_manager.save_report(enrollment_no, report_data)
+                    logger.info(f"Report saved for {enrollment_no}")
+                except Exception as e:
+                    logger.error(f"Failed to save report: {e}")
+            return report_data
+
+def _job_analysis_job(payload, progress):
+    result = app.rag_system.analyze_job_application(payload['job_input'], payload['enrollment_no'])
+    if result.get("error"):
+        raise JobError(result["error"])
+    return result
+
+def _resume_job(payload, progress):
+    enrollment_no = payload['enrollment_no']
+    resume_content = app.rag_system.generate_tailored_resume(enrollment_no, payload['job_description'])
+    if resume_content.startswith("Error"):
+        raise JobError(resume_content)
+    if app.resume_manager:
+        try:
+            app.resume_manager.save_resume(enrollment_no, payload['role'], payload['company'], resume_content)
+            logger.info(f"Resume saved for {enrollment_no}")
+        except Exception as e:
+            logger.error(f"Failed to save resume: {e}")
+    return {'resume': resume_content}
+
+app.job_queue = JobQueue()
+if app.rag_system:
+    app.job_queue.register('report', _report_job)
+    app.job_queue.register('job_analysis', _job_analysis_job)
+    app.job_queue.register('resume', _resume_job)
+    app.job_queue.start()
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    """Job state: status, progress, and the result once it has succeeded."""
+    job = app.job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/metrics/jobs', methods=['GET'])
+def get_job_metrics():
+    return jsonify(app.job_queue.get_stats())
+
 if __name__ == '__main__':
     # Run the app
     
@@ -0,0 +1,321 @@
+# batch_reports.py - Generate reports for a cohort of students
+#
+# A batch job runs generate_structured_report for a list of enrollments on a
+# bounded thread pool and saves every new report through ReportManager. The
+# job state (one JSON file per job under batch_jobs/) is rewritten after each
+# student, so an interrupted job can be resumed and only the students that
+# are not done yet are generated again.
+#
+# Every gunicorn worker and the CLI see the same job files. A run holds a
+# job_lease on its job: the job counts as running only while its holder
+# renews the heartbeat, and a second start or resume anywhere is refused.
+#
+# CLI:
+#   python batch_reports.py --all [--concurrency 4] [--refresh]
+#   python batch_reports.py 35214811922 01234567890 ...
+#   python batch_reports.py --resume <job_id>
+#   python batch_reports.py --list
+
+import argparse
+import json
+import os
+import time
+import uuid
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import job_lease
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = "batch_jobs"
+DEFAULT_CONCURRENCY = 4
+MAX_CONCURRENCY = 16
+
+
+_usage_hook = None
+_usage_hook_lock = threading.Lock()
+
+
+def _token_counter():
+    """
+    Context manager yielding a dict that accumulates the token usage of every
+    LLM call made in the current context. (LangChain's own usage callback
+    skips responses without a model name, which Gemini's don't carry.)
+    """
+    global _usage_hook
+    from contextlib import contextmanager
+    from contextvars import ContextVar
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.tracers.context import register_configure_hook
+
+    class TokenCounter(BaseCallbackHandler):
+        def __init__(self):
+            self.tokens = {'input_tokens': 0, 'output_tokens': 0, 'total_tokens': 0}
+            self._lock = threading.Lock()
+
+        def on_llm_end(self, response, **kwargs):
+            for generation in (response.generations or [[]])[0][:1]:
+                usage = getattr(getattr(generation, 'message', None), 'usage_metadata', None) or {}
+                with self._lock:
+                    for key in self.tokens:
+                        self.tokens[key] += usage.get(key, 0) or 0
+
+    with _usage_hook_lock:
+        if _usage_hook is None:
+            _usage_hook = ContextVar("batch_report_token_counter", default=None)
+            register_configure_hook(_usage_hook, inheritable=True)
+
+    @contextmanager
+    def counting():
+        counter = TokenCounter()
+        token = _usage_hook.set(counter)
+        try:
+            yield counter.tokens
+        finally:
+            _usage_hook.reset(token)
+
+    return counting()
+
+
+def _add_tokens(results) -> dict:
+    totals = {'input_tokens': 0, 'output_tokens': 0, 'total_tokens': 0}
+    for tokens in results:
+        for key in totals:
+            totals[key] += (tokens or {}).get(key, 0)
+    return totals
+
+
+class BatchReportRunner:
+    """
+    Creates, runs and resumes batch report jobs.
+
+    Jobs run on a background thread per job (start()) or in the calling
+    thread (run()); either way at most `concurrency` reports are generated
+    at once.
+    """
+
+    def __init__(self, rag_system, report_manager, jobs_dir=JOBS_DIR):
+        self.rag_system = rag_system
+        self.report_manager = report_manager
+        self.jobs_dir = os.path.join(os.path.dirname(__file__), jobs_dir)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self.owner = job_lease.new_owner()
+
+    # --- job state ---
+
+    def _job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _save_job(self, job):
+        job['updated_at'] = datetime.now().isoformat()
+        path = self._job_path(job['id'])
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(job, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def _load_job(self, job_id):
+        try:
+            with open(self._job_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return None
+
+    def get_job(self, job_id):
+        job = self._load_job(job_id)
+        # A "running" job whose holder stopped renewing its lease was interrupted
+        if job and job.get('status') == 'running' and job_lease.abandoned(job, self.owner):
+            job['status'] = 'interrupted'
+        return job
+
+    def list_jobs(self):
+        jobs = []
+        for name in sorted(os.listdir(self.jobs_dir)):
+            if name.endswith('.json'):
+                job = self.get_job(name[:-len('.json')])
+                if job:
+                    jobs.append({k: job.get(k) for k in ('id', 'status', 'created_at', 'updated_at', 'summary')})
+        jobs.sort(key=lambda j: j.get('created_at') or '', reverse=True)
+        return jobs
+
+    def create_job(self, enrollments=None, concurrency=DEFAULT_CONCURRENCY, force_refresh=False):
+        """Creates a job for `enrollments` (default: every student); returns it."""
+        if not enrollments:
+            enrollments = list(self.rag_system.student_data)
+        # Keep the order, drop duplicates
+        enrollments = list(dict.fromkeys(str(e) for e in enrollments))
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'status': 'pending',
+            'created_at': datetime.now().isoformat(),
+            'concurrency': max(1, min(int(concurrency), MAX_CONCURRENCY)),
+            'force_refresh': bool(force_refresh),
+            'enrollments': enrollments,
+            'results': {},
+            'summary': None,
+        }
+        self._save_job(job)
+        return job
+
+    # --- execution ---
+
+    def start(self, job_id):
+        """Runs (or resumes) a job on a background thread."""
+        job = self._claim(job_id)
+        threading.Thread(target=self._run_claimed, args=(job,), daemon=True).start()
+
+    def run(self, job_id):
+        """Runs (or resumes) a job in the calling thread; returns the final job state."""
+        return self._run_claimed(self._claim(job_id))
+
+    def _claim(self, job_id):
+        """Marks a job running under this runner's lease; refuses a job running anywhere else."""
+        with job_lease.store_lock(self.jobs_dir):
+            job = self._load_job(job_id)
+            if job is None:
+                raise ValueError(f"Unknown batch job: {job_id}")
+            if job['status'] == 'running' and not job_lease.abandoned(job, self.owner):
+                raise ValueError(f"Batch job {job_id} is already running")
+            job['status'] = 'running'
+            job['runs'] = job.get('runs', 0) + 1
+            job.pop('error', None)
+            job_lease.take(job, self.owner)
+            self._save_job(job)
+        return job
+
+    def _run_claimed(self, job):
+        try:
+            return self._run(job)
+        except Exception as e:
+            logger.error(f"Batch job {job['id']} failed: {e}", exc_info=True)
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            self._save_job(job)
+            return job
+
+    def _run(self, job):
+        job_id = job['id']
+        # Resuming: students that already succeeded are not generated again
+        todo = [e for e in job['enrollments'] if job['results'].get(e, {}).get('status') != 'done']
+
+        print(f"📦 Batch job {job_id}: {len(todo)} of {len(job['enrollments'])} reports to generate "
+              f"(concurrency {job['concurrency']})")
+        started_at = time.monotonic()
+        state_lock = threading.Lock()
+        finished = threading.Event()
+
+        def renew_lease():
+            while not finished.wait(job_lease.HEARTBEAT_INTERVAL):
+                with state_lock:
+                    job_lease.renew(job)
+                    self._save_job(job)
+
+        def work(enrollment_no):
+            result = self._generate_one(enrollment_no, job['force_refresh'])
+            result['finished_run'] = job['runs']
+            with state_lock:
+                job['results'][enrollment_no] = result
+                job['summary'] = self._summarize(job, time.monotonic() - started_at, len(todo))
+                self._save_job(job)
+                done = job['summary']['finished_this_run']
+            icon = "✅" if result['status'] == 'done' else "❌"
+            print(f"   {icon} [{done}/{len(todo)}] {enrollment_no} ({result['seconds']}s)")
+
+        threading.Thread(target=renew_lease, name=f"batch-lease-{job_id}", daemon=True).start()
+        try:
+            with ThreadPoolExecutor(max_workers=job['concurrency']) as executor:
+                list(executor.map(work, todo))
+        finally:
+            finished.set()
+
+        with state_lock:
+            job['summary'] = self._summarize(job, time.monotonic() - started_at, len(todo))
+            job['status'] = 'completed' if not job['summary']['failed'] else 'completed_with_errors'
+            self._save_job(job)
+        summary = job['summary']
+        print(f"📦 Batch job {job_id} {job['status']}: {summary['succeeded']} ok, {summary['failed']} failed, "
+              f"{summary['reports_per_minute']} reports/min, {summary['tokens']['total_tokens']} tokens")
+        return job
+
+    def _generate_one(self, enrollment_no, force_refresh):
+        result = {'status': 'failed', 'cached': False, 'report_id': None, 'error': None,
+                  'tokens': _add_tokens([])}
+        started_at = time.monotonic()
+        try:
+            if enrollment_no not in self.rag_system.student_data:
+                raise ValueError("No data found for this student.")
+            report = None if force_refresh else self.rag_system.get_cached_report(enrollment_no)
+            if report is not None:
+                # Profile unchanged since the last report; it is already in the history
+                result['cached'] = True
+            else:
+                # Token usage of every LLM call made by this thread for this report
+                with _token_counter() as tokens:
+                    report = self.rag_system.generate_structured_report(enrollment_no, force_refresh=True)
+                result['tokens'] = dict(tokens)
+                if report.get('error'):
+                    raise RuntimeError(report['error'])
+                if self.report_manager:
+                    result['report_id'] = self.report_manager.save_report(enrollment_no, report)['id']
+            result['status'] = 'done'
+        except Exception as e:
+            logger.warning(f"Batch report for {enrollment_no} failed: {e}")
+            result['error'] = str(e)
+        result['seconds'] = round(time.monotonic() - started_at, 2)
+        return result
+
+    def _summarize(self, job, elapsed, attempted):
+        results = job['results']
+        tokens = _add_tokens(r.get('tokens') for r in results.values())
+        finished = [r for r in results.values() if r.get('finished_run') == job['runs']]
+        return {
+            'total': len(job['enrollments']),
+            'succeeded': sum(1 for r in results.values() if r['status'] == 'done'),
+            'failed': sum(1 for r in results.values() if r['status'] == 'failed'),
+            'cached': sum(1 for r in results.values() if r.get('cached')),
+            'pending': sum(1 for e in job['enrollments'] if e not in results),
+            'attempted_this_run': attempted,
+            'finished_this_run': len(finished),
+            'elapsed_seconds': round(elapsed, 2),
+            'reports_per_minute': round(len(finished) * 60 / elapsed, 2) if elapsed > 0 else 0.0,
+            'tokens': tokens,
+            'failures': {e: r['error'] for e, r in results.items() if r['status'] == 'failed'},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate reports for many students at once.")
+    parser.add_argument('enrollments', nargs='*', help="Enrollment numbers (default with --all: every student)")
+    parser.add_argument('--all', action='store_true', help="Generate reports for every student")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--refresh', action='store_true', help="Regenerate even if the profile is unchanged")
+    parser.add_argument('--resume', metavar='JOB_ID', help="Resume an interrupted or partially failed job")
+    parser.add_argument('--list', action='store_true', help="List batch jobs")
+    args = parser.parse_args()
+
+    if args.list:
+        # Listing needs no models, only the job files
+        for job in BatchReportRunner(None, None).list_jobs():
+            print(json.dumps(job))
+        return
+    if not (args.resume or args.all or args.enrollments):
+        parser.error("give enrollment numbers, --all or --resume JOB_ID")
+
+    from rag_system import StudentApiRAG
+    from report_manager import ReportManager
+
+    runner = BatchReportRunner(StudentApiRAG(), ReportManager())
+    if args.resume:
+        job_id = args.resume
+    else:
+        job_id = runner.create_job(args.enrollments, args.concurrency, args.refresh)['id']
+        print(f"Created batch job {job_id} (resume with --resume {job_id})")
+    job = runner.run(job_id)
+    print(json.dumps(job['summary'], indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
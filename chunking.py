@@ -0,0 +1,213 @@
+# chunking.py - Split a student profile into small, typed retrieval chunks
+#
+# Whole-section documents (the full Codeforces dump, the whole resume) rank
+# poorly and blow the QA budget when retrieved. chunk_student() emits one
+# short, readable chunk per semester, repository, resume paragraph and
+# Codeforces tag, each with typed metadata (chunk_type, semester, repo,
+# tag, ...) for filtering and display.
+
+import re
+from collections import Counter, defaultdict
+
+RESUME_CHUNK_CHARS = 700
+MAX_CODEFORCES_TAGS = 15
+
+_RESUME_HEADINGS = {
+    "summary", "profile", "objective", "about me", "education", "experience",
+    "professional experience", "work experience", "internships", "projects",
+    "personal projects", "academic projects", "skills", "technical skills",
+    "achievements", "awards", "certifications", "certificates", "publications",
+    "positions of responsibility", "leadership", "extracurricular activities",
+    "extra curricular activities", "activities", "courses", "coursework",
+    "relevant coursework", "languages", "interests", "hobbies",
+}
+
+
+def _chunk(text, enroll_no, name, data_source, chunk_type, chunk_id, **fields):
+    metadata = {
+        "enrollment_no": enroll_no,
+        "student_name": name,
+        "data_source": data_source,
+        "chunk_type": chunk_type,
+        "chunk_id": chunk_id,
+    }
+    metadata.update({k: v for k, v in fields.items() if v is not None})
+    return text, metadata
+
+
+def _academic_chunks(enroll_no, name, academic):
+    chunks = [_chunk(
+        f"Academic overview: {academic.get('degree')} in {academic.get('branch')} at "
+        f"{academic.get('institute')}. Overall CGPA {academic.get('overall_cgpa')}, "
+        f"overall percentage {academic.get('overall_percentage')}. SGPA by semester: "
+        + ", ".join(f"Sem {s.get('semester')}: {s.get('sgpa')}" for s in academic.get("semester_performance", [])),
+        enroll_no, name, "academics", "academic_overview", "academics:overview",
+        cgpa=academic.get("overall_cgpa"),
+    )]
+    for sem in academic.get("semester_performance", []):
+        subjects = "; ".join(f"{s.get('subject')} (grade {s.get('grade')}, {s.get('marks')} marks)"
+                             for s in sem.get("subjects", []))
+        chunks.append(_chunk(
+            f"Semester {sem.get('semester')}: SGPA {sem.get('sgpa')}, {sem.get('percentage')}%. "
+            f"Subjects: {subjects}",
+            enroll_no, name, "academics", "semester", f"academics:sem{sem.get('semester')}",
+            semester=sem.get("semester"), sgpa=sem.get("sgpa"),
+        ))
+    return chunks
+
+
+def _leetcode_chunks(enroll_no, name, lc):
+    difficulty = lc.get("problemsByDifficulty") or {}
+    tags = ", ".join(f"{s.get('skill')} ({s.get('solved')})" for s in lc.get("topSkillsSummary", []))
+    recent = ", ".join(s.get("title", "") for s in lc.get("recentSubmissions", [])[:10])
+    activity = lc.get("activity") or {}
+    return [_chunk(
+        f"LeetCode {lc.get('username')}: {lc.get('totalSolved')} problems solved "
+        f"(Easy {difficulty.get('Easy')}, Medium {difficulty.get('Medium')}, Hard {difficulty.get('Hard')}), "
+        f"acceptance rate {lc.get('acceptanceRate')}%, ranking {lc.get('ranking')}, "
+        f"primary language {(lc.get('primaryLanguage') or {}).get('languageName')}. "
+        f"Current streak {activity.get('currentStreak')} days, {activity.get('totalActiveDays')} active days. "
+        f"Solved by topic: {tags}. Recent problems: {recent}",
+        enroll_no, name, "leetcode", "leetcode_summary", "leetcode:summary",
+        total_solved=lc.get("totalSolved"),
+    )]
+
+
+def _github_chunks(enroll_no, name, gh):
+    stats = gh.get("stats") or {}
+    readme = " ".join((gh.get("cleaned_profile_readme") or "").split())
+    chunks = [_chunk(
+        f"GitHub {gh.get('username')}: {stats.get('public_repos')} public repositories, "
+        f"{stats.get('followers')} followers. Bio: {' '.join((gh.get('bio') or '').split())} "
+        f"Profile README: {readme[:1200]}",
+        enroll_no, name, "github", "github_profile", "github:profile",
+        public_repos=stats.get("public_repos"),
+    )]
+
+    repos = {}
+    pinned = set()
+    for repo in gh.get("pinned_repositories") or []:
+        repo = repo if isinstance(repo, dict) else {"name": repo}
+        pinned.add(repo.get("name"))
+        repos[repo.get("name")] = repo
+    for repo in gh.get("top_repositories") or []:
+        repos[repo.get("name")] = dict(repos.get(repo.get("name"), {}), **repo)
+
+    for repo_name, repo in repos.items():
+        if not repo_name:
+            continue
+        description = repo.get("description") or "no description"
+        chunks.append(_chunk(
+            f"GitHub repository {repo_name}{' (pinned)' if repo_name in pinned else ''}: "
+            f"{description}. Language {repo.get('language') or 'unknown'}, {repo.get('stars', 0)} stars, "
+            f"{repo.get('forks', 0)} forks" + (f", last pushed {repo['last_pushed']}" if repo.get("last_pushed") else "") + ".",
+            enroll_no, name, "github", "repository", f"github:repo:{repo_name}",
+            repo=repo_name, language=repo.get("language"), stars=repo.get("stars", 0),
+            pinned=repo_name in pinned,
+        ))
+    return chunks
+
+
+def _codeforces_chunks(enroll_no, name, cf):
+    submissions = cf.get("submissions") or []
+    verdicts = Counter(s.get("verdict") for s in submissions)
+    contests = cf.get("contest_history") or []
+    chunks = [_chunk(
+        f"Codeforces {cf.get('username')}: rating {cf.get('rating')} (max {cf.get('maxRating')}), "
+        f"rank {cf.get('rank')} (max {cf.get('maxRank')}), {len(contests)} rated contests. "
+        f"{len(submissions)} recent submissions, verdicts: "
+        + ", ".join(f"{v} {n}" for v, n in verdicts.most_common())
+        + ". Recent contests: "
+        + "; ".join(f"{c.get('contestName')} rank {c.get('rank')} ({c.get('ratingChange'):+d})"
+                    for c in contests[-5:] if isinstance(c.get("ratingChange"), int)),
+        enroll_no, name, "codeforces", "codeforces_summary", "codeforces:summary",
+        rating=cf.get("rating"),
+    )]
+
+    by_tag = defaultdict(list)
+    for submission in submissions:
+        for tag in submission.get("problem_tags", []):
+            by_tag[tag].append(submission)
+    ranked_tags = sorted(by_tag.items(), key=lambda item: -len(item[1]))[:MAX_CODEFORCES_TAGS]
+    for tag, tag_submissions in ranked_tags:
+        accepted = sum(1 for s in tag_submissions if s.get("verdict") == "OK")
+        ratings = [s["problem_rating"] for s in tag_submissions if isinstance(s.get("problem_rating"), (int, float))]
+        tag_verdicts = Counter(s.get("verdict") for s in tag_submissions if s.get("verdict") != "OK")
+        solved = sorted({s.get("problem_name") for s in tag_submissions if s.get("verdict") == "OK"})
+        text = (f"Codeforces {tag} problems: {len(tag_submissions)} submissions, {accepted} accepted "
+                f"({accepted * 100 // len(tag_submissions)}%)")
+        if ratings:
+            text += f", problem ratings {min(ratings)}-{max(ratings)}"
+        if tag_verdicts:
+            text += ". Failed verdicts: " + ", ".join(f"{v} {n}" for v, n in tag_verdicts.most_common())
+        if solved:
+            text += ". Solved: " + ", ".join(solved[:10])
+        chunks.append(_chunk(
+            text + ".", enroll_no, name, "codeforces", "codeforces_tag", f"codeforces:tag:{tag}",
+            tag=tag, attempts=len(tag_submissions), accepted=accepted,
+        ))
+    return chunks
+
+
+def split_resume(text):
+    """Splits resume text into (section, paragraph) pairs of at most ~RESUME_CHUNK_CHARS."""
+    paragraphs = []
+    section, buffer = "header", []
+
+    def flush():
+        if buffer:
+            paragraphs.append((section, " ".join(buffer)))
+            buffer.clear()
+
+    for raw_line in (text or "").splitlines():
+        line = " ".join(raw_line.replace("​", " ").split())
+        if not line or line in {"●", "•"}:
+            continue
+        if line.lower().rstrip(":") in _RESUME_HEADINGS:
+            flush()
+            section = line.rstrip(":").title()
+            continue
+        if buffer and sum(len(part) + 1 for part in buffer) + len(line) > RESUME_CHUNK_CHARS:
+            flush()
+        buffer.append(line)
+    flush()
+    return paragraphs
+
+
+def _resume_chunks(enroll_no, name, resume):
+    chunks = []
+    if resume.get("key_skills") or resume.get("professional_links"):
+        chunks.append(_chunk(
+            f"Resume skills: {', '.join(resume.get('key_skills') or [])}. "
+            f"Professional links: {', '.join(resume.get('professional_links') or [])}. "
+            f"Missing resume elements: {', '.join(resume.get('missing_elements') or []) or 'none'}.",
+            enroll_no, name, "resume", "resume_summary", "resume:summary",
+        ))
+    section_counts = Counter()
+    for section, paragraph in split_resume(resume.get("full_text")):
+        section_counts[section] += 1
+        chunks.append(_chunk(
+            f"Resume {section}: {paragraph}",
+            enroll_no, name, "resume", "resume_paragraph",
+            f"resume:{section.lower()}:{section_counts[section]}",
+            section=section,
+        ))
+    return chunks
+
+
+def chunk_student(enroll_no, data):
+    """Returns a list of (text, metadata) chunks for one student's profile."""
+    name = data.get("name")
+    coding = data.get("coding_profiles") or {}
+    chunks = []
+    if data.get("academic_profile"):
+        chunks += _academic_chunks(enroll_no, name, data["academic_profile"])
+    if coding.get("leetcode") and not coding["leetcode"].get("error"):
+        chunks += _leetcode_chunks(enroll_no, name, coding["leetcode"])
+    if coding.get("github") and not coding["github"].get("error"):
+        chunks += _github_chunks(enroll_no, name, coding["github"])
+    if coding.get("codeforces") and not coding["codeforces"].get("error"):
+        chunks += _codeforces_chunks(enroll_no, name, coding["codeforces"])
+    if data.get("resume") and not data["resume"].get("error"):
+        chunks += _resume_chunks(enroll_no, name, data["resume"])
+    return chunks
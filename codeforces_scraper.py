@@ -1,4 +1,5 @@
 import requests
+import http_client
 
 def get_codeforces_profile(username: str):
     api_base = "https://codeforces.com/api/"
@@ -10,7 +11,7 @@ def get_codeforces_profile(username: str):
 
     try:
         # 1. User info
-        info_resp = requests.get(info_url)
+        info_resp = http_client.get(info_url)
         info_resp.raise_for_status()
         info_data = info_resp.json()
         if info_data.get("status") != "OK":
@@ -18,19 +19,19 @@ def get_codeforces_profile(username: str):
         user_info = info_data["result"][0]
 
         # 2. Contest rating history
-        rating_data = requests.get(rating_url).json()
+        rating_data = http_client.get(rating_url).json()
         contests = rating_data.get("result", []) if rating_data.get("status") == "OK" else []
         
         # 3. Recent submissions
-        status_data = requests.get(status_url).json()
+        status_data = http_client.get(status_url).json()
         submissions = status_data.get("result", []) if status_data.get("status") == "OK" else []
 
         # 4. Friends
-        friends_data = requests.get(friends_url).json()
+        friends_data = http_client.get(friends_url).json()
         friends = friends_data.get("result", []) if friends_data.get("status") == "OK" else []
 
         # 5. Blogs by user
-        blogs_data = requests.get(blogs_url).json()
+        blogs_data = http_client.get(blogs_url).json()
         blogs = blogs_data.get("result", []) if blogs_data.get("status") == "OK" else []
 
         # 6. Blog comments (first 5)
@@ -38,7 +39,7 @@ def get_codeforces_profile(username: str):
         for entry in blogs[:5]:
             blog_id = entry['id']
             blog_url = f"{api_base}blogEntry.comments?blogEntryId={blog_id}"
-            comments_data = requests.get(blog_url).json()
+            comments_data = http_client.get(blog_url).json()
             if comments_data.get("status") == "OK":
                 blog_comments.append({
                     "blog_id": blog_id,
@@ -0,0 +1,259 @@
+# context_builder.py - Compact, token-budgeted student context for LLM prompts
+#
+# Pretty-printed profile JSON wastes a large share of every prompt on
+# indentation and on long raw lists (every Codeforces submission, every
+# subject mark, the resume text twice). build_context() serialises the
+# profile compactly, rolls long lists up into counts and rates, and then
+# degrades step by step until the result fits the operation's token budget.
+
+import json
+import math
+import threading
+import logging
+from collections import Counter, defaultdict, deque
+
+logger = logging.getLogger(__name__)
+
+# Bump when the context layout changes; it is part of the report cache key
+CONTEXT_VERSION = 1
+
+# Rough chars-per-token for Gemini/English JSON; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Token budget for the student context of each operation
+CONTEXT_BUDGETS = {
+    'report': 6000,
+    # Shared by the concurrent calls of a sectioned report
+    'report_section': 3500,
+    'resume': 4000,
+    'job_analysis': 4000,
+    'qa': 2500,
+}
+DEFAULT_BUDGET = 4000
+
+SECTIONS = ('academic_profile', 'leetcode', 'github', 'codeforces', 'resume')
+
+# Each level trades detail for size; build_context() walks them in order
+_LEVELS = [
+    {'subjects': 'all', 'recent': 10, 'repos': 10, 'readme_chars': 1500, 'resume_chars': 5000},
+    {'subjects': 'extremes', 'recent': 5, 'repos': 6, 'readme_chars': 600, 'resume_chars': 3000},
+    {'subjects': 'none', 'recent': 0, 'repos': 4, 'readme_chars': 0, 'resume_chars': 1500},
+    {'subjects': 'none', 'recent': 0, 'repos': 3, 'readme_chars': 0, 'resume_chars': 600},
+]
+
+_STATS_WINDOW = 200
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def dumps_compact(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def _truncate(text, limit):
+    text = " ".join((text or "").split())
+    if limit <= 0:
+        return None
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+def _rate(part, whole):
+    return round(part / whole, 3) if whole else 0.0
+
+
+# --- Per-section rollups ---
+
+def _academic(profile, level):
+    academic = profile.get('academic_profile') or {}
+    if not academic:
+        return None
+    semesters = []
+    for sem in academic.get('semester_performance', []):
+        entry = {'sem': sem.get('semester'), 'sgpa': sem.get('sgpa'), 'pct': sem.get('percentage')}
+        subjects = [s for s in sem.get('subjects', []) if isinstance(s.get('marks'), (int, float))]
+        if level['subjects'] == 'all':
+            # "SUBJECT:grade:marks" is a third of the size of the dict form
+            entry['subjects'] = [f"{s.get('subject')}:{s.get('grade')}:{s.get('marks')}" for s in sem.get('subjects', [])]
+        elif level['subjects'] == 'extremes' and subjects:
+            ranked = sorted(subjects, key=lambda s: s['marks'])
+            entry['best'] = f"{ranked[-1]['subject']}:{ranked[-1]['marks']}"
+            entry['worst'] = f"{ranked[0]['subject']}:{ranked[0]['marks']}"
+        semesters.append(entry)
+    return {
+        'institute': academic.get('institute'),
+        'degree': academic.get('degree'),
+        'branch': academic.get('branch'),
+        'cgpa': academic.get('overall_cgpa'),
+        'pct': academic.get('overall_percentage'),
+        'semesters': semesters,
+    }
+
+
+def _leetcode(profile, level):
+    lc = (profile.get('coding_profiles') or {}).get('leetcode') or {}
+    if not lc or lc.get('error'):
+        return None
+    result = {
+        'user': lc.get('username'),
+        'ranking': lc.get('ranking'),
+        'solved': lc.get('totalSolved'),
+        'acceptance': lc.get('acceptanceRate'),
+        'by_difficulty': lc.get('problemsByDifficulty'),
+        'language': (lc.get('primaryLanguage') or {}).get('languageName'),
+        # tag -> solved count
+        'tags': {s.get('skill'): s.get('solved') for s in lc.get('topSkillsSummary', [])},
+        'activity': lc.get('activity'),
+    }
+    recent = lc.get('recentSubmissions', [])
+    if level['recent'] and recent:
+        result['recent'] = [s.get('title') for s in recent[:level['recent']]]
+        result['last_active'] = recent[0].get('timestamp')
+    return result
+
+
+def _github(profile, level):
+    gh = (profile.get('coding_profiles') or {}).get('github') or {}
+    if not gh or gh.get('error'):
+        return None
+    repos = gh.get('top_repositories') or []
+    languages = Counter(r.get('language') for r in repos if r.get('language'))
+    result = {
+        'user': gh.get('username'),
+        'bio': _truncate(gh.get('bio'), 200),
+        'stats': gh.get('stats'),
+        'languages': dict(languages.most_common()),
+        'pinned': [r.get('name') if isinstance(r, dict) else r for r in (gh.get('pinned_repositories') or [])],
+        # name|language|stars|forks|last push
+        'repos': [f"{r.get('name')}|{r.get('language')}|{r.get('stars', 0)}★|{r.get('forks', 0)}f|{(r.get('last_pushed') or '')[:10]}"
+                  for r in repos[:level['repos']]],
+    }
+    readme = _truncate(gh.get('cleaned_profile_readme'), level['readme_chars'])
+    if readme:
+        result['readme'] = readme
+    return result
+
+
+def _codeforces(profile, level):
+    cf = (profile.get('coding_profiles') or {}).get('codeforces') or {}
+    if not cf or cf.get('error'):
+        return None
+    submissions = cf.get('submissions') or []
+    verdicts = Counter(s.get('verdict') for s in submissions)
+    tags = Counter(tag for s in submissions for tag in s.get('problem_tags', []))
+    accepted_tags = Counter(tag for s in submissions if s.get('verdict') == 'OK' for tag in s.get('problem_tags', []))
+    ratings = [s['problem_rating'] for s in submissions if isinstance(s.get('problem_rating'), (int, float))]
+    contests = cf.get('contest_history') or []
+    return {
+        'user': cf.get('username'),
+        'rating': cf.get('rating'),
+        'max_rating': cf.get('maxRating'),
+        'rank': cf.get('rank'),
+        'contests': len(contests),
+        'rating_changes': [c.get('ratingChange') for c in contests[-10:]],
+        'solving': cf.get('problem_solving_stats'),
+        'submissions': {
+            'total': len(submissions),
+            'verdict_rates': {v: _rate(n, len(submissions)) for v, n in verdicts.most_common()},
+            # tag -> [attempted, accepted]
+            'tags': {t: [n, accepted_tags.get(t, 0)] for t, n in tags.most_common(12)},
+            'rating_range': [min(ratings), max(ratings)] if ratings else None,
+            'languages': dict(Counter(s.get('language') for s in submissions).most_common(3)),
+        },
+    }
+
+
+def _resume(profile, level):
+    resume = profile.get('resume') or {}
+    if not resume or resume.get('error'):
+        return None
+    return {
+        'key_skills': resume.get('key_skills'),
+        'links': resume.get('professional_links'),
+        'missing': resume.get('missing_elements'),
+        # skills_summary and full_text_preview duplicate full_text
+        'text': _truncate(resume.get('full_text') or resume.get('skills_summary'), level['resume_chars']),
+    }
+
+
+_SECTION_BUILDERS = {
+    'academic_profile': _academic,
+    'leetcode': _leetcode,
+    'github': _github,
+    'codeforces': _codeforces,
+    'resume': _resume,
+}
+
+
+def _compact_profile(profile, level, sections):
+    compact = {'name': profile.get('name'), 'enrollment_no': profile.get('enrollment_no')}
+    for section in sections:
+        value = _SECTION_BUILDERS[section](profile, level)
+        if value is not None:
+            compact[section] = value
+    return compact
+
+
+class PromptStats:
+    """Rolling per-operation record of prompt sizes, for the metrics endpoint."""
+
+    def __init__(self, window=_STATS_WINDOW):
+        self._lock = threading.Lock()
+        self._calls = defaultdict(lambda: deque(maxlen=window))
+        self._totals = defaultdict(lambda: {'calls': 0, 'prompt_tokens': 0, 'over_budget': 0})
+
+    def record(self, operation, prompt_tokens, context_tokens, budget):
+        with self._lock:
+            self._calls[operation].append((prompt_tokens, context_tokens))
+            totals = self._totals[operation]
+            totals['calls'] += 1
+            totals['prompt_tokens'] += prompt_tokens
+            totals['over_budget'] += int(context_tokens > budget)
+
+    def get_stats(self):
+        with self._lock:
+            stats = {}
+            for operation, calls in self._calls.items():
+                prompt_tokens = [c[0] for c in calls]
+                stats[operation] = dict(
+                    self._totals[operation],
+                    budget=CONTEXT_BUDGETS.get(operation, DEFAULT_BUDGET),
+                    recent_avg_prompt_tokens=round(sum(prompt_tokens) / len(prompt_tokens)),
+                    recent_max_prompt_tokens=max(prompt_tokens),
+                    recent_avg_context_tokens=round(sum(c[1] for c in calls) / len(calls)),
+                )
+            return stats
+
+
+prompt_stats = PromptStats()
+
+
+def build_context(profile: dict, operation: str, sections=None, budget=None) -> str:
+    """
+    Returns the compact JSON context for `operation`, restricted to `sections`
+    (default: all of SECTIONS) and no larger than the operation's token budget
+    where the rollups allow it.
+    """
+    budget = budget or CONTEXT_BUDGETS.get(operation, DEFAULT_BUDGET)
+    sections = [s for s in (sections or SECTIONS) if s in _SECTION_BUILDERS]
+
+    for level in _LEVELS:
+        context = dumps_compact(_compact_profile(profile, level, sections))
+        if estimate_tokens(context) <= budget:
+            break
+    else:
+        # Even the tightest rollup is too large; cut it (still usable as text)
+        logger.warning(f"{operation} context exceeds {budget} tokens after rollups; truncating")
+        context = context[:budget * CHARS_PER_TOKEN]
+    return context
+
+
+def record_prompt(operation: str, prompt_text: str, context: str):
+    """Records the size of a fully rendered prompt; returns its token estimate."""
+    prompt_tokens = estimate_tokens(prompt_text)
+    context_tokens = estimate_tokens(context)
+    budget = CONTEXT_BUDGETS.get(operation, DEFAULT_BUDGET)
+    prompt_stats.record(operation, prompt_tokens, context_tokens, budget)
+    logger.info(f"{operation} prompt: ~{prompt_tokens} tokens (context ~{context_tokens}/{budget})")
+    return prompt_tokens
@@ -178,9 +178,10 @@ def _extract_skills(student_data: dict) -> dict: # MODIFIED to return a dict
     """
     from collections import Counter
 
-    resume_skills = student_data.get("resume", {}).get("key_skills", [])
+    # Profiles the student has not linked are stored as null
+    resume_skills = (student_data.get("resume") or {}).get("key_skills") or []
     leetcode_skills = [
-        item.get("skill") for item in student_data.get("coding_profiles", {}).get("leetcode", {}).get("topSkillsSummary", [])
+        item.get("skill") for item in ((student_data.get("coding_profiles") or {}).get("leetcode") or {}).get("topSkillsSummary") or []
     ]
     
     # Normalize skills to title case for consistency
@@ -0,0 +1,139 @@
+# embedding_cache.py - Content-addressed cache of document embeddings
+#
+# Every text is keyed by sha256(model name + text), so an unchanged chunk is
+# never embedded twice, whichever student or run it comes from. Keys are
+# kept as raw 32-byte digests and vectors as float16, one directory per
+# model. Misses are deduplicated and embedded in batches spread across all
+# CPU cores.
+
+import hashlib
+import os
+import re
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "embedding_cache"
+KEYS_FILE = "keys.npy"
+VECTORS_FILE = "vectors.npy"
+BATCH_SIZE = 32
+
+
+def content_key(text: str, model_name: str) -> bytes:
+    return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).digest()
+
+
+class CachedEmbeddings:
+    """
+    Wraps a LangChain embeddings object (embed_documents/embed_query) with a
+    persistent content-addressed cache. Call flush() to write new entries.
+    """
+
+    def __init__(self, embeddings, model_name, cache_dir=CACHE_DIR, workers=None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.path = os.path.join(os.path.dirname(__file__), cache_dir, safe_name)
+        self.workers = workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._rows = {}       # digest -> row in _vectors
+        self._vectors = None  # float16 matrix
+        self._pending = {}    # digest -> float32 vector not yet flushed
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        try:
+            keys = np.load(os.path.join(self.path, KEYS_FILE))
+            self._vectors = np.load(os.path.join(self.path, VECTORS_FILE))
+        except (FileNotFoundError, ValueError):
+            return
+        if len(keys) != len(self._vectors):
+            logger.warning(f"Embedding cache at {self.path} is inconsistent; ignoring it")
+            self._vectors = None
+            return
+        self._rows = {key.tobytes(): row for row, key in enumerate(keys)}
+
+    def _lookup(self, digest):
+        vector = self._pending.get(digest)
+        if vector is not None:
+            return vector
+        row = self._rows.get(digest)
+        return None if row is None else self._vectors[row].astype(np.float32)
+
+    def _embed_batches(self, texts):
+        """Embeds texts in BATCH_SIZE batches across the worker threads (torch releases the GIL)."""
+        batches = [texts[i:i + BATCH_SIZE] for i in range(0, len(texts), BATCH_SIZE)]
+        if len(batches) == 1 or self.workers == 1:
+            return [vector for batch in batches for vector in self.embeddings.embed_documents(batch)]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as executor:
+            results = executor.map(self.embeddings.embed_documents, batches)
+            return [vector for batch in results for vector in batch]
+
+    def embed_documents(self, texts):
+        digests = [content_key(text, self.model_name) for text in texts]
+        found, missing = {}, {}
+        with self._lock:
+            for digest, text in zip(digests, texts):
+                if digest in found or digest in missing:
+                    continue
+                vector = self._lookup(digest)
+                if vector is None:
+                    missing[digest] = text
+                else:
+                    found[digest] = vector
+        self.hits += sum(1 for d in digests if d in found)
+        self.misses += len(missing)
+
+        if missing:
+            logger.info(f"Embedding {len(missing)} new texts ({len(texts) - len(missing)} cached)")
+            vectors = self._embed_batches(list(missing.values()))
+            new = {d: np.asarray(v, dtype=np.float32) for d, v in zip(missing, vectors)}
+            with self._lock:
+                self._pending.update(new)
+            found.update(new)
+
+        return [found[d].tolist() for d in digests]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def flush(self):
+        """Appends pending embeddings to the on-disk cache."""
+        with self._lock:
+            if not self._pending:
+                return
+            pending_keys = list(self._pending)
+            new_vectors = np.vstack([self._pending[k] for k in pending_keys]).astype(np.float16)
+            vectors = new_vectors if self._vectors is None else np.concatenate([self._vectors, new_vectors])
+            start = len(self._rows)
+            rows = dict(self._rows)
+            rows.update({k: start + i for i, k in enumerate(pending_keys)})
+            # (n, 32) uint8 rather than 'S32', which would drop trailing NUL bytes
+            keys = np.empty((len(rows), 32), dtype=np.uint8)
+            for digest, row in rows.items():
+                keys[row] = np.frombuffer(digest, dtype=np.uint8)
+
+            os.makedirs(self.path, exist_ok=True)
+            for name, array in ((VECTORS_FILE, vectors), (KEYS_FILE, keys)):
+                target = os.path.join(self.path, name)
+                with open(target + '.tmp', 'wb') as f:
+                    np.save(f, array)
+                os.replace(target + '.tmp', target)
+
+            self._vectors, self._rows, self._pending = vectors, rows, {}
+            logger.info(f"Embedding cache now holds {len(rows)} vectors")
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._rows) + len(self._pending),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
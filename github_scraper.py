@@ -1,5 +1,5 @@
-import requests
 import logging
+import http_client
 
 logging.basicConfig(level=logging.INFO)
 
@@ -17,7 +17,7 @@ def get_github_profile(username: str):
     try:
         # 1. Main profile info request
         logging.info(f"Requesting user profile: {base_api}")
-        user_resp = requests.get(base_api, headers=headers)
+        user_resp = http_client.get(base_api, headers=headers)
         logging.info(f"User profile response status: {user_resp.status_code}")
         user = user_resp.json()
         logging.info(f"User data: {user}")
@@ -40,7 +40,7 @@ def get_github_profile(username: str):
 
         # Followers -- robust to error dicts
         logging.info(f"Requesting followers: {followers_api}")
-        followers_resp = requests.get(followers_api, headers=headers)
+        followers_resp = http_client.get(followers_api, headers=headers)
         logging.info(f"Followers response: {followers_resp.status_code}")
         followers = followers_resp.json()
         if not isinstance(followers, list):
@@ -51,7 +51,7 @@ def get_github_profile(username: str):
 
         # Following -- robust
         logging.info(f"Requesting following: {following_api}")
-        following_resp = requests.get(following_api, headers=headers)
+        following_resp = http_client.get(following_api, headers=headers)
         logging.info(f"Following response: {following_resp.status_code}")
         following = following_resp.json()
         if not isinstance(following, list):
@@ -62,7 +62,7 @@ def get_github_profile(username: str):
 
         # Orgs
         logging.info(f"Requesting orgs: {orgs_api}")
-        orgs_resp = requests.get(orgs_api, headers=headers)
+        orgs_resp = http_client.get(orgs_api, headers=headers)
         logging.info(f"Orgs response: {orgs_resp.status_code}")
         orgs = orgs_resp.json()
         if not isinstance(orgs, list):
@@ -73,13 +73,13 @@ def get_github_profile(username: str):
 
         # Pinned Repos
         logging.info(f"Requesting pinned repos: {pinned_api}")
-        pinned_resp = requests.get(pinned_api)
+        pinned_resp = http_client.get(pinned_api)
         logging.info(f"Pinned repos response: {pinned_resp.status_code}")
         pinned = pinned_resp.json()[:5] if pinned_resp.ok else []
 
         # User's Repos -- robust
         logging.info(f"Requesting user repos: {repos_api}")
-        repos_resp = requests.get(repos_api, headers=headers)
+        repos_resp = http_client.get(repos_api, headers=headers)
         logging.info(f"Repos response: {repos_resp.status_code}")
         repos = repos_resp.json() if repos_resp.ok and repos_resp.headers.get("Content-Type", "").startswith("application/json") else []
         if not isinstance(repos, list):
@@ -93,7 +93,7 @@ def get_github_profile(username: str):
 
         # Events
         logging.info(f"Requesting events: {events_api}")
-        events_resp = requests.get(events_api, headers=headers)
+        events_resp = http_client.get(events_api, headers=headers)
         logging.info(f"Events response: {events_resp.status_code}")
         events = events_resp.json() if events_resp.ok else []
         if not isinstance(events, list):
@@ -103,7 +103,7 @@ def get_github_profile(username: str):
 
         # Profile README
         logging.info(f"Requesting profile README: {user_readme_api}")
-        ur = requests.get(user_readme_api)
+        ur = http_client.get(user_readme_api)
         user_readme = ur.text if ur.ok and ur.text and 'DOCTYPE' not in ur.text else ""
 
         # Final result
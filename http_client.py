@@ -0,0 +1,176 @@
+# http_client.py - Shared HTTP layer for all scrapers
+#
+# Pooled keep-alive sessions, one place for timeouts, retry with jittered
+# exponential backoff, and per-host latency / error metrics.
+
+import random
+import threading
+import time
+import logging
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger('http_client')
+
+# --- Configuration ---
+DEFAULT_TIMEOUT = (5, 15)  # (connect, read) seconds
+HOST_TIMEOUTS = {
+    # The IPU rank-list API is slow to decrypt/serve large result sets
+    "api.ipuranklist.com": (5, 30),
+}
+
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 8.0   # seconds
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+POOL_CONNECTIONS = 10  # number of hosts to keep pools for
+POOL_MAXSIZE = 20      # connections kept alive per host
+
+LATENCY_WINDOW = 200  # samples kept per host for percentiles
+
+# requests.Session is not guaranteed to be thread-safe, so each thread gets its
+# own pooled session. Worker threads are reused, so connections still persist.
+_local = threading.local()
+
+
+def _get_session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+
+# --- Metrics ---
+
+class _HostMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.status_counts = defaultdict(int)
+        self.total_latency = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+_metrics = defaultdict(_HostMetrics)
+_metrics_lock = threading.Lock()
+
+
+def _record(host: str, latency: float, status=None, error: bool = False, retried: bool = False):
+    with _metrics_lock:
+        m = _metrics[host]
+        m.requests += 1
+        m.total_latency += latency
+        m.latencies.append(latency)
+        if status is not None:
+            m.status_counts[status] += 1
+        if error:
+            m.errors += 1
+        if retried:
+            m.retries += 1
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def get_metrics() -> dict:
+    """Returns per-host request counts, error/retry counts and latency percentiles (ms)."""
+    with _metrics_lock:
+        snapshot = {}
+        for host, m in _metrics.items():
+            recent = sorted(m.latencies)
+            snapshot[host] = {
+                "requests": m.requests,
+                "errors": m.errors,
+                "retries": m.retries,
+                "error_rate": round(m.errors / m.requests, 4) if m.requests else 0.0,
+                "status_counts": dict(m.status_counts),
+                "avg_latency_ms": round(m.total_latency / m.requests * 1000, 1) if m.requests else 0.0,
+                "p50_latency_ms": round(_percentile(recent, 50) * 1000, 1),
+                "p95_latency_ms": round(_percentile(recent, 95) * 1000, 1),
+            }
+        return snapshot
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+# --- Requests ---
+
+def _backoff_delay(attempt: int, response=None) -> float:
+    """Full-jitter exponential backoff, honouring Retry-After when the server sends it."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_CAP)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def request(method: str, url: str, timeout=None, retries=None, **kwargs) -> requests.Response:
+    """
+    Sends an HTTP request through the shared pooled session.
+
+    Transient failures (connection errors, timeouts and RETRY_STATUSES) are
+    retried with jittered backoff. Only idempotent methods retry by default;
+    pass `retries` explicitly for safe POSTs such as GraphQL reads.
+
+    Returns the final response (which may still carry an error status), or
+    re-raises the last requests exception once retries are exhausted.
+    """
+    method = method.upper()
+    host = urlparse(url).netloc
+    if timeout is None:
+        timeout = HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT)
+    if retries is None:
+        retries = MAX_RETRIES if method in IDEMPOTENT_METHODS else 0
+
+    session = _get_session()
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            will_retry = attempt < retries
+            _record(host, time.perf_counter() - start, error=True, retried=will_retry)
+            if not will_retry:
+                logger.warning(f"{method} {host} failed after {attempt + 1} attempt(s): {e}")
+                raise
+            delay = _backoff_delay(attempt)
+            logger.info(f"{method} {host} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+        else:
+            is_error = response.status_code >= 400
+            will_retry = response.status_code in RETRY_STATUSES and attempt < retries
+            _record(host, time.perf_counter() - start, status=response.status_code,
+                    error=is_error, retried=will_retry)
+            if not will_retry:
+                return response
+            delay = _backoff_delay(attempt, response)
+            logger.info(f"{method} {host} returned {response.status_code}, retrying in {delay:.2f}s")
+            response.close()
+
+        time.sleep(delay)
+        attempt += 1
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
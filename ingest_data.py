@@ -1,62 +1,116 @@
 
 import json
-from langchain_community.vectorstores import FAISS
+import hashlib
+import sys
 from langchain.docstore.document import Document
 from langchain_community.embeddings import HuggingFaceEmbeddings
 import os
+from vector_index import NumpyVectorIndex
+from vector_store_config import DB_PATH, MANIFEST_FILE
+from embedding_cache import CachedEmbeddings
+from chunking import chunk_student
 
-DATA_PATH = "data/final_cleaned_student_data.json"
-DB_PATH = "vector_store"
+# agg.py writes the cleaned data next to the code, not under data/
+DATA_PATH = "final_cleaned_student_data.json"
+# "float32", or "int8" for a 4x smaller index (pass --int8)
+INDEX_DTYPE = "float32"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
-def create_vector_db():
-    """Reads the cleaned student data and builds a FAISS vector store."""
+def get_embeddings():
+    """Embedding model shared by ingestion and query-time retrieval."""
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+def build_student_documents(enroll_no, data):
+    """Fine-grained documents (per semester, repository, resume paragraph, Codeforces tag)."""
+    return [Document(page_content=text, metadata=metadata)
+            for text, metadata in chunk_student(enroll_no, data)]
+
+def document_ids(documents):
+    """Stable vector store ids, so a student's chunks can be replaced or deleted."""
+    return [f"{doc.metadata['enrollment_no']}:{doc.metadata['chunk_id']}" for doc in documents]
+
+def documents_hash(documents):
+    hasher = hashlib.sha256(EMBEDDING_MODEL.encode('utf-8'))
+    for doc in documents:
+        hasher.update(json.dumps(doc.metadata, sort_keys=True).encode('utf-8'))
+        hasher.update(doc.page_content.encode('utf-8'))
+    return hasher.hexdigest()
+
+def load_manifest():
+    try:
+        with open(os.path.join(DB_PATH, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, FileNotFoundError):
+        return None
+
+def save_manifest(manifest):
+    with open(os.path.join(DB_PATH, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+def create_vector_db(rebuild=False, int8=False):
+    """
+    Builds or incrementally updates the NumPy vector store.
+
+    A manifest next to the index records each student's document hash and
+    vector ids. On later runs only students whose documents changed are
+    re-embedded, and students no longer in the data are deleted. Pass
+    rebuild=True (or --rebuild) to re-embed everything, and int8=True (or
+    --int8) to store int8-quantised embeddings.
+    """
     with open(DATA_PATH, 'r', encoding='utf-8') as f:
         student_data = json.load(f)
 
     print("Preparing documents for vectorization...")
-    documents = []
-    for enroll_no, data in student_data.items():
-        name = data.get("name")
-        
-        # Create a document for each major section of the student's profile
-        if data.get("academic_profile"):
-            documents.append(Document(
-                page_content=json.dumps(data["academic_profile"]),
-                metadata={"enrollment_no": enroll_no, "student_name": name, "data_source": "academics"}
-            ))
-        
-        if data.get("coding_profiles", {}).get("leetcode"):
-            documents.append(Document(
-                page_content=json.dumps(data["coding_profiles"]["leetcode"]),
-                metadata={"enrollment_no": enroll_no, "student_name": name, "data_source": "leetcode"}
-            ))
-
-        if data.get("coding_profiles", {}).get("github"):
-            documents.append(Document(
-                page_content=json.dumps(data["coding_profiles"]["github"]),
-                metadata={"enrollment_no": enroll_no, "student_name": name, "data_source": "github"}
-            ))
-
-        if data.get("coding_profiles", {}).get("codeforces"):
-            documents.append(Document(
-                page_content=json.dumps(data["coding_profiles"]["codeforces"]),
-                metadata={"enrollment_no": enroll_no, "student_name": name, "data_source": "codeforces"}
-            ))
-
-    print(f"Created {len(documents)} documents.")
-
-    # Use a standard, high-performance embedding model
-    embeddings = HuggingFaceEmbeddings(model_name='sentence-transformers/all-MiniLM-L6-v2')
-
-    print("Creating FAISS vector store...")
-    db = FAISS.from_documents(documents, embeddings)
-    
+    documents_by_student = {
+        enroll_no: build_student_documents(enroll_no, data)
+        for enroll_no, data in student_data.items()
+    }
+    current = {
+        enroll_no: {"hash": documents_hash(docs), "ids": document_ids(docs)}
+        for enroll_no, docs in documents_by_student.items() if docs
+    }
+
+    index_dtype = "int8" if int8 else INDEX_DTYPE
+    manifest = None if rebuild else load_manifest()
+    if manifest and (manifest.get("embedding_model") != EMBEDDING_MODEL
+                     or manifest.get("index_dtype", INDEX_DTYPE) != index_dtype):
+        print("Embedding model or index type changed; rebuilding the whole store.")
+        manifest = None
+
+    if manifest is None or not NumpyVectorIndex.exists(DB_PATH):
+        index = NumpyVectorIndex(DB_PATH, dtype=index_dtype)
+        changed = list(current)
+    else:
+        index = NumpyVectorIndex.load(DB_PATH)
+        previous = manifest.get("students", {})
+        removed = [e for e in previous if e not in current]
+        changed = [e for e in current if previous.get(e, {}).get("hash") != current[e]["hash"]]
+        print(f"{len(changed)} new/changed and {len(removed)} removed students "
+              f"({len(current) - len(changed)} unchanged).")
+        if not changed and not removed:
+            print("✅ Vector store is up to date")
+            return
+
+        index.delete([doc_id for e in removed + changed for doc_id in previous.get(e, {}).get("ids", [])])
+
+    documents, ids = [], []
+    for enroll_no in changed:
+        documents.extend(documents_by_student[enroll_no])
+        ids.extend(current[enroll_no]["ids"])
+    if documents:
+        print(f"Embedding {len(documents)} documents...")
+        # Identical chunks (unchanged sections, full rebuilds) come from the cache
+        embeddings = CachedEmbeddings(get_embeddings(), EMBEDDING_MODEL)
+        vectors = embeddings.embed_documents([doc.page_content for doc in documents])
+        embeddings.flush()
+        print(f"   Embedding cache: {embeddings.get_stats()}")
+        index.add(ids, vectors, [doc.page_content for doc in documents], [doc.metadata for doc in documents])
+
     # Save the vector store locally
-    if not os.path.exists(DB_PATH):
-        os.makedirs(DB_PATH)
-    db.save_local(DB_PATH)
-    
-    print(f"✅ Vector store created and saved at '{DB_PATH}'")
+    index.save()
+    save_manifest({"embedding_model": EMBEDDING_MODEL, "index_dtype": index_dtype, "students": current})
+
+    print(f"✅ Vector store saved at '{DB_PATH}' ({len(index)} documents)")
 
 if __name__ == "__main__":
-    create_vector_db()
\ No newline at end of file
+    create_vector_db(rebuild="--rebuild" in sys.argv, int8="--int8" in sys.argv)
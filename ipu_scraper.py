@@ -1,4 +1,5 @@
 import requests
+import http_client
 import base64
 import json
 from Crypto.Cipher import AES
@@ -39,7 +40,7 @@ class StudentScraper:
         """Fetch encrypted student data from the API."""
         url = f"{self.base_url}?enroll={enroll_no}"
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = http_client.get(url, headers=self.headers)
             if response.status_code == 404:
                 raise Exception("Student not found. Please check the roll number.")
             elif response.status_code == 403:
@@ -0,0 +1,70 @@
+# job_lease.py - Cross-process ownership of jobs kept in a shared store
+#
+# job_queue and batch_reports keep each job in a JSON file that every
+# gunicorn worker (and the batch CLI) can see. The process that holds a job
+# records itself as its owner and renews a heartbeat every
+# HEARTBEAT_INTERVAL; other processes leave the job alone until the
+# heartbeat is older than LEASE_SECONDS or the owner process is gone.
+# Claims are made under an exclusive flock on the store, so two processes
+# never take the same job.
+
+import fcntl
+import os
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+
+HEARTBEAT_INTERVAL = 15   # seconds between lease renewals
+LEASE_SECONDS = 60        # a job whose heartbeat is older was abandoned
+
+LOCK_FILE = ".claim.lock"
+
+
+def new_owner() -> str:
+    """host:pid:nonce; the nonce keeps a recycled pid from looking like the old owner."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+@contextmanager
+def store_lock(store_dir):
+    """Exclusive lock on a store, shared by every process using it."""
+    with open(os.path.join(store_dir, LOCK_FILE), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def owner_gone(owner) -> bool:
+    """True if `owner` was a process on this host that no longer exists."""
+    host, _, rest = (owner or "").partition(":")
+    pid = rest.split(":", 1)[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        # Another host (or an unknown owner): only the lease can tell
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+def renew(record):
+    record['heartbeat_at'] = time.time()
+
+
+def take(record, owner):
+    """Makes `owner` the holder of a job record."""
+    record['owner'] = owner
+    renew(record)
+
+
+def abandoned(record, owner) -> bool:
+    """True if someone other than `owner` holds the job but stopped renewing it or has exited."""
+    if record.get('owner') == owner:
+        return False
+    return time.time() - record.get('heartbeat_at', 0) > LEASE_SECONDS or owner_gone(record.get('owner'))
@@ -0,0 +1,290 @@
+# job_queue.py - Background jobs for the long-running LLM endpoints
+#
+# Report generation, job analysis and resume tailoring take 20-60 s, which
+# would hold a gunicorn sync worker for the whole LLM pipeline. Instead the
+# routes submit a job and return its id at once; a small pool of worker
+# threads runs the queue, and clients poll GET /api/jobs/<id> for progress
+# and the result.
+#
+# Each job is a JSON file under job_store/, so jobs survive a restart.
+# Progress updates are coalesced and written at most every
+# PROGRESS_SAVE_INTERVAL; state changes are written at once.
+#
+# Every gunicorn worker runs its own queue over the same store, and holds a
+# job_lease on each job it has queued or is running. Every RECLAIM_INTERVAL
+# (and at start-up) each process re-queues the jobs whose holder stopped
+# renewing its lease or has exited, so a worker that dies does not strand
+# its jobs (up to MAX_ATTEMPTS runs per job). Jobs are claimed under the
+# store lock, so a job queued in two processes still runs once.
+
+import copy
+import json
+import os
+import queue
+import time
+import uuid
+import threading
+import logging
+from datetime import datetime, timedelta
+
+import job_lease
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = "job_store"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+MAX_ATTEMPTS = 3
+RECLAIM_INTERVAL = 30          # seconds between scans for abandoned jobs
+PROGRESS_SAVE_INTERVAL = 1.0   # seconds; progress written to the store at most this often
+# Finished jobs are deleted from the store after this long
+JOB_RETENTION = timedelta(days=7)
+
+FINISHED_STATES = ('succeeded', 'failed')
+
+
+class JobError(Exception):
+    """Raised by a handler for an expected failure; the message is shown to the client."""
+
+
+class JobQueue:
+    """
+    Persistent job queue with a pool of worker threads.
+
+    Handlers are registered per job kind and called as handler(payload,
+    progress); `progress(dict)` merges into the job's progress field, and the
+    handler's return value becomes the job result.
+    """
+
+    def __init__(self, store_dir=STORE_DIR, workers=JOB_WORKERS):
+        self.store_dir = os.path.join(os.path.dirname(__file__), store_dir)
+        os.makedirs(self.store_dir, exist_ok=True)
+        self.workers = max(1, workers)
+        self._handlers = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._jobs = {}  # id -> job dict for unfinished jobs of this process
+        self._saved_at = {}  # id -> monotonic time of the last write
+        self._unsaved = set()  # ids with progress not written yet
+        self._threads = []
+        self.owner = job_lease.new_owner()
+
+    # --- store ---
+
+    def _job_path(self, job_id):
+        return os.path.join(self.store_dir, f"{job_id}.json")
+
+    def _save(self, job):
+        """Persists a job. Call with self._lock held."""
+        job['updated_at'] = datetime.now().isoformat()
+        job['version'] = job.get('version', 0) + 1
+        path = self._job_path(job['id'])
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(job, f, indent=2)
+        os.replace(path + '.tmp', path)
+        self._unsaved.discard(job['id'])
+        if job['status'] in FINISHED_STATES:
+            # Finished jobs are served from the store; keep memory for active ones
+            self._jobs.pop(job['id'], None)
+            self._saved_at.pop(job['id'], None)
+        else:
+            self._jobs[job['id']] = job
+            self._saved_at[job['id']] = time.monotonic()
+
+    def _forget(self, job_id):
+        """Drops a job another process has taken over. Call with self._lock held."""
+        self._jobs.pop(job_id, None)
+        self._saved_at.pop(job_id, None)
+        self._unsaved.discard(job_id)
+
+    def _load(self, job_id):
+        try:
+            with open(self._job_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return None
+
+    def get(self, job_id, include_payload=False):
+        """Current state of a job (without its payload by default), or None."""
+        with self._lock:
+            job = self._jobs.get(job_id) or self._load(job_id)
+            if job is None:
+                return None
+            # Deep copy: the worker keeps updating progress after the lock is released
+            return copy.deepcopy({k: v for k, v in job.items() if include_payload or k != 'payload'})
+
+    # --- lifecycle ---
+
+    def register(self, kind, handler):
+        self._handlers[kind] = handler
+
+    def start(self):
+        """Recovers unfinished jobs from the store and starts the workers."""
+        if self._threads:
+            return
+        self._reclaim()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        logger.info(f"Job queue started with {self.workers} workers ({self.owner})")
+
+    def _reclaim(self):
+        """
+        Re-queues unfinished jobs whose holder has exited or stopped renewing
+        its lease (at start-up, that includes every job of the previous run),
+        and deletes expired finished jobs.
+        """
+        cutoff = (datetime.now() - JOB_RETENTION).isoformat()
+        candidates = []
+        for name in os.listdir(self.store_dir):
+            if not name.endswith('.json'):
+                continue
+            job = self._load(name[:-len('.json')])
+            if not job:
+                continue
+            if job['status'] in FINISHED_STATES:
+                if job.get('updated_at', '') < cutoff:
+                    candidates.append(job)
+            elif job_lease.abandoned(job, self.owner):
+                candidates.append(job)
+        if not candidates:
+            return
+
+        with job_lease.store_lock(self.store_dir), self._lock:
+            for job in sorted(candidates, key=lambda j: j.get('created_at', '')):
+                # Re-read under the lock: another process may have reclaimed it meanwhile
+                job = self._load(job['id'])
+                if job is None:
+                    continue
+                if job['status'] in FINISHED_STATES:
+                    if job.get('updated_at', '') < cutoff:
+                        try:
+                            os.remove(self._job_path(job['id']))
+                        except FileNotFoundError:
+                            pass
+                    continue
+                if not job_lease.abandoned(job, self.owner):
+                    continue
+                if job['attempts'] >= MAX_ATTEMPTS:
+                    job.update(status='failed', error='Job was interrupted too many times')
+                    self._save(job)
+                    continue
+                logger.info(f"Re-queuing {job['kind']} job {job['id']} (was {job['status']} "
+                            f"in {job.get('owner') or 'an earlier process'})")
+                job['status'] = 'queued'
+                job_lease.take(job, self.owner)
+                self._save(job)
+                self._queue.put(job['id'])
+
+    def submit(self, kind, payload):
+        """Queues a job and returns its id."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'status': 'queued',
+            'created_at': datetime.now().isoformat(),
+            'attempts': 0,
+            'payload': payload,
+            'progress': {},
+            'result': None,
+            'error': None,
+        }
+        # Held by this process until a worker here runs it
+        job_lease.take(job, self.owner)
+        with self._lock:
+            self._save(job)
+        self._queue.put(job['id'])
+        return job['id']
+
+    # --- execution ---
+
+    def _worker(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._execute(job_id)
+            except Exception as e:
+                logger.error(f"Job worker error on {job_id}: {e}", exc_info=True)
+
+    def _heartbeat(self):
+        """
+        Writes coalesced progress, renews the lease of every job this process
+        holds, and periodically reclaims abandoned jobs of other processes.
+        """
+        last_renewal = last_reclaim = time.monotonic()
+        while True:
+            time.sleep(PROGRESS_SAVE_INTERVAL)
+            now = time.monotonic()
+            try:
+                with self._lock:
+                    for job_id in list(self._unsaved):
+                        self._save(self._jobs[job_id])
+                if now - last_renewal >= job_lease.HEARTBEAT_INTERVAL:
+                    last_renewal = now
+                    self._renew_leases()
+                if now - last_reclaim >= RECLAIM_INTERVAL:
+                    last_reclaim = now
+                    self._reclaim()
+            except Exception as e:
+                logger.error(f"Job queue maintenance failed: {e}", exc_info=True)
+
+    def _renew_leases(self):
+        with job_lease.store_lock(self.store_dir), self._lock:
+            for job in list(self._jobs.values()):
+                if job['status'] == 'queued':
+                    # A queued job may have been reclaimed while this process stalled
+                    stored = self._load(job['id'])
+                    if stored is None or stored['status'] != 'queued' or stored.get('owner') != self.owner:
+                        self._forget(job['id'])
+                        continue
+                job_lease.renew(job)
+                self._save(job)
+
+    def _execute(self, job_id):
+        # Claim from the store, not memory: another process may have taken it
+        with job_lease.store_lock(self.store_dir), self._lock:
+            job = self._load(job_id)
+            if job is None or job['status'] != 'queued':
+                self._forget(job_id)
+                return
+            job.update(status='running', attempts=job['attempts'] + 1, started_at=datetime.now().isoformat())
+            job_lease.take(job, self.owner)
+            self._save(job)
+
+        def progress(update):
+            with self._lock:
+                # Snapshot: handlers keep mutating what they pass (e.g. the partial report)
+                job['progress'] = dict(job['progress'], **copy.deepcopy(update))
+                # Pollers in this process read memory; the store gets the latest
+                # state at most every PROGRESS_SAVE_INTERVAL
+                if time.monotonic() - self._saved_at.get(job_id, 0) >= PROGRESS_SAVE_INTERVAL:
+                    self._save(job)
+                else:
+                    self._unsaved.add(job_id)
+
+        started_at = time.monotonic()
+        try:
+            result = self._handlers[job['kind']](job['payload'], progress)
+            outcome = {'status': 'succeeded', 'result': result}
+        except JobError as e:
+            outcome = {'status': 'failed', 'error': str(e)}
+        except Exception as e:
+            logger.error(f"{job['kind']} job {job_id} failed: {e}", exc_info=True)
+            outcome = {'status': 'failed', 'error': 'Internal error while running the job.'}
+
+        with self._lock:
+            job.update(outcome, seconds=round(time.monotonic() - started_at, 2))
+            self._save(job)
+        logger.info(f"{job['kind']} job {job_id} {job['status']} in {job['seconds']}s")
+
+    def get_stats(self):
+        with self._lock:
+            by_status = {}
+            for job in self._jobs.values():
+                by_status[job['status']] = by_status.get(job['status'], 0) + 1
+        return {'workers': self.workers, 'queued': self._queue.qsize(), 'active_jobs': by_status}
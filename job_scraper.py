@@ -1,27 +1,49 @@
 # job_analyzer.py
 
 import os
-import json
 import logging
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import List
+from pydantic import BaseModel
 from langchain_core.prompts import PromptTemplate
-from youtube_search_tool import YouTubeSearchTool
+import llm_registry
+from context_builder import build_context, record_prompt
+from section_repair import section_validators, salvage, rerequest, schema_hints
 
 logger = logging.getLogger('job_analyzer')
 
+
+# --- Expected structure of the analysis, validated section by section ---
+
+class StrategicOverview(BaseModel):
+    summary: str
+    your_key_opportunity: str
+
+class CoreStrength(BaseModel):
+    strength_area: str
+    evidence_from_your_profile: str
+    how_it_matches_the_job: str
+
+class GrowthArea(BaseModel):
+    area_to_develop: str
+    severity: str
+    insight: str
+    path_to_improvement: List[str]
+    youtube_search_query: str
+
+class JobAnalysis(BaseModel):
+    strategic_overview: StrategicOverview
+    your_core_strengths_for_this_role: List[CoreStrength]
+    strategic_areas_for_growth: List[GrowthArea]
+
+
 class JobApplicationAnalyzer:
     def __init__(self):
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             raise ValueError("GOOGLE_API_KEY environment variable not set!")
             
-        self.llm = ChatGoogleGenerativeAI(
-            model="models/gemini-flash-latest",  # Using a more powerful model for better comparative analysis
-            google_api_key=api_key,
-            temperature=0.3  # Allowing for slightly more creative and encouraging coaching language
-        )
-        
-        self.youtube_tool = YouTubeSearchTool()
+        # Models are routed per call and the YouTube tool is shared (see llm_registry)
+        self.youtube_tool = llm_registry.get_youtube_tool()
         print("Job Application Analyzer initialized successfully.")
 
     def analyze(self, job_application_link: str, student_profile: dict) -> dict:
@@ -31,8 +53,8 @@ class JobApplicationAnalyzer:
         """
         print("  > Starting personalized job analysis...")
         
-        # Convert the student's profile dictionary to a formatted JSON string for the prompt
-        student_context = json.dumps(student_profile, indent=2)
+        # Compact, token-budgeted JSON view of the student's profile
+        student_context = build_context(student_profile, "job_analysis")
 
         # Use the new, highly detailed prompt template
         prompt = PromptTemplate(
@@ -40,7 +62,12 @@ class JobApplicationAnalyzer:
             input_variables=["job_application_link", "student_context"]
         )
         
-        chain = prompt | self.llm
+        record_prompt("job_analysis", prompt.format(
+            job_application_link=job_application_link,
+            student_context=student_context
+        ), student_context)
+        
+        chain = prompt | llm_registry.route("job_analysis")[0]
         
         try:
             response = chain.invoke({
@@ -49,13 +76,11 @@ class JobApplicationAnalyzer:
             })
             response_text = response.content
             
-            # Clean and parse the JSON response from the LLM
-            json_text = self._extract_json(response_text)
-            if not json_text:
-                logger.error("No JSON object found in the LLM response for job analysis.")
+            # Keep the valid sections; re-request only the missing or broken ones
+            analysis_data = self._parse_analysis(response_text, job_application_link, student_context)
+            if analysis_data is None:
+                logger.error("No usable JSON sections in the LLM response for job analysis.")
                 return self._get_default_analysis("Failed to extract JSON from LLM response.")
-
-            analysis_data = json.loads(json_text)
             
             # Enhance the analysis with YouTube recommendations based on the AI's suggestions
             if "strategic_areas_for_growth" in analysis_data:
@@ -101,17 +126,38 @@ class JobApplicationAnalyzer:
             logger.error(f"An error occurred during job application analysis: {e}", exc_info=True)
             return self._get_default_analysis(str(e))
 
-    def _extract_json(self, text: str) -> str:
-        """Safely extracts a JSON object from a string that might contain other text."""
-        try:
-            # Find the first '{' and the last '}' to isolate the JSON object
-            start_index = text.find('{')
-            end_index = text.rfind('}') + 1
-            if start_index != -1 and end_index != 0:
-                return text[start_index:end_index]
-        except Exception:
+    def _parse_analysis(self, text: str, job_application_link: str, student_context: str):
+        """
+        Validates the analysis section by section and asks the model again for
+        just the sections that are missing or invalid. Returns None when no
+        section at all was usable.
+        """
+        from prompts import SECTION_REPAIR_PROMPT
+        validators = section_validators(JobAnalysis)
+        analysis_data, problems = salvage(text if isinstance(text, str) else str(text), validators)
+        if not problems:
+            return analysis_data
+        if len(problems) == len(validators):
             return None
-        return None
+
+        def request(bad_sections):
+            chain = SECTION_REPAIR_PROMPT | llm_registry.route("job_analysis")[0]
+            response = chain.invoke({
+                "task": "a personalized job application analysis, written directly to the student",
+                "section_names": ", ".join(bad_sections),
+                "problems": "\n".join(f"- {name}: {reason}" for name, reason in bad_sections.items()),
+                "schema": schema_hints(bad_sections, validators),
+                "context": f"Job Description Link: {job_application_link}\n\nStudent's Profile:\n{student_context}",
+            })
+            return response.content if isinstance(response.content, str) else str(response.content)
+
+        print(f"  > Repairing job analysis sections: {', '.join(problems)}")
+        analysis_data, problems = rerequest(analysis_data, problems, validators, request)
+        # A section that is still broken is better empty than failing the whole analysis
+        for name in problems:
+            analysis_data[name] = [] if name != "strategic_overview" else self._get_default_analysis(
+                "Part of the analysis could not be generated.")["strategic_overview"]
+        return analysis_data
         
     def get_analysis_prompt_template(self) -> str:
         """
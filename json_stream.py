@@ -0,0 +1,208 @@
+# json_stream.py - Incremental parsing of a streamed top-level JSON object
+#
+# LLM output arrives token by token. IncrementalJSONObjectParser scans the
+# text as it grows and hands back each top-level member ("key": value) of the
+# outermost object as soon as that member's value is closed, so callers can
+# act on finished sections long before the whole object is complete.
+
+import json
+import logging
+
+logger = logging.getLogger('json_stream')
+
+_OPENERS = '{['
+_CLOSERS = '}]'
+
+
+class IncrementalJSONObjectParser:
+    """
+    Feed text chunks with feed(); it returns the (key, value) pairs completed by
+    that chunk. Text before the first '{' (e.g. a ```json fence) is ignored.
+
+    Members whose value is not valid JSON are not returned; their raw text is
+    kept in `invalid_members` so callers can repair just those sections.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.started = False
+        self.finished = False
+        self.members = {}
+        self.invalid_members = {}
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+
+    def feed(self, chunk: str) -> list:
+        if not chunk or self.finished:
+            return []
+        self.buffer += chunk
+        completed = []
+
+        while self.pos < len(self.buffer) and not self.finished:
+            ch = self.buffer[self.pos]
+
+            if not self.started:
+                if ch == '{':
+                    self.started = True
+                    self._depth = 1
+                self.pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None and self._value_start is None:
+                        # Closed a top-level key
+                        self._key = json.loads(self.buffer[self._key_start:self.pos + 1])
+                self.pos += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None and self._value_start is None:
+                    self._key_start = self.pos
+                elif self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start = self.pos
+            elif ch in _OPENERS:
+                if self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start = self.pos
+                self._depth += 1
+            elif ch in _CLOSERS:
+                self._depth -= 1
+                if self._depth == 0:
+                    # End of the outer object; flush a trailing member if any
+                    member = self._close_member()
+                    if member:
+                        completed.append(member)
+                    self.finished = True
+            elif ch == ',' and self._depth == 1:
+                member = self._close_member()
+                if member:
+                    completed.append(member)
+            elif self._depth == 1 and self._key is not None and self._value_start is None \
+                    and ch not in ' \t\r\n:':
+                # Bare scalar value (number, true, false, null)
+                self._value_start = self.pos
+            self.pos += 1
+
+        return completed
+
+    def _close_member(self):
+        key, start = self._key, self._value_start
+        self._key, self._key_start, self._value_start = None, None, None
+        if key is None or start is None:
+            return None
+
+        raw = self.buffer[start:self.pos].strip()
+        try:
+            value = loads_tolerant(raw)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Streamed section '{key}' is not valid JSON: {e}")
+            self.invalid_members[key] = raw
+            return None
+        self.members[key] = value
+        return key, value
+
+    def pending_key(self):
+        """Key of the member currently being streamed, if any (useful for progress)."""
+        return self._key
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Removes commas directly before a closing bracket, outside strings."""
+    out = []
+    in_string = escape = False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            while out and out[-1] in ' \t\r\n':
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+        out.append(ch)
+    return "".join(out)
+
+
+def loads_tolerant(raw: str):
+    """
+    json.loads that also accepts raw newlines/tabs inside strings and trailing
+    commas, the two slips LLMs make most often. Raises JSONDecodeError otherwise.
+    """
+    try:
+        return json.loads(raw, strict=False)
+    except json.JSONDecodeError:
+        return json.loads(_strip_trailing_commas(raw), strict=False)
+
+
+def parse_members(text: str):
+    """
+    Parses as many top-level members as possible from a (possibly truncated or
+    partly malformed) JSON object. Returns (members, invalid_members).
+    """
+    parser = IncrementalJSONObjectParser()
+    parser.feed(text or "")
+    return parser.members, parser.invalid_members
+
+
+def parse_array_items(text: str):
+    """
+    Parses the complete items of the first top-level JSON array in `text`,
+    which may be truncated or have malformed items. Returns (items, invalid_items)
+    where invalid_items holds the raw text of items that did not parse.
+    """
+    text = text or ""
+    start = text.find('[')
+    items, invalid = [], []
+    if start == -1:
+        return items, invalid
+
+    depth = 0
+    in_string = escape = False
+    item_start = None
+    for pos in range(start, len(text)):
+        ch = text[pos]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if depth == 1 and item_start is None and ch not in ' \t\r\n,]':
+            item_start = pos
+        if ch == '"':
+            in_string = True
+        elif ch in _OPENERS:
+            depth += 1
+        elif ch in _CLOSERS:
+            depth -= 1
+        if item_start is not None and ((depth == 1 and ch == ',') or depth == 0):
+            raw = text[item_start:pos].strip()
+            item_start = None
+            if raw:
+                try:
+                    items.append(loads_tolerant(raw))
+                except json.JSONDecodeError:
+                    invalid.append(raw)
+        if depth == 0:
+            break
+    return items, invalid
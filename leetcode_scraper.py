@@ -1,10 +1,12 @@
-import requests
+import http_client
 
 def get_leetcode_profile(username: str):
     def lc_graphql(query, variables):
         url = "https://leetcode.com/graphql"
         headers = {"Content-Type": "application/json", "Referer": "https://leetcode.com"}
-        resp = requests.post(url, json={"query":query, "variables":variables}, headers=headers, timeout=12)
+        # GraphQL reads are safe to retry even though they are POSTs
+        resp = http_client.post(url, json={"query":query, "variables":variables}, headers=headers,
+                                retries=http_client.MAX_RETRIES)
         resp.raise_for_status()
         return resp.json()
 
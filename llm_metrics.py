@@ -0,0 +1,226 @@
+# llm_metrics.py - Per-call instrumentation of LLM invocations
+#
+# Every model returned by llm_registry.route() carries LLMCallHandler, which
+# records one entry per call: operation, role, model, prompt and completion
+# tokens, time to first token, total latency, retries and estimated cost.
+# Records go into a rolling window summarised at /api/metrics/llm/calls, are
+# logged as one JSON line each (and appended to LLM_CALL_LOG if set), and a
+# summary line is logged every SUMMARY_LOG_EVERY calls.
+
+import json
+import os
+import time
+import threading
+import logging
+from collections import defaultdict, deque
+from datetime import datetime
+
+from context_builder import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Estimated USD per million tokens (input, output); list prices, prompts <= 200k tokens
+MODEL_PRICING = {
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-flash-latest": (0.30, 2.50),
+}
+DEFAULT_PRICING = (1.25, 10.00)
+
+WINDOW = 500
+SUMMARY_LOG_EVERY = 50
+CALL_LOG_PATH = os.getenv("LLM_CALL_LOG")
+
+# The Gemini client retries inside the call and only logs each retry
+RETRY_LOGGER = "langchain_google_genai.chat_models"
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICING.get((model or "").replace("models/", ""), DEFAULT_PRICING)
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 3)
+
+
+class LLMMetrics:
+    """Rolling window of call records plus all-time totals."""
+
+    def __init__(self, window=WINDOW):
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)
+        self._totals = defaultdict(lambda: defaultdict(float))
+
+    def record(self, call: dict):
+        with self._lock:
+            self._calls.append(call)
+            totals = self._totals[call['operation']]
+            totals['calls'] += 1
+            totals['errors'] += int(call['error'] is not None)
+            totals['prompt_tokens'] += call['prompt_tokens']
+            totals['completion_tokens'] += call['completion_tokens']
+            totals['retries'] += call['retries']
+            totals['cost_usd'] += call['cost_usd']
+            total_calls = sum(t['calls'] for t in self._totals.values())
+
+        logger.info("llm_call " + json.dumps(call))
+        if CALL_LOG_PATH:
+            try:
+                with open(CALL_LOG_PATH, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(call) + "\n")
+            except OSError as e:
+                logger.warning(f"Could not append to {CALL_LOG_PATH}: {e}")
+        if total_calls % SUMMARY_LOG_EVERY == 0:
+            logger.info("llm_summary " + json.dumps(self.get_summary()['operations']))
+
+    def recent_latencies(self, operation, role, n):
+        """Latencies of the last n calls of an operation on a role, oldest first."""
+        with self._lock:
+            matching = [c['latency_seconds'] for c in reversed(self._calls)
+                        if c['operation'] == operation and c['role'] == role]
+        return matching[:n][::-1]
+
+    def recent_calls(self, n=20):
+        with self._lock:
+            return list(self._calls)[-n:][::-1]
+
+    def get_summary(self):
+        with self._lock:
+            calls = list(self._calls)
+            totals = {op: dict(t) for op, t in self._totals.items()}
+
+        by_operation = defaultdict(list)
+        for call in calls:
+            by_operation[call['operation']].append(call)
+
+        operations = {}
+        for operation, op_calls in by_operation.items():
+            ok = [c for c in op_calls if c['error'] is None]
+            models = defaultdict(int)
+            for c in op_calls:
+                models[c['model']] += 1
+            operations[operation] = {
+                'calls': len(op_calls),
+                'errors': len(op_calls) - len(ok),
+                'models': dict(models),
+                'latency_p50_seconds': _percentile([c['latency_seconds'] for c in ok], 0.5),
+                'latency_p95_seconds': _percentile([c['latency_seconds'] for c in ok], 0.95),
+                'ttft_p50_seconds': _percentile([c['ttft_seconds'] for c in ok if c['ttft_seconds'] is not None], 0.5),
+                'ttft_p95_seconds': _percentile([c['ttft_seconds'] for c in ok if c['ttft_seconds'] is not None], 0.95),
+                'avg_prompt_tokens': round(sum(c['prompt_tokens'] for c in op_calls) / len(op_calls)),
+                'avg_completion_tokens': round(sum(c['completion_tokens'] for c in op_calls) / len(op_calls)),
+                'retries': sum(c['retries'] for c in op_calls),
+                'cost_usd': round(sum(c['cost_usd'] for c in op_calls), 4),
+            }
+
+        for t in totals.values():
+            t['cost_usd'] = round(t['cost_usd'], 4)
+            for key in ('calls', 'errors', 'prompt_tokens', 'completion_tokens', 'retries'):
+                t[key] = int(t[key])
+        return {
+            'window': len(calls),
+            'operations': operations,
+            'totals': totals,
+            'total_cost_usd': round(sum(t['cost_usd'] for t in totals.values()), 4),
+        }
+
+
+metrics = LLMMetrics()
+
+_current = threading.local()
+
+
+class _RetryCounter(logging.Handler):
+    """Counts the Gemini client's retry warnings against the call running in this thread."""
+
+    def emit(self, record):
+        call = getattr(_current, 'call', None)
+        if call is not None and record.levelno >= logging.WARNING and record.getMessage().startswith("Retrying"):
+            call['retries'] += 1
+
+
+_handler = None
+_handler_lock = threading.Lock()
+
+
+def get_handler():
+    """The shared LangChain callback handler (built on first use, so importing stays cheap)."""
+    global _handler
+    if _handler is None:
+        with _handler_lock:
+            if _handler is None:
+                _handler = _build_handler()
+                logging.getLogger(RETRY_LOGGER).addHandler(_RetryCounter())
+    return _handler
+
+
+def _build_handler():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMCallHandler(BaseCallbackHandler):
+        def __init__(self):
+            self._runs = {}  # run_id -> in-progress call
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+            metadata = metadata or {}
+            call = {
+                'operation': metadata.get('llm_operation', 'unknown'),
+                'role': metadata.get('llm_role'),
+                'model': metadata.get('ls_model_name') or (kwargs.get('invocation_params') or {}).get('model'),
+                'started_at': time.monotonic(),
+                'first_token_at': None,
+                'prompt_chars': sum(len(str(m.content)) for batch in messages for m in batch),
+                'retries': 0,
+            }
+            self._runs[run_id] = call
+            _current.call = call
+
+        def on_llm_new_token(self, token, *, run_id, **kwargs):
+            call = self._runs.get(run_id)
+            if call is not None and call['first_token_at'] is None:
+                call['first_token_at'] = time.monotonic()
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            usage, text = {}, ""
+            try:
+                message = response.generations[0][0].message
+                usage = message.usage_metadata or {}
+                text = message.content if isinstance(message.content, str) else str(message.content)
+            except (IndexError, AttributeError):
+                pass
+            self._finish(run_id, usage, text, None)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._finish(run_id, {}, "", f"{type(error).__name__}: {error}"[:300])
+
+        def _finish(self, run_id, usage, text, error):
+            call = self._runs.pop(run_id, None)
+            if call is None:
+                return
+            if getattr(_current, 'call', None) is call:
+                _current.call = None
+            now = time.monotonic()
+            # Provider counts when available, chars/4 estimates otherwise
+            prompt_tokens = usage.get('input_tokens') or call['prompt_chars'] // 4
+            completion_tokens = usage.get('output_tokens') or estimate_tokens(text)
+            first_token_at = call['first_token_at']
+            metrics.record({
+                'timestamp': datetime.now().isoformat(),
+                'operation': call['operation'],
+                'role': call['role'],
+                'model': call['model'],
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'tokens_estimated': not usage,
+                # Non-streaming calls get their first token with the whole response
+                'ttft_seconds': round((first_token_at or now) - call['started_at'], 3),
+                'latency_seconds': round(now - call['started_at'], 3),
+                'retries': call['retries'],
+                'cost_usd': round(estimate_cost(call['model'], prompt_tokens, completion_tokens), 6),
+                'error': error,
+            })
+
+    return LLMCallHandler()
@@ -0,0 +1,323 @@
+# llm_registry.py - Process-wide shared LLM clients and tools
+#
+# Every StudentApiRAG, JobApplicationAnalyzer and request thread used to
+# build its own ChatGoogleGenerativeAI clients and YouTubeSearchTool. The
+# registry builds one client per role on first use and hands the same
+# instance to everyone, so gRPC channels are reused, timeouts and retries
+# are set in one place, and a per-role semaphore caps concurrent calls
+# (some operations have a semaphore of their own instead).
+#
+# Callers ask for a model by operation (route("report"), route("qa"), ...).
+# OPERATION_ROLES maps each operation to a role; when an operation's recent
+# latency on its role exceeds its budget, calls go to the faster role until
+# a periodic probe shows the primary role is back within budget.
+
+import os
+import time
+import threading
+import logging
+from collections import defaultdict, deque
+
+import llm_metrics
+
+logger = logging.getLogger(__name__)
+
+# Model settings per role. "structured" is part of the report cache key.
+ROLE_SETTINGS = {
+    # Narrative analysis, QA, resumes, learning topics
+    "creative": {
+        "model": "models/gemini-2.5-pro",
+        "temperature": 0.4,
+        "top_p": 0.95,
+        "top_k": 40,
+    },
+    # JSON reports
+    "structured": {
+        "model": "models/gemini-2.5-pro",
+        "temperature": 0.2,  # Lower for consistent JSON structure
+        "top_p": 0.9,
+    },
+    # Job analysis and other latency-sensitive calls
+    "fast": {
+        "model": "models/gemini-flash-latest",
+        "temperature": 0.3,
+    },
+}
+
+# Per-request timeout (seconds) and client-side retries, per role
+ROLE_TIMEOUTS = {"creative": 120, "structured": 180, "fast": 60}
+MAX_RETRIES = 2
+
+# Concurrent in-flight calls allowed per role; further callers wait
+ROLE_CONCURRENCY = {"creative": 4, "structured": 2, "fast": 8}
+# Operations limited by their own semaphore instead of their role's, so a
+# sectioned report's section calls run side by side without taking the
+# structured slots that single-call reports wait on
+OPERATION_CONCURRENCY = {"report_section": 8}
+
+# Role per operation: pro for full reports and resumes, flash for topic
+# extraction, short QA and job analysis. Override with LLM_ROLE_<OPERATION>.
+OPERATION_ROLES = {
+    "report": "structured",
+    "report_repair": "structured",
+    "report_section": "structured",
+    "resume": "creative",
+    "learning_topics": "fast",
+    "qa": "fast",
+    "job_analysis": "fast",
+}
+DEFAULT_ROLE = "creative"
+
+# Where an operation goes when its primary role is over budget
+FALLBACK_ROLES = {"creative": "fast", "structured": "fast"}
+
+# Seconds; if the median of an operation's recent calls on its primary role
+# exceeds this, it falls back. Override with LLM_BUDGET_<OPERATION>.
+LATENCY_BUDGETS = {
+    "report": 90,
+    "report_repair": 45,
+    "report_section": 60,
+    "resume": 45,
+    "learning_topics": 15,
+    "qa": 20,
+}
+BUDGET_WINDOW = 5          # recent calls considered per operation and role
+PROBE_EVERY = 10           # while degraded, every Nth call still tries the primary role
+LATENCY_STATS_WINDOW = 200
+EMBEDDINGS_RETRY_COOLDOWN = 60  # seconds before a failed embedding model load is retried
+
+_lock = threading.Lock()
+_clients = {}
+_tools = {}
+_semaphores = {role: threading.BoundedSemaphore(limit) for role, limit in ROLE_CONCURRENCY.items()}
+_operation_semaphores = {op: threading.BoundedSemaphore(limit) for op, limit in OPERATION_CONCURRENCY.items()}
+_stats = defaultdict(lambda: defaultdict(int))
+_stats_lock = threading.Lock()
+_role_latencies = defaultdict(lambda: deque(maxlen=LATENCY_STATS_WINDOW))
+_routing = defaultdict(lambda: defaultdict(int))
+_embeddings_retry_at = 0.0
+
+
+class _Limit:
+    """
+    Holds the call's semaphore (its operation's, else its role's) for the
+    duration of one call; counts usage and latency per role.
+    """
+
+    def __init__(self, role, operation=None):
+        self.role = role
+        self.semaphore = _operation_semaphores.get(operation) or _semaphores[role]
+
+    def __enter__(self):
+        semaphore = self.semaphore
+        if not semaphore.acquire(blocking=False):
+            with _stats_lock:
+                _stats[self.role]['waited'] += 1
+            semaphore.acquire()
+        with _stats_lock:
+            stats = _stats[self.role]
+            stats['calls'] += 1
+            stats['in_flight'] += 1
+            stats['peak_in_flight'] = max(stats['peak_in_flight'], stats['in_flight'])
+        self.started_at = time.monotonic()
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.monotonic() - self.started_at
+        with _stats_lock:
+            _stats[self.role]['in_flight'] -= 1
+            if exc_type is not None:
+                _stats[self.role]['errors'] += 1
+            else:
+                _role_latencies[self.role].append(elapsed)
+        self.semaphore.release()
+
+
+def _run_operation(run_manager):
+    """The operation route() tagged the call with, from its run metadata."""
+    return (getattr(run_manager, 'metadata', None) or {}).get('llm_operation')
+
+
+_client_class = None
+
+
+def _get_client_class():
+    global _client_class
+    if _client_class is None:
+        # Imported here so importing the registry stays cheap
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        class LimitedChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+            limit_role: str = "creative"
+
+            # run_manager must be a named parameter: LangChain only passes it
+            # (and with it token callbacks) when the signature has it
+            def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+                with _Limit(self.limit_role, _run_operation(run_manager)):
+                    return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+            def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+                with _Limit(self.limit_role, _run_operation(run_manager)):
+                    yield from super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+        _client_class = LimitedChatGoogleGenerativeAI
+    return _client_class
+
+
+def _create_client(role):
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY environment variable not set!")
+    return _get_client_class()(
+        google_api_key=api_key,
+        timeout=ROLE_TIMEOUTS[role],
+        max_retries=MAX_RETRIES,
+        limit_role=role,
+        **ROLE_SETTINGS[role]
+    )
+
+
+def get_llm(role: str):
+    """Shared chat model for a role ("creative", "structured" or "fast")."""
+    if role not in ROLE_SETTINGS:
+        raise ValueError(f"Unknown LLM role: {role}")
+    client = _clients.get(role)
+    if client is None:
+        with _lock:
+            client = _clients.get(role)
+            if client is None:
+                logger.info(f"Creating shared '{role}' LLM client ({ROLE_SETTINGS[role]['model']})")
+                client = _clients[role] = _create_client(role)
+    return client
+
+
+def primary_role(operation: str) -> str:
+    role = os.getenv(f"LLM_ROLE_{operation.upper()}") or OPERATION_ROLES.get(operation, DEFAULT_ROLE)
+    if role not in ROLE_SETTINGS:
+        logger.warning(f"Unknown role '{role}' configured for {operation}; using {DEFAULT_ROLE}")
+        role = DEFAULT_ROLE
+    return role
+
+
+def latency_budget(operation: str):
+    budget = os.getenv(f"LLM_BUDGET_{operation.upper()}")
+    return float(budget) if budget else LATENCY_BUDGETS.get(operation)
+
+
+def _median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2] if ordered else None
+
+
+def route(operation: str):
+    """
+    Returns (llm, role) for an operation. Calls made through the returned
+    model are tagged with the operation in their run metadata and recorded
+    by llm_metrics, whose latencies drive the budget. Falls back to the
+    faster role while the primary role's recent median latency for this
+    operation is over budget.
+    """
+    role = primary_role(operation)
+    fallback = FALLBACK_ROLES.get(role)
+    budget = latency_budget(operation)
+    with _stats_lock:
+        routing = _routing[operation]
+        routing['calls'] += 1
+        recent = llm_metrics.metrics.recent_latencies(operation, role, BUDGET_WINDOW)
+        if fallback and budget and len(recent) >= BUDGET_WINDOW and _median(recent) > budget:
+            routing['degraded_calls'] += 1
+            if routing['degraded_calls'] % PROBE_EVERY == 0:
+                routing['probes'] += 1
+            else:
+                routing['fallbacks'] += 1
+                if routing['fallbacks'] == 1 or routing['fallbacks'] % 50 == 0:
+                    logger.warning(f"{operation}: {role} median latency {_median(recent):.1f}s is over the "
+                                   f"{budget:.0f}s budget; routing to {fallback}")
+                role = fallback
+    llm = get_llm(role).with_config(
+        metadata={"llm_operation": operation, "llm_role": role},
+        callbacks=[llm_metrics.get_handler()],
+    )
+    return llm, role
+
+
+def get_embeddings():
+    """
+    The shared sentence-embedding model (ingest_data.EMBEDDING_MODEL) used
+    at query time. Raises if it cannot be loaded; after a failure, callers
+    get an immediate error until EMBEDDINGS_RETRY_COOLDOWN has passed.
+    """
+    global _embeddings_retry_at
+    model = _tools.get("embeddings")
+    if model is None:
+        with _lock:
+            model = _tools.get("embeddings")
+            if model is None:
+                if time.monotonic() < _embeddings_retry_at:
+                    raise RuntimeError("embedding model unavailable")
+                try:
+                    # Heavy import (sentence-transformers, torch) only when first needed
+                    from ingest_data import get_embeddings as load_embeddings
+                    model = _tools["embeddings"] = load_embeddings()
+                except Exception:
+                    _embeddings_retry_at = time.monotonic() + EMBEDDINGS_RETRY_COOLDOWN
+                    raise
+    return model
+
+
+def get_youtube_tool():
+    """The single YouTubeSearchTool instance (its HTTP sessions are already pooled)."""
+    tool = _tools.get("youtube")
+    if tool is None:
+        with _lock:
+            tool = _tools.get("youtube")
+            if tool is None:
+                from youtube_search_tool import YouTubeSearchTool
+                tool = _tools["youtube"] = YouTubeSearchTool()
+    return tool
+
+
+def _latency_summary(latencies):
+    if not latencies:
+        return None
+    ordered = sorted(latencies)
+    return {
+        'samples': len(ordered),
+        'avg_seconds': round(sum(ordered) / len(ordered), 3),
+        'p50_seconds': round(ordered[len(ordered) // 2], 3),
+        'p95_seconds': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'max_seconds': round(ordered[-1], 3),
+    }
+
+
+def get_stats():
+    with _stats_lock:
+        roles = {
+            role: {
+                'model': ROLE_SETTINGS[role]['model'],
+                'created': role in _clients,
+                'max_concurrency': ROLE_CONCURRENCY[role],
+                'timeout_seconds': ROLE_TIMEOUTS[role],
+                'calls': _stats[role]['calls'],
+                'in_flight': _stats[role]['in_flight'],
+                'peak_in_flight': _stats[role]['peak_in_flight'],
+                'waited_for_slot': _stats[role]['waited'],
+                'errors': _stats[role]['errors'],
+                'latency': _latency_summary(_role_latencies[role]),
+            }
+            for role in ROLE_SETTINGS
+        }
+        routing = {}
+        for operation in set(OPERATION_ROLES) | set(_routing):
+            role = primary_role(operation)
+            recent = llm_metrics.metrics.recent_latencies(operation, role, BUDGET_WINDOW)
+            routing[operation] = {
+                'role': role,
+                'fallback_role': FALLBACK_ROLES.get(role),
+                'latency_budget_seconds': latency_budget(operation),
+                'max_concurrency': OPERATION_CONCURRENCY.get(operation),
+                'recent_median_seconds': round(_median(recent), 3) if recent else None,
+                'calls': _routing[operation]['calls'],
+                'fallbacks': _routing[operation]['fallbacks'],
+                'probes': _routing[operation]['probes'],
+            }
+    return {'roles': roles, 'routing': routing}
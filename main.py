@@ -1,9 +1,14 @@
-from flask import Flask, jsonify, request, render_template, redirect, url_for
+from flask import Flask, Response, jsonify, request, render_template, redirect, url_for, stream_with_context
 import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, wait, FIRST_COMPLETED
 from github_scraper import get_github_profile
 from codeforces_scraper import get_codeforces_profile
 from leetcode_scraper import get_leetcode_profile
 from ipu_scraper import StudentScraper  # Updated to use the StudentScraper class
+import http_client
+from response_cache import ResponseCache
 
 app = Flask(__name__, 
             static_folder='static',  # Directory for CSS/JS files
@@ -16,6 +21,18 @@ os.makedirs('templates', exist_ok=True)
 # Initialize the StudentScraper with the correct encryption key
 ipu_scraper = StudentScraper(encryption_key="Qm9sRG9OYVphcmEK")
 
+# Server-side cache for upstream profile lookups (per-source TTLs, stale-while-revalidate)
+profile_cache = ResponseCache()
+
+# Shared pool for fanning out /api/all; per-source deadlines in seconds
+profile_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='profile-fetch')
+PROFILE_SOURCE_DEADLINES = {
+    'leetcode': 20,
+    'github': 25,
+    'codeforces': 20,
+    'ipu': 35,
+}
+
 @app.route('/')
 def home():
     return redirect(url_for('test_frontend'))
@@ -47,6 +64,112 @@ def get_students_list():
 def favicon():
     return '', 204
 
+def _bypass_cache() -> bool:
+    """Clients force a fresh upstream fetch with ?refresh=1 or Cache-Control: no-cache"""
+    if request.args.get('refresh', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'no-cache' in request.headers.get('Cache-Control', '').lower()
+
+def _profile_succeeded(result) -> bool:
+    return bool(result) and result.get('success', True)
+
+def _cached_leetcode(username: str, bypass: bool = False):
+    return profile_cache.get_or_fetch('leetcode', username, lambda: get_leetcode_profile(username),
+                                      bypass=bypass, should_cache=_profile_succeeded)
+
+def _cached_github(username: str, bypass: bool = False):
+    return profile_cache.get_or_fetch('github', username, lambda: get_github_profile(username),
+                                      bypass=bypass, should_cache=_profile_succeeded)
+
+def _cached_codeforces(username: str, bypass: bool = False):
+    return profile_cache.get_or_fetch('codeforces', username, lambda: get_codeforces_profile(username),
+                                      bypass=bypass, should_cache=_profile_succeeded)
+
+def _transform_ipu_data(student_data: dict):
+    """Transform the scraper output to match what the frontend expects (None if unusable)"""
+    if student_data.get("status") == "success":
+        # Create the expected structure
+        return {
+            'enrollment_no': student_data['student_info'].get('enroll_no', ''),
+            'name': student_data['student_info'].get('name', ''),
+            'img': student_data['student_info'].get('img', ''),
+            'results': student_data['academic_summary'].get('semester_results', []),
+            'programme': student_data['programme_info'].get('branch', {}),
+            'institute': student_data['programme_info'].get('institute', {}),
+            'subjects': [subject for result in student_data['academic_summary'].get('semester_results', []) 
+                        for subject in result.get('subject_results', [])],
+            'cgpa': student_data['academic_summary']['overall_performance'].get('cgpa', 0)
+        }
+
+    # If preprocessing failed, try to extract data from raw response
+    raw_data = student_data
+    if "data" in raw_data and "metadata" in raw_data:
+        return {
+            'enrollment_no': raw_data['data'].get('enroll_no', ''),
+            'name': raw_data['data'].get('name', ''),
+            'img': raw_data['data'].get('img', ''),
+            'results': raw_data['data'].get('results', []),
+            'programme': raw_data['metadata'].get('programmeData', {}).get('branch', {}),
+            'institute': raw_data['metadata'].get('instituteData', {}),
+            'subjects': [],
+            'cgpa': raw_data['data'].get('cgpa', 0)
+        }
+    return None
+
+def _cached_ipu(enrollment_no: str, bypass: bool = False):
+    """Returns (transformed_data or None, cache_status); scraper exceptions propagate"""
+    return profile_cache.get_or_fetch(
+        'ipu', enrollment_no,
+        lambda: _transform_ipu_data(ipu_scraper.get_student_data(enrollment_no)),
+        bypass=bypass, should_cache=lambda data: data is not None)
+
+_PROFILE_FETCHERS = {
+    'leetcode': _cached_leetcode,
+    'github': _cached_github,
+    'codeforces': _cached_codeforces,
+}
+
+def _fetch_profile_source(source: str, identifier: str, bypass: bool = False):
+    """Fetch one platform for the aggregate routes. Returns (data, error) and never raises"""
+    if source == 'ipu':
+        try:
+            transformed_data, _ = _cached_ipu(identifier, bypass)
+        except Exception as e:
+            return None, str(e)
+        if transformed_data is None:
+            return None, "Failed to process student data"
+        return transformed_data, None
+
+    result, _ = _PROFILE_FETCHERS[source](identifier, bypass)
+    if result.get('success', True):
+        return result['data'], None
+    return None, result.get('error', 'Unknown error')
+
+def _submit_profile_fetches(sources: dict, bypass: bool):
+    """Start every requested platform on the shared pool. Returns {source: (future, deadline_at)}"""
+    started_at = time.monotonic()
+    return {
+        source: (profile_executor.submit(_fetch_profile_source, source, identifier, bypass),
+                 started_at + PROFILE_SOURCE_DEADLINES[source])
+        for source, identifier in sources.items()
+    }
+
+def _timeout_error(source: str) -> str:
+    return f"{source} request timed out after {PROFILE_SOURCE_DEADLINES[source]}s"
+
+def _requested_sources():
+    """Map of platform -> identifier from the /api/all query parameters"""
+    return {source: identifier for source, identifier in (
+        ('leetcode', request.args.get('leetcode')),
+        ('github', request.args.get('github')),
+        ('codeforces', request.args.get('codeforces')),
+        ('ipu', request.args.get('enrollment')),  # New parameter for IPU
+    ) if identifier}
+
+def _with_cache_header(response, cache_status):
+    response.headers['X-Cache'] = cache_status
+    return response
+
 @app.route('/api/leetcode/<username>', methods=['GET'])
 def get_leetcode_profile_route(username: str):
     # Validate username
@@ -56,7 +179,7 @@ def get_leetcode_profile_route(username: str):
             'error': 'Username cannot be empty'
         }), 400
     
-    result = get_leetcode_profile(username)
+    result, cache_status = _cached_leetcode(username, _bypass_cache())
     
     # Handle LeetCode-specific errors
     if not result.get('success', True):
@@ -75,23 +198,23 @@ def get_leetcode_profile_route(username: str):
             'error': f'LeetCode API error: {error_msg}'
         }), 500
     
-    return jsonify(result)
+    return _with_cache_header(jsonify(result), cache_status)
 
 @app.route('/api/github/<username>', methods=['GET'])
 def get_github_profile_route(username: str):
     if not username or username.strip() == "":
         return jsonify({'success': False, 'error': 'Username cannot be empty'}), 400
     
-    result = get_github_profile(username)
-    return jsonify(result)
+    result, cache_status = _cached_github(username, _bypass_cache())
+    return _with_cache_header(jsonify(result), cache_status)
 
 @app.route('/api/codeforces/<username>', methods=['GET'])
 def get_codeforces_profile_route(username: str):
     if not username or username.strip() == "":
         return jsonify({'success': False, 'error': 'Username cannot be empty'}), 400
     
-    result = get_codeforces_profile(username)
-    return jsonify(result)
+    result, cache_status = _cached_codeforces(username, _bypass_cache())
+    return _with_cache_header(jsonify(result), cache_status)
 
 @app.route('/api/ipu/<enrollment_no>', methods=['GET'])
 def get_ipu_student_route(enrollment_no: str):
@@ -103,51 +226,19 @@ def get_ipu_student_route(enrollment_no: str):
         }), 400
     
     try:
-        # Get student data using the StudentScraper
-        student_data = ipu_scraper.get_student_data(enrollment_no)
+        # Get student data using the StudentScraper (served from cache when fresh)
+        transformed_data, cache_status = _cached_ipu(enrollment_no, _bypass_cache())
         
-        # Transform the data to match what the frontend expects
-        if student_data.get("status") == "success":
-            # Create the expected structure
-            transformed_data = {
-                'enrollment_no': student_data['student_info'].get('enroll_no', ''),
-                'name': student_data['student_info'].get('name', ''),
-                'img': student_data['student_info'].get('img', ''),
-                'results': student_data['academic_summary'].get('semester_results', []),
-                'programme': student_data['programme_info'].get('branch', {}),
-                'institute': student_data['programme_info'].get('institute', {}),
-                'subjects': [subject for result in student_data['academic_summary'].get('semester_results', []) 
-                            for subject in result.get('subject_results', [])],
-                'cgpa': student_data['academic_summary']['overall_performance'].get('cgpa', 0)
-            }
-            
-            return jsonify({
+        if transformed_data is not None:
+            return _with_cache_header(jsonify({
                 'success': True,
                 'data': transformed_data
-            })
+            }), cache_status)
         else:
-            # If preprocessing failed, try to extract data from raw response
-            raw_data = student_data
-            if "data" in raw_data and "metadata" in raw_data:
-                transformed_data = {
-                    'enrollment_no': raw_data['data'].get('enroll_no', ''),
-                    'name': raw_data['data'].get('name', ''),
-                    'img': raw_data['data'].get('img', ''),
-                    'results': raw_data['data'].get('results', []),
-                    'programme': raw_data['metadata'].get('programmeData', {}).get('branch', {}),
-                    'institute': raw_data['metadata'].get('instituteData', {}),
-                    'subjects': [],
-                    'cgpa': raw_data['data'].get('cgpa', 0)
-                }
-                return jsonify({
-                    'success': True,
-                    'data': transformed_data
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': 'Failed to process student data'
-                }), 500
+            return jsonify({
+                'success': False,
+                'error': 'Failed to process student data'
+            }), 500
             
     except Exception as e:
         return jsonify({
@@ -157,10 +248,7 @@ def get_ipu_student_route(enrollment_no: str):
 
 @app.route('/api/all', methods=['GET'])
 def get_all_profiles():
-    leetcode_user = request.args.get('leetcode')
-    github_user = request.args.get('github')
-    codeforces_user = request.args.get('codeforces')
-    enrollment_no = request.args.get('enrollment')  # New parameter for IPU
+    requested = _requested_sources()
     
     results = {
         'success': True,
@@ -169,81 +257,28 @@ def get_all_profiles():
     }
     
     # Validate at least one parameter is provided
-    if not any([leetcode_user, github_user, codeforces_user, enrollment_no]):
+    if not requested:
         return jsonify({
             'success': False,
             'error': 'At least one parameter (leetcode/github/codeforces/enrollment) is required'
         }), 400
 
-    # Fetch LeetCode profile
-    if leetcode_user:
-        leetcode_result = get_leetcode_profile(leetcode_user)
-        if leetcode_result.get('success', True):
-            results['data']['leetcode'] = leetcode_result['data']
-        else:
-            results['success'] = False
-            results['errors']['leetcode'] = leetcode_result.get('error', 'Unknown error')
-    
-    # Fetch GitHub profile
-    if github_user:
-        github_result = get_github_profile(github_user)
-        if github_result.get('success', True):
-            results['data']['github'] = github_result['data']
-        else:
-            results['success'] = False
-            results['errors']['github'] = github_result.get('error', 'Unknown error')
-    
-    # Fetch Codeforces profile
-    if codeforces_user:
-        codeforces_result = get_codeforces_profile(codeforces_user)
-        if codeforces_result.get('success', True):
-            results['data']['codeforces'] = codeforces_result['data']
-        else:
-            results['success'] = False
-            results['errors']['codeforces'] = codeforces_result.get('error', 'Unknown error')
-    
-    # Fetch IPU student data
-    if enrollment_no:
+    # Fetch every platform concurrently; each one only gets its own deadline,
+    # so a slow source fails alone instead of stalling the others
+    futures = _submit_profile_fetches(requested, _bypass_cache())
+    for source, (future, deadline_at) in futures.items():
         try:
-            student_data = ipu_scraper.get_student_data(enrollment_no)
-            
-            # Transform the data to match what the frontend expects
-            if student_data.get("status") == "success":
-                # Create the expected structure
-                transformed_data = {
-                    'enrollment_no': student_data['student_info'].get('enroll_no', ''),
-                    'name': student_data['student_info'].get('name', ''),
-                    'img': student_data['student_info'].get('img', ''),
-                    'results': student_data['academic_summary'].get('semester_results', []),
-                    'programme': student_data['programme_info'].get('branch', {}),
-                    'institute': student_data['programme_info'].get('institute', {}),
-                    'subjects': [subject for result in student_data['academic_summary'].get('semester_results', []) 
-                                for subject in result.get('subject_results', [])],
-                    'cgpa': student_data['academic_summary']['overall_performance'].get('cgpa', 0)
-                }
-                results['data']['ipu'] = transformed_data
-            else:
-                # If preprocessing failed, try to extract data from raw response
-                raw_data = student_data
-                if "data" in raw_data and "metadata" in raw_data:
-                    transformed_data = {
-                        'enrollment_no': raw_data['data'].get('enroll_no', ''),
-                        'name': raw_data['data'].get('name', ''),
-                        'img': raw_data['data'].get('img', ''),
-                        'results': raw_data['data'].get('results', []),
-                        'programme': raw_data['metadata'].get('programmeData', {}).get('branch', {}),
-                        'institute': raw_data['metadata'].get('instituteData', {}),
-                        'subjects': [],
-                        'cgpa': raw_data['data'].get('cgpa', 0)
-                    }
-                    results['data']['ipu'] = transformed_data
-                else:
-                    results['success'] = False
-                    results['errors']['ipu'] = "Failed to process student data"
-                    
+            data, error = future.result(timeout=max(0.0, deadline_at - time.monotonic()))
+        except FuturesTimeoutError:
+            data, error = None, _timeout_error(source)
         except Exception as e:
+            data, error = None, str(e)
+
+        if error is None:
+            results['data'][source] = data
+        else:
             results['success'] = False
-            results['errors']['ipu'] = str(e)
+            results['errors'][source] = error
     
     # If all requests failed, return 400/500
     if not results['data']:
@@ -255,5 +290,75 @@ def get_all_profiles():
     
     return jsonify(results)
 
+def _sse_event(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route('/api/all/stream', methods=['GET'])
+def stream_all_profiles():
+    """
+    Server-Sent Events variant of /api/all. Emits one `profile` event per
+    platform as soon as it is ready ({source, success, data|error}), then a
+    final `done` event carrying the overall success flag and errors.
+    """
+    requested = _requested_sources()
+    if not requested:
+        return jsonify({
+            'success': False,
+            'error': 'At least one parameter (leetcode/github/codeforces/enrollment) is required'
+        }), 400
+
+    futures = _submit_profile_fetches(requested, _bypass_cache())
+
+    def generate():
+        pending = {future: source for source, (future, _) in futures.items()}
+        deadlines = {source: deadline_at for source, (_, deadline_at) in futures.items()}
+        errors = {}
+
+        while pending:
+            next_deadline = min(deadlines[source] for source in pending.values())
+            done, _ = wait(list(pending), timeout=max(0.0, next_deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    data, error = future.result()
+                except Exception as e:
+                    data, error = None, str(e)
+                if error is None:
+                    yield _sse_event('profile', {'source': source, 'success': True, 'data': data})
+                else:
+                    errors[source] = error
+                    yield _sse_event('profile', {'source': source, 'success': False, 'error': error})
+
+            # Give up on anything past its own deadline
+            now = time.monotonic()
+            for future, source in list(pending.items()):
+                if deadlines[source] <= now:
+                    del pending[future]
+                    errors[source] = _timeout_error(source)
+                    yield _sse_event('profile', {'source': source, 'success': False, 'error': errors[source]})
+
+        yield _sse_event('done', {
+            'success': not errors,
+            'errors': errors,
+            'all_failed': len(errors) == len(requested)
+        })
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # keep proxies from buffering the stream
+    })
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Hit/miss counters and entry counts for the profile response cache"""
+    return jsonify(profile_cache.get_stats())
+
+@app.route('/api/metrics/http', methods=['GET'])
+def get_http_metrics():
+    """Per-host latency and error metrics for the upstream scrapers"""
+    return jsonify(http_client.get_metrics())
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
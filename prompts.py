@@ -28,14 +28,17 @@ class ActionItem(BaseModel):
 class Recommendation(BaseModel):
     recommendations: List[ActionItem] = Field(description="5-7 comprehensive, prioritized recommendations")
 
-class ResumeAnalysis(BaseModel):
+class ResumeNarrative(BaseModel):
     summary: str = Field(description="In-depth resume analysis (200+ words)")
-    key_skills: List[str] = Field(description="10-15 technical and soft skills with proficiency context")
-    professional_links: List[str] = Field(description="All professional links found")
-    missing_elements: List[str] = Field(description="5-8 critical missing elements with explanations")
     ats_score: int = Field(description="ATS compatibility score (0-100)")
     improvement_suggestions: List[str] = Field(description="Specific resume improvement suggestions")
 
+class ResumeAnalysis(ResumeNarrative):
+    # Filled from the cleaned resume data (report_precompute), not by the LLM
+    key_skills: List[str] = Field(description="Key technical skills found in the resume")
+    professional_links: List[str] = Field(description="All professional links found")
+    missing_elements: List[str] = Field(description="Standard resume sections that are missing")
+
 class Skill(BaseModel):
     name: str = Field(description="Skill name")
     category: str = Field(description="Skill category")
@@ -65,19 +68,23 @@ class CareerInsight(BaseModel):
     competitive_advantage: str = Field(description="What makes this student stand out")
     market_positioning: str = Field(description="How student compares to peers")
 
-class StudentReport(BaseModel):
-    enrollment_no: str = Field(description="Student's enrollment number")
-    name: str = Field(description="Student's full name")
+class NarrativeReport(BaseModel):
+    """The part of StudentReport the LLM writes; report_precompute fills in the rest."""
     overall_summary: str = Field(description="Comprehensive 300+ word HR-style summary")
     executive_summary: str = Field(description="Brief 2-3 sentence elevator pitch")
     analysis: StrengthWeakness = Field(description="Deep analysis of strengths, weaknesses, and hidden talents")
     detailed_scores: List[ScoreMetric] = Field(description="8-10 parameters with detailed justifications")
     actionable_advice: Recommendation = Field(description="5-7 comprehensive, prioritized recommendations")
-    resume_analysis: ResumeAnalysis = Field(description="In-depth resume analysis")
+    resume_analysis: ResumeNarrative = Field(description="In-depth resume analysis")
     skills: List[Skill] = Field(description="15-20 skills with evidence and market context")
     learning_path: List[LearningPathItem] = Field(description="4-6 detailed learning modules")
     career_insights: CareerInsight = Field(description="Career trajectory and market positioning")
 
+class StudentReport(NarrativeReport):
+    enrollment_no: str = Field(description="Student's enrollment number")
+    name: str = Field(description="Student's full name")
+    resume_analysis: ResumeAnalysis = Field(description="In-depth resume analysis")
+
 # --- Enhanced Prompt Template ---
 
 REPORT_PROMPT_TEMPLATE = """
@@ -95,13 +102,13 @@ Student Data:
 3. Be actionable - provide specific steps, not generic advice
 4. Be honest - identify both strengths and areas for significant improvement
 5. Be forward-looking - consider career trajectory and market trends
+6. The "computed_facts" in the student data are exact: base your analysis on them, use the given
+   "fixed_scores" for those parameters under exactly those parameter names, and do not output the computed fields yourself (enrollment
+   number, name, CGPA trend, resume key skills, professional links and missing elements)
 
 **Required JSON Structure with Enhanced Detail**:
 
 {{
-  "enrollment_no": "<student_enrollment_number>",
-  "name": "<student_name>",
-  
   "executive_summary": "A compelling 2-3 sentence elevator pitch highlighting the student's unique value proposition and market positioning.",
   
   "overall_summary": "A comprehensive 300+ word professional summary that covers:
@@ -235,19 +242,6 @@ Student Data:
   
   "resume_analysis": {{
     "summary": "COMPREHENSIVE ANALYSIS (200+ words): [Analyze resume structure, content quality, keyword optimization, ATS compatibility, visual presentation, professional tone, achievement quantification, technical depth, project descriptions, missing elements, comparison to industry standards, specific improvement areas]",
-    "key_skills": [
-      "Python (Proficient - 3+ years, used in X projects)",
-      "JavaScript/React (Advanced - built Y applications)",
-      "Data Structures & Algorithms (Intermediate - Z problems solved)",
-      "... 10-15 total skills with context"
-    ],
-    "professional_links": ["github.com/username", "linkedin.com/in/username", "portfolio.dev"],
-    "missing_elements": [
-      "Certifications - Adding AWS/Azure certifications would validate cloud skills",
-      "Quantified achievements - Replace 'worked on' with 'improved X by Y%'",
-      "Technical blog/writing samples - Demonstrates communication skills",
-      "... 5-8 total missing elements with explanations"
-    ],
     "ats_score": 72,
     "improvement_suggestions": [
       "Add keywords: [specific technical terms for target roles]",
@@ -358,6 +352,100 @@ QA_PROMPT = PromptTemplate(
     input_variables=["context", "question"]
 )
 
+# --- Sectioned report generation ---
+# With REPORT_MODE=sectioned each group of StudentReport fields is written by
+# its own, much shorter call; the calls run concurrently over one context.
+
+REPORT_SECTION_GROUPS = {
+    "summaries": ["executive_summary", "overall_summary"],
+    "analysis": ["analysis"],
+    "detailed_scores": ["detailed_scores"],
+    "actionable_advice": ["actionable_advice"],
+    "resume_analysis": ["resume_analysis"],
+    "skills": ["skills"],
+    "learning_path": ["learning_path"],
+    "career_insights": ["career_insights"],
+}
+
+REPORT_SECTION_GUIDANCE = {
+    "summaries": "A compelling 2-3 sentence elevator pitch (executive_summary) and a 300+ word professional summary "
+                 "(overall_summary) covering the academic trajectory, technical capabilities and projects, problem-solving "
+                 "and coding proficiency, soft skills, market readiness and unique differentiators. It should read like "
+                 "a professional reference letter.",
+    "analysis": "5-7 detailed strengths and 5-7 specific weaknesses, each tied to concrete data points (CGPA, problems "
+                "solved, ratings, projects), plus 3-5 hidden talents: underutilized skills the student could turn into "
+                "a competitive advantage.",
+    "detailed_scores": "8-10 scored parameters (1-10), e.g. Academic Excellence & Consistency, Data Structures & Algorithms "
+                       "Mastery, Full-Stack Development Capabilities, Problem-Solving & Analytical Thinking, Software "
+                       "Engineering Best Practices, Communication & Professional Skills, Market Readiness & Hiring "
+                       "Potential, Learning Agility & Growth Mindset. Each justification is 100+ words of evidence "
+                       "compared against industry expectations.",
+    "actionable_advice": "5-7 prioritized recommendations. Each description is a 150+ word plan with concrete steps, "
+                         "resources and a week-by-week timeline; include expected impact and a Mermaid flowchart "
+                         "(graph TD/LR) of the milestones.",
+    "resume_analysis": "A 200+ word analysis of the resume (structure, keywords, ATS compatibility, quantified "
+                       "achievements), an ATS score (0-100) and specific improvement suggestions. Its key skills, "
+                       "links and missing elements are already in computed_facts.",
+    "skills": "15-20 skills with category, proficiency (0-100), evidence from the profile and current market demand "
+              "(HIGH, MEDIUM or LOW).",
+    "learning_path": "4-6 sequential learning phases, each with objectives, duration, prerequisites, curated resources "
+                     "(real URLs, difficulty, time) and measurable milestones.",
+    "career_insights": "The current career trajectory, 5-7 suitable roles with reasoning, a realistic salary range (INR), "
+                       "the student's competitive advantage and how they are positioned against peers and target "
+                       "companies.",
+}
+
+REPORT_SECTION_PROMPT_TEMPLATE = """
+You are an expert HR professional, technical interviewer, and career counselor with 15+ years of experience.
+You are writing ONE part of a comprehensive student performance report; the other parts are written separately.
+
+Student Data:
+{context}
+
+**Your part**: {guidance}
+
+**CRITICAL INSTRUCTIONS**:
+1. Be specific - cite exact numbers, projects, and achievements
+2. Be thorough - each field should be detailed and comprehensive
+3. Be actionable - provide specific steps, not generic advice
+4. Be honest - identify both strengths and areas for significant improvement
+5. The "computed_facts" in the student data are exact: base your analysis on them and use the given
+   "fixed_scores" for those parameters under exactly those parameter names
+
+Return ONLY a JSON object with exactly these keys: {section_names}
+No text before or after the JSON.
+
+**Required structure** (replace every <placeholder> with real content of that type):
+{schema}
+"""
+
+REPORT_SECTION_PROMPT = PromptTemplate(
+    template=REPORT_SECTION_PROMPT_TEMPLATE,
+    input_variables=["context", "guidance", "section_names", "schema"]
+)
+
+# Used when part of a JSON response was missing or invalid: asks for just those sections
+SECTION_REPAIR_PROMPT_TEMPLATE = """
+You are completing part of {task}. An earlier response left some sections missing or invalid.
+
+Return ONLY a JSON object with exactly these keys: {section_names}
+Do not include any other section and no text before or after the JSON.
+
+**Problems with the earlier response**:
+{problems}
+
+**Required structure** (replace every <placeholder> with real, detailed content of that type):
+{schema}
+
+**Context:**
+{context}
+"""
+
+SECTION_REPAIR_PROMPT = PromptTemplate(
+    template=SECTION_REPAIR_PROMPT_TEMPLATE,
+    input_variables=["task", "section_names", "problems", "schema", "context"]
+)
+
 RESUME_TAILORING_PROMPT = """
 You are an expert Resume Writer and Career Coach. Your task is to rewrite a student's resume to perfectly target a specific job description.
 
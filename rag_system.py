@@ -1,53 +1,84 @@
 # rag_system.py - Enhanced for deeper analysis
+#
+# langchain, Google GenAI, the prompt models and the scraping tools (bs4) are
+# imported and constructed on first use, so the app starts in well under a
+# second; see StudentApiRAG.get_startup_report().
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.output_parsers import JsonOutputParser
-from prompts import REPORT_PROMPT, QA_PROMPT, StudentReport, RESUME_TAILORING_PROMPT
 import json
-from langchain_core.prompts import PromptTemplate
 import os
 import re
+import time
 import logging
-from youtube_search_tool import YouTubeSearchTool
-from job_scraper import JobApplicationAnalyzer
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dashboard_analyzer import get_dashboard_metrics
+from report_cache import ReportCache, fingerprint
+from answer_cache import SemanticAnswerCache
+from json_stream import IncrementalJSONObjectParser, parse_members, parse_array_items
+from section_repair import section_validators, validate_sections, rerequest, schema_hints
+from context_builder import build_context, record_prompt, dumps_compact, CONTEXT_VERSION
+from retriever import ProfileRetriever
+import llm_registry
+import report_precompute
+from single_flight import single_flight
 
 logger = logging.getLogger('rag_system')
 DATA_PATH = "final_cleaned_student_data.json"
 
+# Concurrent YouTube topic searches per report, and the deadline for all of them (seconds)
+YOUTUBE_SEARCH_WORKERS = 3
+YOUTUBE_TOPIC_TIMEOUT = 45
+
+# "single": one REPORT_PROMPT call writes the whole report. "sectioned": each
+# group in REPORT_SECTION_GROUPS is written by its own call, all running
+# concurrently over one shared context, so generation takes about as long as
+# the slowest section instead of the whole report.
+REPORT_MODE = os.getenv("REPORT_MODE", "single")
+REPORT_OPERATION = "report_section" if REPORT_MODE == "sectioned" else "report"
+
+# Settings for the structured report LLM; part of the report cache key
+REPORT_MODEL_SETTINGS = llm_registry.ROLE_SETTINGS[llm_registry.primary_role(REPORT_OPERATION)]
+
+# Fewest learning topics worth showing; below this, more are requested
+MIN_LEARNING_TOPICS = 4
+
+
+def _content_text(content) -> str:
+    """Message content as text (Gemini may return a list of parts)."""
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+    return content or ""
+
+
 class StudentApiRAG:
     def __init__(self):
         print("🚀 Initializing Enhanced RAG System with Deep Analysis...")
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
+        init_started = time.perf_counter()
+        self._startup_timings = {}
+        self._components = {}
+        self._component_lock = threading.RLock()
+
+        self.api_key = os.getenv("GOOGLE_API_KEY")
+        if not self.api_key:
             raise ValueError("GOOGLE_API_KEY environment variable not set!")
         
-        # Use more creative temperature for detailed, nuanced analysis
-        self.llm = ChatGoogleGenerativeAI(
-            model="models/gemini-2.5-pro",  # Use Pro for better analysis
-            google_api_key=api_key,
-            temperature=0.4,  # Increased for more creative, detailed responses
-            top_p=0.95,
-            top_k=40
-        )
-        
-        # Secondary LLM for structured output (lower temperature)
-        self.structured_llm = ChatGoogleGenerativeAI(
-            model="models/gemini-2.5-pro",
-            google_api_key=api_key,
-            temperature=0.2,  # Lower for consistent JSON structure
-            top_p=0.9
-        )
-        
-        self.youtube_tool = YouTubeSearchTool()
+        with self._timed("report_cache"):
+            self.report_cache = ReportCache()
+        with self._timed("answer_cache"):
+            self.answer_cache = SemanticAnswerCache()
+        with self._timed("retriever"):
+            self.retriever = ProfileRetriever()
         
         print("📚 Loading student data into memory...")
-        with open(DATA_PATH, 'r', encoding='utf-8') as f:
-            self.student_data = json.load(f)
+        with self._timed("student_data"):
+            with open(DATA_PATH, 'r', encoding='utf-8') as f:
+                self.student_data = json.load(f)
         print(f"✅ Loaded data for {len(self.student_data)} students.")
         print("🎯 Enhanced analysis engine ready for comprehensive reports!")
         
-        self.job_analyzer = JobApplicationAnalyzer()
+        self._init_seconds = time.perf_counter() - init_started
         
         self.topic_categories = {
             "DSA": [
@@ -73,6 +104,73 @@ class StudentApiRAG:
             ]
         }
 
+    # --- Lazily constructed components ---
+
+    @contextmanager
+    def _timed(self, name, lazy=False):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._startup_timings[name] = {
+                "seconds": round(time.perf_counter() - started, 4),
+                "lazy": lazy,
+            }
+
+    def _component(self, name, factory):
+        component = self._components.get(name)
+        if component is None:
+            with self._component_lock:
+                component = self._components.get(name)
+                if component is None:
+                    print(f"   ⏳ Initializing {name} on first use...")
+                    with self._timed(name, lazy=True):
+                        component = factory()
+                    self._components[name] = component
+        return component
+
+    # Clients and tools are shared process-wide through llm_registry; LLM
+    # calls go through llm_registry.route(operation)
+    def _create_youtube_tool(self):
+        return llm_registry.get_youtube_tool()
+
+    def _create_job_analyzer(self):
+        from job_scraper import JobApplicationAnalyzer
+        return JobApplicationAnalyzer()
+
+    @property
+    def youtube_tool(self):
+        return self._component("youtube_tool", self._create_youtube_tool)
+
+    @property
+    def job_analyzer(self):
+        return self._component("job_analyzer", self._create_job_analyzer)
+
+    def warm_up(self):
+        """Builds every lazy component now; meant for a background thread after startup."""
+        for role in llm_registry.ROLE_SETTINGS:
+            try:
+                with self._timed(f"{role}_llm", lazy=True):
+                    llm_registry.get_llm(role)
+            except Exception as e:
+                logger.error(f"Warm-up of the {role} LLM failed: {e}")
+        for name in ("youtube_tool", "job_analyzer"):
+            try:
+                getattr(self, name)
+            except Exception as e:
+                logger.error(f"Warm-up of {name} failed: {e}")
+
+    def get_startup_report(self) -> dict:
+        """Per-component initialization time; lazy components appear once first used."""
+        pending = [f"{role}_llm" for role, stats in llm_registry.get_stats()['roles'].items()
+                   if not stats['created']]
+        pending += [name for name in ("youtube_tool", "job_analyzer") if name not in self._components]
+        return {
+            "init_seconds": round(self._init_seconds, 4),
+            "components": dict(self._startup_timings),
+            "not_yet_initialized": pending,
+        }
+
     def _determine_sources_from_query(self, query: str) -> list:
         query = query.lower()
         sources = []
@@ -138,10 +236,11 @@ class StudentApiRAG:
         """
         
         try:
+            from langchain_core.prompts import PromptTemplate
             chain = PromptTemplate(
                 template=prompt_template, 
                 input_variables=["dsa_orientation_score", "dev_orientation_score", "strengths", "weaknesses"]
-            ) | self.llm
+            ) | llm_registry.route("learning_topics")[0]
             
             response = chain.invoke({
                 "dsa_orientation_score": dsa_orientation_score,
@@ -150,46 +249,18 @@ class StudentApiRAG:
                 "weaknesses": ', '.join(weaknesses[:3]) if weaknesses else 'None specifically identified'
             })
             
-            response_text = response.content
-            
-            # Extract JSON
-            json_start = response_text.find('[')
-            json_end = response_text.rfind(']') + 1
-            
-            if json_start == -1 or json_end == 0:
-                logger.error("No JSON array found in topic identification")
-                return self._get_default_topics()
-            
-            json_text = response_text[json_start:json_end]
-            json_text = json_text.replace('\n', ' ').replace('\r', '')
-            
-            try:
-                topics_data = json.loads(json_text)
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON parsing error: {e}")
-                # Try fixing common issues
-                fixed_json = json_text.replace("'", '"')
-                try:
-                    topics_data = json.loads(fixed_json)
-                except:
-                    return self._get_default_topics()
-            
-            if not isinstance(topics_data, list):
-                logger.error("Topic data is not a list")
-                return self._get_default_topics()
+            # Keep every well-formed topic, even from a truncated or partly broken array
+            topics_data, invalid_items = parse_array_items(_content_text(response.content))
+            if invalid_items:
+                logger.warning(f"Skipped {len(invalid_items)} malformed learning topic(s)")
+            valid_topics = self._valid_learning_topics(topics_data)[:6]  # Max 6 topics
             
-            # Validate and process topics
-            valid_topics = []
-            for item in topics_data[:6]:  # Max 6 topics
-                topic = item.get("topic", "").strip()
-                reason = item.get("reason", "").strip()
-                
-                if topic and reason and len(reason) > 30:  # Ensure substantial reason
-                    valid_topics.append({
-                        "topic": topic,
-                        "reason": reason,
-                        "category": self._determine_topic_category(topic)
-                    })
+            missing = MIN_LEARNING_TOPICS - len(valid_topics)
+            if missing > 0:
+                print(f"    🩹 Requesting {missing} more learning topic(s)")
+                more_topics = self._request_more_topics(missing, valid_topics, dsa_orientation_score,
+                                                        dev_orientation_score, weaknesses)
+                valid_topics += more_topics[:missing]
             
             if not valid_topics:
                 logger.warning("No valid topics identified, using defaults")
@@ -202,6 +273,53 @@ class StudentApiRAG:
             logger.error(f"Error identifying topics: {e}")
             return self._get_default_topics()
 
+    def _valid_learning_topics(self, items: list) -> list:
+        """Topics with a name and a substantial reason, with their category."""
+        valid_topics = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            topic = str(item.get("topic") or "").strip()
+            reason = str(item.get("reason") or "").strip()
+            
+            if topic and reason and len(reason) > 30:  # Ensure substantial reason
+                valid_topics.append({
+                    "topic": topic,
+                    "reason": reason,
+                    "category": self._determine_topic_category(topic)
+                })
+        return valid_topics
+
+    def _request_more_topics(self, count: int, existing: list, dsa_orientation_score, dev_orientation_score,
+                             weaknesses: list) -> list:
+        """Asks only for the topics that are missing, not the whole list again."""
+        prompt_template = """
+        Suggest {count} more specific, searchable learning topics for a student with:
+        - DSA Proficiency: {dsa_orientation_score}/10
+        - Development Skills: {dev_orientation_score}/10
+        - Areas for Growth: {weaknesses}
+        
+        Do not repeat any of these topics: {existing}
+        
+        Return ONLY a JSON array of objects with "topic" and "reason" (50-100 words) keys.
+        """
+        try:
+            from langchain_core.prompts import PromptTemplate
+            chain = PromptTemplate.from_template(prompt_template) | llm_registry.route("learning_topics")[0]
+            response = chain.invoke({
+                "count": count,
+                "dsa_orientation_score": dsa_orientation_score,
+                "dev_orientation_score": dev_orientation_score,
+                "weaknesses": ', '.join(weaknesses[:3]) if weaknesses else 'None specifically identified',
+                "existing": ', '.join(t["topic"] for t in existing) or 'none',
+            })
+            items, _ = parse_array_items(_content_text(response.content))
+        except Exception as e:
+            logger.error(f"Error requesting more learning topics: {e}")
+            return []
+        known = {t["topic"].lower() for t in existing}
+        return [t for t in self._valid_learning_topics(items) if t["topic"].lower() not in known]
+
     def generate_tailored_resume(self, enrollment_no: str, job_description: str) -> str:
         """Generates a tailored resume in Markdown format based on the job description."""
         print(f"📄 Generating tailored resume for {enrollment_no}...")
@@ -212,15 +330,18 @@ class StudentApiRAG:
             return "Error: Student profile not found."
 
         # 2. Prepare Prompt
+        from prompts import RESUME_TAILORING_PROMPT
+        context = build_context(student_profile, "resume")
         prompt = RESUME_TAILORING_PROMPT.format(
-            student_profile=json.dumps(student_profile, indent=2), # Convert dict to JSON string for prompt
+            student_profile=context,
             job_description=job_description
         )
+        record_prompt("resume", prompt, context)
 
-        # 3. Call LLM
+        # 3. Call LLM (shared with an identical request already running)
         try:
-            response = self.llm.invoke(prompt)
-            return response.content
+            return single_flight.do("resume", enrollment_no, {"job_description": job_description},
+                                    lambda: llm_registry.route("resume")[0].invoke(prompt).content)
         except Exception as e:
             logger.error(f"Error generating resume: {e}")
             return f"Error generating resume: {str(e)}"
@@ -264,102 +385,146 @@ class StudentApiRAG:
             }
         ]
 
+    def _format_topic_module(self, topic_info: dict, videos: list) -> dict:
+        return {
+            "topic": topic_info["topic"],
+            "reason": topic_info["reason"],
+            "category": topic_info["category"],
+            "videos": [{
+                "title": video["title"],
+                "url": video["url"],
+                "embed_url": video["embed_url"],
+                "reason": video["description"]
+            } for video in videos]
+        }
+
+    def _search_topic_videos(self, topic_info: dict) -> dict:
+        """Search videos for one learning topic, falling back to curated videos on error."""
+        topic = topic_info["topic"]
+        category = topic_info["category"]
+        print(f"    🔍 Searching videos for: '{topic}' ({category})")
+        
+        try:
+            youtube_videos = self.youtube_tool.run({
+                "query": topic,
+                "max_results": 5,
+                "topic_category": category
+            })
+            module = self._format_topic_module(topic_info, youtube_videos)
+            print(f"      ✅ Found {len(module['videos'])} high-quality videos for '{topic}'")
+            return module
+        except Exception as e:
+            print(f"    ⚠️ Error fetching videos for '{topic}': {e}")
+            return self._fallback_topic_module(topic_info)
+
+    def _fallback_topic_module(self, topic_info: dict) -> dict:
+        fallback_videos = self.youtube_tool._get_fallback_videos(topic_info["topic"], 5, topic_info["category"])
+        return self._format_topic_module(topic_info, fallback_videos)
+
     def _get_youtube_recommendations(self, student_report: dict) -> list:
         """Generate comprehensive YouTube video recommendations."""
         print("  📺 Generating personalized YouTube recommendations...")
         
         learning_topics = self._identify_learning_topics(student_report)
-        topic_recommendations = []
         
-        for topic_info in learning_topics:
-            topic = topic_info["topic"]
-            category = topic_info["category"]
-            
-            print(f"    🔍 Searching videos for: '{topic}' ({category})")
-            
+        # Topic searches are independent network calls; run them concurrently
+        # (bounded so we don't hammer YouTube) and keep the topic order.
+        topic_recommendations = []
+        executor = ThreadPoolExecutor(max_workers=YOUTUBE_SEARCH_WORKERS)
+        started_at = time.monotonic()
+        futures = [executor.submit(self._search_topic_videos, topic_info) for topic_info in learning_topics]
+        for topic_info, future in zip(learning_topics, futures):
+            remaining = YOUTUBE_TOPIC_TIMEOUT - (time.monotonic() - started_at)
             try:
-                youtube_videos = self.youtube_tool.run({
-                    "query": topic,
-                    "max_results": 5,
-                    "topic_category": category
-                })
-                
-                topic_videos = [{
-                    "title": video["title"],
-                    "url": video["url"],
-                    "embed_url": video["embed_url"],
-                    "reason": video["description"]
-                } for video in youtube_videos]
-                
-                topic_recommendations.append({
-                    "topic": topic,
-                    "reason": topic_info["reason"],
-                    "category": category,
-                    "videos": topic_videos
-                })
-                
-                print(f"      ✅ Found {len(topic_videos)} high-quality videos")
-                
+                topic_recommendations.append(future.result(timeout=max(0.0, remaining)))
             except Exception as e:
-                print(f"    ⚠️ Error fetching videos for '{topic}': {e}")
-                fallback_videos = self.youtube_tool._get_fallback_videos(topic, 5, category)
-                topic_videos = [{
-                    "title": video["title"],
-                    "url": video["url"],
-                    "embed_url": video["embed_url"],
-                    "reason": video["description"]
-                } for video in fallback_videos]
-                
-                topic_recommendations.append({
-                    "topic": topic,
-                    "reason": topic_info["reason"],
-                    "category": category,
-                    "videos": topic_videos
-                })
+                print(f"    ⚠️ Video search for '{topic_info['topic']}' did not finish in time: {e!r}")
+                topic_recommendations.append(self._fallback_topic_module(topic_info))
+        # Don't block the report on stragglers that already fell back
+        executor.shutdown(wait=False, cancel_futures=True)
         
         print(f"    ✅ Generated {len(topic_recommendations)} comprehensive learning modules")
         return topic_recommendations
 
-    def generate_structured_report(self, enrollment_no: str) -> dict:
-        """Generate comprehensive student report with deep analysis."""
-        print(f"\n{'='*80}")
-        print(f"🎓 GENERATING COMPREHENSIVE REPORT FOR: {enrollment_no}")
-        print(f"{'='*80}\n")
-        
+    def _report_cache_key(self, student_profile: dict) -> str:
+        from prompts import REPORT_PROMPT_TEMPLATE, REPORT_SECTION_PROMPT_TEMPLATE, REPORT_SECTION_GUIDANCE
+        settings = dict(REPORT_MODEL_SETTINGS, context_version=CONTEXT_VERSION)
+        if REPORT_MODE == "sectioned":
+            template = REPORT_SECTION_PROMPT_TEMPLATE + json.dumps(REPORT_SECTION_GUIDANCE, sort_keys=True)
+            settings["report_mode"] = REPORT_MODE
+        else:
+            template = REPORT_PROMPT_TEMPLATE
+        return ReportCache.make_key(student_profile, template, settings)
+
+    def get_cached_report(self, enrollment_no: str):
+        """Return the cached report for the student's current profile, or None."""
+        student_profile = self.student_data.get(enrollment_no)
+        if not student_profile:
+            return None
+        return self.report_cache.get(enrollment_no, self._report_cache_key(student_profile))
+
+    def generate_structured_report(self, enrollment_no: str, force_refresh: bool = False) -> dict:
+        """Generate comprehensive student report with deep analysis.
+
+        Reports are cached by profile/prompt/model hash; pass force_refresh=True
+        to skip the cache lookup and regenerate.
+        """
         student_profile = self.student_data.get(enrollment_no)
         if not student_profile:
             return {"error": "No data found for this student."}
         
-        context = json.dumps(student_profile, indent=2)
+        cache_key = self._report_cache_key(student_profile)
+        if not force_refresh:
+            cached_report = self.report_cache.get(enrollment_no, cache_key)
+            if cached_report is not None:
+                print(f"⚡ Serving cached report for {enrollment_no} (profile unchanged)")
+                return cached_report
         
-        # Use structured LLM for JSON parsing
-        parser = JsonOutputParser(pydantic_object=StudentReport)
-        prompt_with_format = REPORT_PROMPT.partial(
-            format_instructions=parser.get_format_instructions()
-        )
+        # Identical concurrent requests (double clicks, two mentors) share one run
+        return single_flight.do("report", enrollment_no, cache_key,
+                                lambda: self._generate_report(enrollment_no, student_profile, cache_key))
+
+    def _generate_report(self, enrollment_no: str, student_profile: dict, cache_key: str) -> dict:
+        print(f"\n{'='*80}")
+        print(f"🎓 GENERATING COMPREHENSIVE REPORT FOR: {enrollment_no}")
+        print(f"{'='*80}\n")
         
-        chain = prompt_with_format | self.structured_llm | parser
+        # Fields we can compute exactly; the LLM only writes the narrative
+        precomputed = report_precompute.precompute(enrollment_no, student_profile)
+        context = self._report_context(student_profile, precomputed)
         
         try:
-            print("🤖 AI analyzing student profile comprehensively...")
-            report_dict = chain.invoke({"context": context})
+            if REPORT_MODE == "sectioned":
+                print("🤖 AI writing report sections concurrently...")
+                members, invalid_members, roles = {}, {}, []
+                for group, group_members, group_invalid, group_role in self._generate_report_sections(context):
+                    members.update(group_members)
+                    invalid_members.update(group_invalid)
+                    roles.append(group_role)
+                    print(f"    ✅ Section '{group}' done")
+                role = self._report_role(roles)
+            else:
+                # Use structured LLM for JSON parsing
+                from langchain_core.output_parsers import JsonOutputParser
+                from prompts import REPORT_PROMPT, NarrativeReport
+                parser = JsonOutputParser(pydantic_object=NarrativeReport)
+                prompt_with_format = REPORT_PROMPT.partial(
+                    format_instructions=parser.get_format_instructions()
+                )
+                record_prompt("report", prompt_with_format.format(context=context), context)
+                
+                llm, role = llm_registry.route("report")
+                chain = prompt_with_format | llm
+                
+                print("🤖 AI analyzing student profile comprehensively...")
+                response = chain.invoke({"context": context})
+                members, invalid_members = parse_members(_content_text(response.content))
             
-            # Inject CGPA Trend Data
-            try:
-                semester_performance = student_profile.get("academic_profile", {}).get("semester_performance", [])
-                if semester_performance:
-                    labels = [f"Sem {sem['semester']}" for sem in semester_performance]
-                    values = [sem['sgpa'] for sem in semester_performance]
-                    report_dict["cgpa_trend"] = {
-                        "labels": labels,
-                        "values": values
-                    }
-                    print(f"    📊 Injected CGPA trend: {len(values)} semesters")
-                else:
-                    report_dict["cgpa_trend"] = None
-            except Exception as e:
-                print(f"    ⚠️ CGPA trend extraction failed: {e}")
-                report_dict["cgpa_trend"] = None
+            # Keep every valid section; re-request only the broken ones
+            report_dict, problems = self._check_report_sections(members, invalid_members)
+            if problems:
+                report_dict = self._repair_report_sections(report_dict, problems, context)
+            report_precompute.apply(report_dict, precomputed)
             
             # Generate video recommendations
             try:
@@ -371,6 +536,8 @@ class StudentApiRAG:
                 print(f"    ⚠️ Video recommendations failed: {e}")
                 report_dict["youtube_recommendations"] = self._get_default_topic_recommendations()
             
+            self._cache_report(enrollment_no, cache_key, report_dict, role)
+            
             print(f"\n{'='*80}")
             print("✅ COMPREHENSIVE REPORT GENERATION COMPLETE!")
             print(f"{'='*80}\n")
@@ -380,71 +547,300 @@ class StudentApiRAG:
         except Exception as e:
             logger.error(f"Report generation error: {e}", exc_info=True)
             print(f"\n❌ ERROR: {e}\n")
-            return {
-                "error": "Failed to generate report",
-                "overall_summary": "Report generation encountered an error. Please try again.",
-                "executive_summary": "Error generating analysis.",
-                "detailed_scores": [],
-                "analysis": {
-                    "strengths": ["System error occurred"],
-                    "weaknesses": ["Unable to analyze due to technical issue"],
-                    "hidden_talents": []
-                },
-                "actionable_advice": {
-                    "recommendations": [{
-                        "title": "System Error",
-                        "description": "Please try generating the report again or contact support.",
-                        "priority": "HIGH",
-                        "estimated_time": "N/A",
-                        "expected_impact": "N/A",
-                        "mermaid_flowchart": ""
-                    }]
-                },
-                "resume_analysis": {
-                    "summary": "Analysis unavailable",
-                    "key_skills": [],
-                    "professional_links": [],
-                    "missing_elements": [],
-                    "ats_score": 0,
-                    "improvement_suggestions": []
-                },
-                "skills": [],
-                "learning_path": [],
-                "career_insights": {
-                    "current_trajectory": "Analysis unavailable",
-                    "potential_roles": [],
-                    "salary_range": "N/A",
-                    "competitive_advantage": "N/A",
-                    "market_positioning": "N/A"
-                },
-                "youtube_recommendations": self._get_default_topic_recommendations()
+            return self._error_report()
+
+    def stream_structured_report(self, enrollment_no: str, force_refresh: bool = False):
+        """Generate the structured report, yielding sections as they complete.
+
+        The report job publishes these as job progress. Yields (event, payload) tuples:
+          ("progress", {"section": key})            the LLM started writing a section
+          ("section", {"name": key, "data": value}) a top-level section is complete
+          ("done", {"cached": bool, "report": dict}) the full report
+        When an identical report is already being generated, its result is
+        replayed instead and "done" also carries "coalesced": True (the
+        caller of the original run saves it).
+        youtube_recommendations is always the last section, since it needs the
+        finished analysis before the video searches can start.
+        """
+        student_profile = self.student_data.get(enrollment_no)
+        if not student_profile:
+            yield "done", {"cached": False, "report": {"error": "No data found for this student."}}
+            return
+
+        cache_key = self._report_cache_key(student_profile)
+        if not force_refresh:
+            cached_report = self.report_cache.get(enrollment_no, cache_key)
+            if cached_report is not None:
+                print(f"⚡ Streaming cached report for {enrollment_no} (profile unchanged)")
+                for name, data in cached_report.items():
+                    yield "section", {"name": name, "data": data}
+                yield "done", {"cached": True, "report": cached_report}
+                return
+
+        flight, is_leader = single_flight.join("report", enrollment_no, cache_key)
+        if not is_leader:
+            # The same report is already being generated; replay its result
+            print(f"🔗 Waiting for the in-flight report for {enrollment_no}")
+            try:
+                report_dict = flight.wait()
+            except Exception as e:
+                logger.error(f"Coalesced report generation failed: {e}")
+                report_dict = self._error_report()
+            for name, data in report_dict.items():
+                yield "section", {"name": name, "data": data}
+            yield "done", {"cached": False, "coalesced": True, "report": report_dict}
+            return
+
+        finished = False
+        try:
+            for event, payload in self._stream_report(enrollment_no, student_profile, cache_key):
+                if event == "done":
+                    finished = True
+                    flight.resolve(payload["report"])
+                yield event, payload
+        finally:
+            if not finished:
+                flight.fail(RuntimeError("Report stream ended before the report was complete"))
+
+    def _stream_report(self, enrollment_no: str, student_profile: dict, cache_key: str):
+        print(f"\n🎓 STREAMING COMPREHENSIVE REPORT FOR: {enrollment_no}\n")
+
+        precomputed = report_precompute.precompute(enrollment_no, student_profile)
+        context = self._report_context(student_profile, precomputed)
+        emitted = {}
+        try:
+            if REPORT_MODE == "sectioned":
+                # Sections arrive whole, in whatever order their calls finish
+                from prompts import REPORT_SECTION_GROUPS
+                print("🤖 AI writing report sections concurrently (streaming)...")
+                pending = list(REPORT_SECTION_GROUPS)
+                yield "progress", {"section": pending[0]}
+                members, invalid_members, roles = {}, {}, []
+                for group, group_members, group_invalid, group_role in self._generate_report_sections(context):
+                    members.update(group_members)
+                    invalid_members.update(group_invalid)
+                    roles.append(group_role)
+                    for name, data in group_members.items():
+                        emitted[name] = data
+                        yield "section", {"name": name, "data": data}
+                    pending.remove(group)
+                    if pending:
+                        yield "progress", {"section": pending[0]}
+                role = self._report_role(roles)
+            else:
+                from langchain_core.output_parsers import JsonOutputParser
+                from prompts import REPORT_PROMPT, NarrativeReport
+                parser = JsonOutputParser(pydantic_object=NarrativeReport)
+                prompt_with_format = REPORT_PROMPT.partial(
+                    format_instructions=parser.get_format_instructions()
+                )
+                record_prompt("report", prompt_with_format.format(context=context), context)
+                llm, role = llm_registry.route("report")
+                chain = prompt_with_format | llm
+
+                sections = IncrementalJSONObjectParser()
+                current_key = None
+                print("🤖 AI analyzing student profile (streaming)...")
+                for chunk in chain.stream({"context": context}):
+                    for name, data in sections.feed(_content_text(chunk.content)):
+                        emitted[name] = data
+                        yield "section", {"name": name, "data": data}
+                    if sections.pending_key() and sections.pending_key() != current_key:
+                        current_key = sections.pending_key()
+                        yield "progress", {"section": current_key}
+                members, invalid_members = sections.members, sections.invalid_members
+
+            # Validate section by section, the same way the blocking path does
+            report_dict, problems = self._check_report_sections(members, invalid_members)
+            if problems:
+                yield "progress", {"section": next(iter(problems))}
+                report_dict = self._repair_report_sections(report_dict, problems, context)
+            report_precompute.apply(report_dict, precomputed)
+        except Exception as e:
+            logger.error(f"Streaming report generation error: {e}", exc_info=True)
+            print(f"\n❌ ERROR: {e}\n")
+            report_dict = self._error_report()
+            for name, data in report_dict.items():
+                yield "section", {"name": name, "data": data}
+            yield "done", {"cached": False, "report": report_dict}
+            return
+
+        # Computed and repaired sections, and ones changed after they were sent
+        for name, data in report_dict.items():
+            if name not in emitted or emitted[name] != data:
+                yield "section", {"name": name, "data": data}
+
+        yield "progress", {"section": "youtube_recommendations"}
+        try:
+            report_dict["youtube_recommendations"] = self._get_youtube_recommendations(report_dict)
+        except Exception as e:
+            print(f"    ⚠️ Video recommendations failed: {e}")
+            report_dict["youtube_recommendations"] = self._get_default_topic_recommendations()
+        yield "section", {"name": "youtube_recommendations", "data": report_dict["youtube_recommendations"]}
+
+        self._cache_report(enrollment_no, cache_key, report_dict, role)
+
+        print("✅ STREAMED REPORT GENERATION COMPLETE!\n")
+        yield "done", {"cached": False, "report": report_dict}
+
+    def _generate_report_sections(self, context: str):
+        """
+        Sectioned mode: writes every group of REPORT_SECTION_GROUPS with its own
+        concurrent call over the same context. Yields (group, members,
+        invalid_members, role) as each call finishes; a failed call yields no
+        members, so its sections go through the usual repair.
+        """
+        from prompts import REPORT_SECTION_PROMPT, REPORT_SECTION_GROUPS, REPORT_SECTION_GUIDANCE, NarrativeReport
+        validators = section_validators(NarrativeReport)
+
+        def write(group):
+            names = REPORT_SECTION_GROUPS[group]
+            inputs = {
+                "context": context,
+                "guidance": REPORT_SECTION_GUIDANCE[group],
+                "section_names": ", ".join(names),
+                "schema": schema_hints(names, validators),
+            }
+            record_prompt("report_section", REPORT_SECTION_PROMPT.format(**inputs), context)
+            llm, role = llm_registry.route("report_section")
+            response = (REPORT_SECTION_PROMPT | llm).invoke(inputs)
+            members, invalid_members = parse_members(_content_text(response.content))
+            # Only this group's sections; anything else it wrote is another call's job
+            return ({name: value for name, value in members.items() if name in names},
+                    {name: raw for name, raw in invalid_members.items() if name in names},
+                    role)
+
+        executor = ThreadPoolExecutor(max_workers=len(REPORT_SECTION_GROUPS), thread_name_prefix='report-section')
+        try:
+            # Each call runs in a copy of this context so per-request callbacks
+            # (e.g. batch token counting) still see it
+            futures = {executor.submit(contextvars.copy_context().run, write, group): group
+                       for group in REPORT_SECTION_GROUPS}
+            for future in as_completed(futures):
+                group = futures[future]
+                try:
+                    members, invalid_members, role = future.result()
+                except Exception as e:
+                    logger.error(f"Report section '{group}' failed: {e}")
+                    members, invalid_members, role = {}, {}, None
+                yield group, members, invalid_members, role
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _report_role(self, roles: list) -> str:
+        """The role to report for a sectioned run: a fallback role if any section used one."""
+        primary = llm_registry.primary_role(REPORT_OPERATION)
+        return next((role for role in roles if role and role != primary), primary)
+
+    def _report_context(self, student_profile: dict, precomputed: dict) -> str:
+        """The student context plus the precomputed facts the narrative must build on."""
+        context = build_context(student_profile, REPORT_OPERATION)
+        return f"{context}\ncomputed_facts:{dumps_compact(precomputed['facts'])}"
+
+    def _check_report_sections(self, members: dict, invalid_members: dict):
+        """Validates the LLM-written report sections (NarrativeReport). Returns (report, problems)."""
+        from prompts import NarrativeReport
+        report_dict, problems = validate_sections(members, invalid_members, section_validators(NarrativeReport))
+        if problems:
+            print(f"    🩹 {len(problems)} report section(s) missing or invalid: {', '.join(problems)}")
+        return report_dict, problems
+
+    def _repair_report_sections(self, report_dict: dict, problems: dict, context: str) -> dict:
+        """
+        Re-requests just the broken sections. Sections that still fail get the
+        error placeholders and are listed in "incomplete_sections".
+        """
+        from prompts import NarrativeReport, SECTION_REPAIR_PROMPT
+        validators = section_validators(NarrativeReport)
+        if len(problems) == len(validators):
+            raise ValueError("The model response contained no valid report sections")
+
+        def request(bad_sections):
+            chain = SECTION_REPAIR_PROMPT | llm_registry.route("report_repair")[0]
+            response = chain.invoke({
+                "task": "a student performance report",
+                "section_names": ", ".join(bad_sections),
+                "problems": "\n".join(f"- {name}: {reason}" for name, reason in bad_sections.items()),
+                "schema": schema_hints(bad_sections, validators),
+                "context": context,
+            })
+            return _content_text(response.content)
+
+        report_dict, problems = rerequest(report_dict, problems, validators, request)
+        if problems:
+            placeholder = self._placeholder_sections()
+            for name in problems:
+                report_dict[name] = placeholder[name]
+            report_dict["incomplete_sections"] = sorted(problems)
+            print(f"    ⚠️ Could not repair: {', '.join(sorted(problems))}")
+        else:
+            print("    ✅ Repaired all broken sections")
+        return report_dict
+
+    def _cache_report(self, enrollment_no: str, cache_key: str, report_dict: dict, role: str):
+        # The cache key names the primary model; don't let a fallback report stand in for it
+        if role != llm_registry.primary_role(REPORT_OPERATION):
+            print(f"    ⚠️ Report was generated on the '{role}' fallback model; not caching it")
+            return
+        if report_dict.get("incomplete_sections"):
+            print("    ⚠️ Report has placeholder sections; not caching it")
+            return
+        try:
+            self.report_cache.put(enrollment_no, cache_key, report_dict)
+        except Exception as e:
+            logger.error(f"Failed to cache report for {enrollment_no}: {e}")
+
+    def _error_report(self) -> dict:
+        """Placeholder report shown when generation fails."""
+        return {
+            "error": "Failed to generate report",
+            **self._placeholder_sections(),
+            "youtube_recommendations": self._get_default_topic_recommendations()
+        }
+
+    def _placeholder_sections(self) -> dict:
+        """Stand-in content for every LLM-written report section."""
+        return {
+            "overall_summary": "Report generation encountered an error. Please try again.",
+            "executive_summary": "Error generating analysis.",
+            "detailed_scores": [],
+            "analysis": {
+                "strengths": ["System error occurred"],
+                "weaknesses": ["Unable to analyze due to technical issue"],
+                "hidden_talents": []
+            },
+            "actionable_advice": {
+                "recommendations": [{
+                    "title": "System Error",
+                    "description": "Please try generating the report again or contact support.",
+                    "priority": "HIGH",
+                    "estimated_time": "N/A",
+                    "expected_impact": "N/A",
+                    "mermaid_flowchart": ""
+                }]
+            },
+            "resume_analysis": {
+                "summary": "Analysis unavailable",
+                "key_skills": [],
+                "professional_links": [],
+                "missing_elements": [],
+                "ats_score": 0,
+                "improvement_suggestions": []
+            },
+            "skills": [],
+            "learning_path": [],
+            "career_insights": {
+                "current_trajectory": "Analysis unavailable",
+                "potential_roles": [],
+                "salary_range": "N/A",
+                "competitive_advantage": "N/A",
+                "market_positioning": "N/A"
             }
+        }
 
     def _get_default_topic_recommendations(self) -> list:
         """Return default comprehensive recommendations."""
-        default_topics = self._get_default_topics()
-        topic_recommendations = []
-        
-        for topic_info in default_topics:
-            topic = topic_info["topic"]
-            category = topic_info["category"]
-            fallback_videos = self.youtube_tool._get_fallback_videos(topic, 5, category)
-            
-            topic_videos = [{
-                "title": video["title"],
-                "url": video["url"],
-                "embed_url": video["embed_url"],
-                "reason": video["description"]
-            } for video in fallback_videos]
-            
-            topic_recommendations.append({
-                "topic": topic,
-                "reason": topic_info["reason"],
-                "category": category,
-                "videos": topic_videos
-            })
-        
-        return topic_recommendations
+        return [self._fallback_topic_module(topic_info) for topic_info in self._get_default_topics()]
 
     def analyze_job_application(self, job_application_link: str, enrollment_no: str) -> dict:
         """Analyze student profile against job requirements."""
@@ -466,7 +862,10 @@ class StudentApiRAG:
                 "video_recommendations": []
             }
         
-        analysis_result = self.job_analyzer.analyze(job_application_link, student_profile)
+        analysis_result = single_flight.do(
+            "job_analysis", enrollment_no, {"job": job_application_link},
+            lambda: self.job_analyzer.analyze(job_application_link, student_profile)
+        )
         print("✅ Job analysis complete!\n")
         
         return analysis_result
@@ -494,38 +893,40 @@ class StudentApiRAG:
         if not student_profile:
             return "❌ Could not find data for the selected student."
 
-        sources_to_use = self._determine_sources_from_query(query)
-        print(f"   📂 Using data sources: {', '.join(sources_to_use)}")
-
-        # Build targeted context
-        targeted_context = {}
-        if "academic_profile" in sources_to_use:
-            targeted_context["academic_profile"] = student_profile.get("academic_profile")
-        
-        coding_profiles = {}
-        if "leetcode" in sources_to_use:
-            coding_profiles["leetcode"] = student_profile.get("coding_profiles", {}).get("leetcode")
-        if "github" in sources_to_use:
-            coding_profiles["github"] = student_profile.get("coding_profiles", {}).get("github")
-        if "codeforces" in sources_to_use:
-            coding_profiles["codeforces"] = student_profile.get("coding_profiles", {}).get("codeforces")
-        
-        if coding_profiles:
-            targeted_context["coding_profiles"] = coding_profiles
-        if "coding_profiles" in sources_to_use and not coding_profiles:
-            targeted_context["coding_profiles"] = student_profile.get("coding_profiles")
-        if "resume" in sources_to_use:
-            targeted_context["resume"] = student_profile.get("resume")
-
-        if not targeted_context:
-            return "❌ Could not find relevant information in the student's profile to answer that question."
-
-        context_str = json.dumps(targeted_context, indent=2)
-        chain = QA_PROMPT | self.llm
+        # Reuse a prior answer to a near-identical question on the same profile
+        profile_fp = fingerprint(student_profile)
+        cached_answer, similarity = self.answer_cache.lookup(enrollment_no, profile_fp, query)
+        if cached_answer is not None:
+            print(f"   ⚡ Answered from semantic cache (similarity {similarity:.2f})\n")
+            return cached_answer
+
+        # Prefer the most relevant stored chunks (vector + BM25) over whole sections
+        context_str = self.retriever.build_context(enrollment_no, query)
+        if context_str:
+            print("   📂 Using retrieved profile chunks")
+        else:
+            sources_to_use = self._determine_sources_from_query(query)
+            print(f"   📂 Using data sources: {', '.join(sources_to_use)}")
+
+            # Build targeted context
+            sections = []
+            for source in sources_to_use:
+                if source == "coding_profiles":
+                    sections.extend(["leetcode", "github", "codeforces"])
+                else:
+                    sections.append(source)
+            context_str = build_context(student_profile, "qa", sections=sections)
+        from prompts import QA_PROMPT
+        record_prompt("qa", QA_PROMPT.format(context=context_str, question=query), context_str)
+
+        chain = QA_PROMPT | llm_registry.route("qa")[0]
+        started_at = time.perf_counter()
         result = chain.invoke({"context": context_str, "question": query})
+        answer = _content_text(result.content)
+        self.answer_cache.store(enrollment_no, profile_fp, query, answer, time.perf_counter() - started_at)
         
         print("   ✅ Response generated\n")
-        return result.content
+        return answer
 
     def get_all_students_summary(self) -> list:
         """Returns a summary list of all students."""
@@ -0,0 +1,134 @@
+import copy
+import fcntl
+import json
+import os
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES_PER_STUDENT = 5
+
+
+def fingerprint(obj) -> str:
+    """Stable SHA-256 of any JSON-serialisable object (key order independent)."""
+    canonical = json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ReportCache:
+    """
+    Persistent cache of generated structured reports.
+
+    Entries are keyed by a hash of the student profile, the report prompt
+    template and the model settings, so any change to the student's data, the
+    prompt or the model produces a miss and a fresh report.
+
+    Several gunicorn workers and the batch runner share the file: writers
+    hold an exclusive flock while they read, modify and replace it, and the
+    file is replaced atomically, so readers never see a partial write. The
+    parsed file is kept until it changes on disk.
+    """
+
+    def __init__(self, cache_file='report_cache.json'):
+        self.cache_file = os.path.join(os.path.dirname(__file__), cache_file)
+        self._lock = threading.Lock()
+        self._loaded = (None, {})  # (file signature, parsed contents)
+        self.hits = 0
+        self.misses = 0
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared by every process that writes the cache file."""
+        with open(self.cache_file + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.cache_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _load_cache(self):
+        """The file's contents; parsed again only when the file has changed. Do not mutate."""
+        signature = self._file_signature()
+        if signature is None:
+            return {}
+        if self._loaded[0] != signature:
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                data = {}
+            self._loaded = (signature, data if isinstance(data, dict) else {})
+        return self._loaded[1]
+
+    def _save_cache(self, cache):
+        # Private temp file per process, swapped in atomically
+        tmp = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp, self.cache_file)
+        self._loaded = (self._file_signature(), cache)
+
+    @staticmethod
+    def make_key(student_profile, prompt_template, model_settings):
+        return fingerprint({
+            'profile': fingerprint(student_profile),
+            'prompt': hashlib.sha256(prompt_template.encode('utf-8')).hexdigest(),
+            'model': model_settings,
+        })
+
+    def get(self, enrollment_no, cache_key):
+        with self._lock:
+            entries = self._load_cache().get(str(enrollment_no), [])
+            for entry in entries:
+                if entry.get('key') == cache_key:
+                    self.hits += 1
+                    # Callers may modify the report; the parsed file is shared
+                    return copy.deepcopy(entry['report'])
+            self.misses += 1
+            return None
+
+    def put(self, enrollment_no, cache_key, report_data):
+        enrollment_no = str(enrollment_no)
+        with self._lock, self._file_lock():
+            cache = dict(self._load_cache())
+            entries = [e for e in cache.get(enrollment_no, []) if e.get('key') != cache_key]
+            entries.insert(0, {
+                'key': cache_key,
+                'created_at': datetime.now().isoformat(),
+                'report': copy.deepcopy(report_data)
+            })
+            # Older keys belong to stale profiles/prompts; keep only a few
+            cache[enrollment_no] = entries[:MAX_ENTRIES_PER_STUDENT]
+            self._save_cache(cache)
+
+    def invalidate(self, enrollment_no=None):
+        with self._lock, self._file_lock():
+            cache = dict(self._load_cache())
+            if enrollment_no is None:
+                cache = {}
+            else:
+                cache.pop(str(enrollment_no), None)
+            self._save_cache(cache)
+
+    def get_stats(self):
+        with self._lock:
+            cache = self._load_cache()
+        lookups = self.hits + self.misses
+        return {
+            'students': len(cache),
+            'entries': sum(len(entries) for entries in cache.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
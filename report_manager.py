@@ -1,6 +1,7 @@
 import json
 import os
 import uuid
+import threading
 from datetime import datetime
 import logging
 
@@ -9,6 +10,8 @@ logger = logging.getLogger(__name__)
 class ReportManager:
     def __init__(self, history_file='saved_reports.json'):
         self.history_file = os.path.join(os.path.dirname(__file__), history_file)
+        # save_report is a read-modify-write of the whole file
+        self._lock = threading.Lock()
         self._ensure_file_exists()
 
     def _ensure_file_exists(self):
@@ -38,29 +41,30 @@ class ReportManager:
         return reports
 
     def save_report(self, enrollment_no, report_data):
-        history = self._load_history()
-        enrollment_no = str(enrollment_no)
+        with self._lock:
+            history = self._load_history()
+            enrollment_no = str(enrollment_no)
         
-        if enrollment_no not in history:
-            history[enrollment_no] = []
+            if enrollment_no not in history:
+                history[enrollment_no] = []
 
-        report_id = str(uuid.uuid4())
-        timestamp = datetime.now().isoformat()
+            report_id = str(uuid.uuid4())
+            timestamp = datetime.now().isoformat()
 
-        # Create a summary title (e.g., "Report - Dec 03, 2025")
-        date_str = datetime.now().strftime("%b %d, %Y")
-        title = f"Report - {date_str}"
+            # Create a summary title (e.g., "Report - Dec 03, 2025")
+            date_str = datetime.now().strftime("%b %d, %Y")
+            title = f"Report - {date_str}"
 
-        new_report = {
-            'id': report_id,
-            'title': title,
-            'timestamp': timestamp,
-            'data': report_data
-        }
+            new_report = {
+                'id': report_id,
+                'title': title,
+                'timestamp': timestamp,
+                'data': report_data
+            }
 
-        history[enrollment_no].append(new_report)
-        self._save_history(history)
-        return new_report
+            history[enrollment_no].append(new_report)
+            self._save_history(history)
+            return new_report
 
     def get_report(self, enrollment_no, report_id):
         history = self._load_history()
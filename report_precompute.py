@@ -0,0 +1,187 @@
+# report_precompute.py - Report fields computed from the data instead of the LLM
+#
+# Several report fields are facts we already hold: the semester SGPA series,
+# the resume's key skills, links and missing elements (agg.clean_resume_data)
+# and the scores derived from the academic and coding profiles (with
+# dashboard_analyzer's per-profile analyses). The LLM used to write them
+# too, which cost output tokens and let it invent numbers. precompute()
+# derives them once per report; the prompt shows them to the LLM as facts
+# it must use but not repeat, and apply() writes them into the final report
+# over anything the model produced.
+
+import logging
+
+from dashboard_analyzer import (
+    _analyze_academics, _analyze_github, _analyze_leetcode, _calculate_profile_completeness,
+    _determine_student_archetype, _extract_skills,
+)
+
+logger = logging.getLogger(__name__)
+
+# detailed_scores parameters whose 1-10 score comes from the dashboard. The
+# prompt asks for them by these exact names; apply() matches on the name only,
+# so other parameters (e.g. "Academic Projects") keep the model's score.
+ACADEMIC_PARAMETER = "Academic Excellence & Consistency"
+DSA_PARAMETER = "Data Structures & Algorithms Mastery"
+FIXED_SCORE_PARAMETERS = (ACADEMIC_PARAMETER, DSA_PARAMETER)
+
+
+# Codeforces rating -> 1-10 DSA score, by rank band (newbie, pupil,
+# specialist, expert, candidate master, master and above)
+CODEFORCES_SCORE_BANDS = ((2100, 10), (1900, 9), (1600, 8), (1400, 6), (1200, 5), (1000, 3), (0, 2))
+
+
+def _score_1_to_10(value):
+    return max(1, min(10, round(value)))
+
+
+def _guarded(enrollment_no, label, fn, *args):
+    """fn(*args), or None (logged) if it fails."""
+    try:
+        return fn(*args)
+    except Exception as e:
+        logger.warning(f"{label} unavailable for {enrollment_no}: {e}")
+        return None
+
+
+def _dsa_score(leetcode, codeforces):
+    """
+    (score, notes) for the DSA parameter from the stronger of the LeetCode and
+    Codeforces signals, or None if the student has neither.
+    """
+    candidates, evidence = [], []
+    if leetcode and leetcode.get("rating") != "Not Available":
+        candidates.append(leetcode.get("score", 0))
+        evidence.append(f"LeetCode profile rated {leetcode.get('rating')} "
+                        f"with {leetcode.get('total_solved')} problems solved")
+    rating = codeforces.get("rating")
+    if isinstance(rating, (int, float)):
+        candidates.append(next(score for floor, score in CODEFORCES_SCORE_BANDS if rating >= floor))
+        evidence.append(f"Codeforces rating {rating} ({codeforces.get('rank') or 'unrated'})")
+    if not candidates:
+        return None
+    return _score_1_to_10(max(candidates)), {
+        "justification": "; ".join(evidence) + ".",
+        "improvement_potential": "Regular practice on medium and hard problems and rated contests will raise this score.",
+    }
+
+
+def build_cgpa_trend(student_profile: dict):
+    """Semester-wise SGPA series for the report chart, or None."""
+    semester_performance = (student_profile.get("academic_profile") or {}).get("semester_performance") or []
+    if not semester_performance:
+        return None
+    try:
+        return {
+            "labels": [f"Sem {sem['semester']}" for sem in semester_performance],
+            "values": [sem['sgpa'] for sem in semester_performance],
+        }
+    except (KeyError, TypeError) as e:
+        logger.warning(f"CGPA trend extraction failed: {e}")
+        return None
+
+
+def precompute(enrollment_no: str, student_profile: dict) -> dict:
+    """
+    Returns {"fields": report fields to set, "scores": {parameter: 1-10 score},
+    "score_notes": {parameter: justification and improvement_potential used
+    if the model omits that metric}, "facts": the values the LLM should build
+    its narrative on}.
+    """
+    resume = student_profile.get("resume") or {}
+    fields = {
+        "enrollment_no": enrollment_no,
+        "name": student_profile.get("name") or "",
+        "cgpa_trend": build_cgpa_trend(student_profile),
+        "resume_analysis": {
+            "key_skills": list(resume.get("key_skills") or []),
+            "professional_links": list(resume.get("professional_links") or []),
+            "missing_elements": list(resume.get("missing_elements") or []),
+        },
+    }
+
+    # Each value is computed on its own, so a broken or missing profile only
+    # costs the values derived from it
+    scores, score_notes, facts = {}, {}, {}
+    academic_profile = student_profile.get("academic_profile") or {}
+    coding_profiles = student_profile.get("coding_profiles") or {}
+
+    academics = _guarded(enrollment_no, "Academic analysis", _analyze_academics, academic_profile) or {}
+    cgpa = academic_profile.get("overall_cgpa")
+    if isinstance(cgpa, (int, float)) and cgpa > 0:
+        facts["cgpa"] = cgpa
+        scores[ACADEMIC_PARAMETER] = _score_1_to_10(cgpa)
+        details = ", ".join(f"{label} {academics[key]}" for key, label in (("rating", "rated"), ("trajectory", "trajectory"))
+                            if academics.get(key))
+        score_notes[ACADEMIC_PARAMETER] = {
+            "justification": f"CGPA of {cgpa}" + (f" ({details})." if details else "."),
+            "improvement_potential": "Consistent results in the remaining semesters will raise this score.",
+        }
+    if academics:
+        facts["academic_rating"] = academics.get("rating")
+        facts["academic_trajectory"] = academics.get("trajectory")
+
+    leetcode = _guarded(enrollment_no, "LeetCode analysis", _analyze_leetcode, coding_profiles.get("leetcode") or {})
+    if leetcode and leetcode.get("rating") != "Not Available":
+        facts["leetcode_rating"] = leetcode.get("rating")
+        facts["leetcode_total_solved"] = leetcode.get("total_solved")
+    codeforces = coding_profiles.get("codeforces") or {}
+    if isinstance(codeforces.get("rating"), (int, float)):
+        facts["codeforces_rating"] = codeforces["rating"]
+        facts["codeforces_rank"] = codeforces.get("rank")
+    dsa = _dsa_score(leetcode, codeforces)
+    if dsa:
+        scores[DSA_PARAMETER], score_notes[DSA_PARAMETER] = dsa
+
+    github = _guarded(enrollment_no, "GitHub analysis", _analyze_github, coding_profiles.get("github") or {})
+    if github and github.get("rating") != "Not Available":
+        facts["github_rating"] = github.get("rating")
+        facts["github_activity"] = github.get("activity_level")
+
+    skills = _guarded(enrollment_no, "Skill extraction", _extract_skills, student_profile)
+    if skills is not None:
+        archetype = _guarded(enrollment_no, "Archetype", _determine_student_archetype,
+                             list(skills), leetcode or {}, github or {})
+        if archetype:
+            facts["student_archetype"] = archetype
+    completeness = _guarded(enrollment_no, "Profile completeness", _calculate_profile_completeness, student_profile)
+    if completeness:
+        facts["profile_completeness_percent"] = completeness.get("score_percentage")
+
+    facts.update({
+        "fixed_scores": scores,
+        "sgpa_by_semester": (fields["cgpa_trend"] or {}).get("values"),
+        "resume_key_skills": fields["resume_analysis"]["key_skills"],
+        "resume_professional_links": fields["resume_analysis"]["professional_links"],
+        "resume_missing_elements": fields["resume_analysis"]["missing_elements"],
+    })
+    return {"fields": fields, "scores": scores, "score_notes": score_notes, "facts": facts}
+
+
+def apply(report: dict, precomputed: dict) -> dict:
+    """
+    Writes the computed fields and scores into a report, over the model's
+    values. A fixed-score metric the model left out (or a placeholder empty
+    detailed_scores) gets appended with a justification from the dashboard.
+    """
+    fields = precomputed["fields"]
+    for name, value in fields.items():
+        if name == "resume_analysis" and isinstance(report.get(name), dict):
+            report[name] = dict(report[name], **value)
+        else:
+            report[name] = value
+
+    if not precomputed["scores"]:
+        return report
+    if not isinstance(report.get("detailed_scores"), list):
+        report["detailed_scores"] = []
+    metrics = report["detailed_scores"]
+    for parameter, score in precomputed["scores"].items():
+        matched = False
+        for metric in metrics:
+            if isinstance(metric, dict) and str(metric.get("parameter", "")).strip().lower() == parameter.lower():
+                metric["score"] = score
+                matched = True
+        if not matched:
+            metrics.append({"parameter": parameter, "score": score, **precomputed["score_notes"][parameter]})
+    return report
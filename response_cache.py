@@ -0,0 +1,148 @@
+# response_cache.py - In-process cache for upstream profile lookups
+#
+# Entries are fresh for a per-source TTL. After that they are served "stale"
+# for up to STALE_WINDOW seconds while a background thread refreshes them, so
+# repeat views never wait on the upstream services. Past the stale window the
+# next caller fetches synchronously.
+
+import threading
+import time
+import logging
+from collections import OrderedDict, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached profile is considered fresh, per source
+DEFAULT_TTLS = {
+    'leetcode': 10 * 60,
+    'github': 15 * 60,
+    'codeforces': 10 * 60,
+    'ipu': 6 * 60 * 60,  # results only change once a semester
+}
+FALLBACK_TTL = 10 * 60
+STALE_WINDOW = 60 * 60
+MAX_ENTRIES = 500
+
+# Values returned alongside cached data, also used for the X-Cache header
+HIT, STALE, MISS, BYPASS = 'HIT', 'STALE', 'MISS', 'BYPASS'
+
+
+class ResponseCache:
+    def __init__(self, ttls=None, stale_window=STALE_WINDOW, max_entries=MAX_ENTRIES):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.stale_window = stale_window
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (source, key) -> (value, stored_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: defaultdict(int))
+
+    def _ttl(self, source):
+        return self.ttls.get(source, FALLBACK_TTL)
+
+    def _count(self, source, name):
+        # Called from request threads and refresh threads alike
+        with self._lock:
+            self._stats[source][name] += 1
+
+    def _store(self, cache_key, value):
+        with self._lock:
+            self._entries[cache_key] = (value, time.time())
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _refresh_in_background(self, source, cache_key, fetch_fn, should_cache):
+        with self._lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+
+        def refresh():
+            try:
+                value = fetch_fn()
+                if should_cache(value):
+                    self._store(cache_key, value)
+                    self._count(source, 'refreshes')
+                else:
+                    self._count(source, 'refresh_errors')
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {cache_key}: {e}")
+                self._count(source, 'refresh_errors')
+            finally:
+                with self._lock:
+                    self._refreshing.discard(cache_key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def get_or_fetch(self, source, key, fetch_fn, bypass=False, should_cache=lambda value: True):
+        """
+        Returns (value, cache_status) for a source/key pair.
+
+        fetch_fn is called when there is no usable entry or when bypass is set;
+        its result is only stored if should_cache(result) is true, so failed
+        upstream lookups are never cached. Exceptions from fetch_fn propagate.
+        """
+        cache_key = (source, str(key).strip().lower())
+        now = time.time()
+
+        if not bypass:
+            with self._lock:
+                entry = self._entries.get(cache_key)
+                if entry:
+                    self._entries.move_to_end(cache_key)
+            if entry:
+                value, stored_at = entry
+                age = now - stored_at
+                if age < self._ttl(source):
+                    self._count(source, 'hits')
+                    return value, HIT
+                if age < self._ttl(source) + self.stale_window:
+                    self._count(source, 'stale_hits')
+                    self._refresh_in_background(source, cache_key, fetch_fn, should_cache)
+                    return value, STALE
+
+        self._count(source, 'bypasses' if bypass else 'misses')
+        value = fetch_fn()
+        if should_cache(value):
+            self._store(cache_key, value)
+        return value, BYPASS if bypass else MISS
+
+    def invalidate(self, source=None, key=None):
+        """Drops one entry, every entry of a source, or everything."""
+        with self._lock:
+            if source is None:
+                self._entries.clear()
+                return
+            for cache_key in list(self._entries):
+                if cache_key[0] == source and (key is None or cache_key[1] == str(key).strip().lower()):
+                    del self._entries[cache_key]
+
+    def get_stats(self):
+        with self._lock:
+            entry_counts = defaultdict(int)
+            for source, _ in self._entries:
+                entry_counts[source] += 1
+            all_stats = {source: dict(stats) for source, stats in self._stats.items()}
+        sources = {}
+        for source in set(all_stats) | set(entry_counts):
+            stats = defaultdict(int, all_stats.get(source, {}))
+            served = stats['hits'] + stats['stale_hits']
+            lookups = served + stats['misses']
+            sources[source] = {
+                'ttl_seconds': self._ttl(source),
+                'entries': entry_counts[source],
+                'hits': stats['hits'],
+                'stale_hits': stats['stale_hits'],
+                'misses': stats['misses'],
+                'bypasses': stats['bypasses'],
+                'refreshes': stats['refreshes'],
+                'refresh_errors': stats['refresh_errors'],
+                'hit_rate': round(served / lookups, 4) if lookups else 0.0,
+            }
+        return {
+            'total_entries': sum(entry_counts.values()),
+            'max_entries': self.max_entries,
+            'stale_window_seconds': self.stale_window,
+            'sources': sources,
+        }
@@ -0,0 +1,164 @@
+# retriever.py - Hybrid (vector + BM25) retrieval over the student vector store
+#
+# QA prompts used to carry whole profile sections. ProfileRetriever instead
+# ranks the chunks stored by ingest_data.py for one student by a blend of
+# embedding similarity and BM25 keyword score, and returns only the best
+# chunks that fit the QA context budget. If the query cannot be embedded,
+# chunks are ranked by BM25 alone.
+
+import math
+import os
+import re
+import threading
+import time
+import logging
+from collections import Counter
+
+import numpy as np
+
+import llm_registry
+from context_builder import CONTEXT_BUDGETS, CHARS_PER_TOKEN, estimate_tokens
+from vector_index import NumpyVectorIndex
+from vector_store_config import DB_PATH, MANIFEST_FILE
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 6
+VECTOR_WEIGHT = 0.6  # the remainder goes to BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Seconds before a missing store or a failed load is tried again
+RETRY_COOLDOWN = 60
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def bm25_scores(query_tokens: list, documents: list) -> np.ndarray:
+    """Okapi BM25 of one query against a small list of tokenized documents."""
+    if not documents:
+        return np.zeros(0, dtype=np.float32)
+    doc_freq = Counter(token for doc in documents for token in set(doc))
+    avg_len = sum(len(doc) for doc in documents) / len(documents) or 1.0
+    n_docs = len(documents)
+
+    scores = np.zeros(n_docs, dtype=np.float32)
+    for i, doc in enumerate(documents):
+        counts = Counter(doc)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / avg_len)
+        for token in set(query_tokens):
+            tf = counts.get(token)
+            if not tf:
+                continue
+            idf = math.log(1 + (n_docs - doc_freq[token] + 0.5) / (doc_freq[token] + 0.5))
+            scores[i] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+    return scores
+
+
+def _min_max(values: np.ndarray) -> np.ndarray:
+    if values.size == 0:
+        return values
+    spread = values.max() - values.min()
+    if spread <= 0:
+        return np.ones_like(values) if values.max() > 0 else np.zeros_like(values)
+    return (values - values.min()) / spread
+
+
+class ProfileRetriever:
+    """
+    Loads the NumPy vector store lazily on first use. If the store or its
+    dependencies are unavailable, available() is False and callers fall back
+    to the compact profile context; the load is retried after RETRY_COOLDOWN
+    seconds, so a store built while the app runs is picked up.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self._db = None
+        self._manifest_mtime = None
+        self._retry_at = 0.0          # monotonic time of the next store load attempt
+        self._lock = threading.Lock()
+
+    def _manifest_changed(self, db_path, manifest_file):
+        try:
+            mtime = os.path.getmtime(os.path.join(db_path, manifest_file))
+        except OSError:
+            return False
+        return self._manifest_mtime is not None and mtime != self._manifest_mtime
+
+    def _get_db(self):
+        with self._lock:
+            if self._db is None and time.monotonic() < self._retry_at:
+                return None
+            try:
+                db_path = self.db_path or os.path.join(os.path.dirname(__file__), DB_PATH)
+                # ingest_data.py updates the store in place; pick up its changes
+                if self._db is not None and not self._manifest_changed(db_path, MANIFEST_FILE):
+                    return self._db
+                if not NumpyVectorIndex.exists(db_path):
+                    logger.info(f"No vector store at {db_path}; run ingest_data.py to enable retrieval QA")
+                    self._retry_at = time.monotonic() + RETRY_COOLDOWN
+                    return None
+                manifest_path = os.path.join(db_path, MANIFEST_FILE)
+                self._manifest_mtime = os.path.getmtime(manifest_path) if os.path.exists(manifest_path) else 0
+                self._db = NumpyVectorIndex.load(db_path)
+                logger.info(f"Loaded vector store with {len(self._db)} chunks")
+            except Exception as e:
+                logger.error(f"Vector store unavailable, retrying in {RETRY_COOLDOWN}s: {e}")
+                self._retry_at = time.monotonic() + RETRY_COOLDOWN
+            return self._db
+
+    def _embed_query(self, question):
+        """Query embedding, or None if the model cannot be loaded or fails."""
+        try:
+            return llm_registry.get_embeddings().embed_query(question)
+        except Exception as e:
+            logger.warning(f"Query embedding failed, ranking by keywords only: {e}")
+            return None
+
+    def available(self) -> bool:
+        return self._get_db() is not None
+
+    def retrieve(self, enrollment_no: str, question: str, k: int = TOP_K) -> list:
+        """Returns up to k (document, score) pairs for the student, best first."""
+        db = self._get_db()
+        if db is None:
+            return []
+
+        where = {"enrollment_no": str(enrollment_no)}
+        query_embedding = self._embed_query(question)
+        if query_embedding is None:
+            documents = db.documents(where)
+        else:
+            # Cosine similarity against every chunk of this student in one product
+            documents, vector = db.score([query_embedding], where=where)
+        if not documents:
+            return []
+
+        keyword = _min_max(bm25_scores(tokenize(question), [tokenize(doc.page_content) for doc in documents]))
+        if query_embedding is None:
+            combined = keyword
+        else:
+            combined = VECTOR_WEIGHT * _min_max(vector[0]) + (1 - VECTOR_WEIGHT) * keyword
+
+        order = np.argsort(-combined, kind='stable')[:k]
+        return [(documents[i], float(combined[i])) for i in order]
+
+    def build_context(self, enrollment_no: str, question: str, k: int = TOP_K, budget=None) -> str:
+        """Concatenates the top chunks, best first, within the QA token budget."""
+        budget = budget or CONTEXT_BUDGETS['qa']
+        parts, used = [], 0
+        for doc, score in self.retrieve(enrollment_no, question, k):
+            part = f"[{doc.metadata.get('data_source', 'profile')}] {doc.page_content}"
+            tokens = estimate_tokens(part)
+            if parts and used + tokens > budget:
+                break
+            if not parts and tokens > budget:
+                part = part[:budget * CHARS_PER_TOKEN]
+                tokens = budget
+            parts.append(part)
+            used += tokens
+        return "\n\n".join(parts)
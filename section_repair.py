@@ -0,0 +1,111 @@
+# section_repair.py - Salvage valid sections of LLM JSON and re-request the rest
+#
+# A report that is 95% valid JSON used to be thrown away whole: the parser
+# failed, and either canned defaults were shown or the user paid for the
+# full generation again. Instead every top-level section is parsed on its
+# own (json_stream), validated against its pydantic model, and only the
+# sections that are missing or invalid are asked for again with a small
+# prompt that names just those sections and their schema.
+
+import json
+import typing
+import logging
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from json_stream import parse_members
+
+logger = logging.getLogger(__name__)
+
+REPAIR_ATTEMPTS = 2
+
+
+def section_validators(model) -> dict:
+    """Validator per top-level field of a pydantic model: {name: (TypeAdapter, annotation, description)}."""
+    return {
+        name: (TypeAdapter(field.annotation), field.annotation, field.description or "")
+        for name, field in model.model_fields.items()
+    }
+
+
+def validate_sections(members: dict, invalid_members: dict, validators: dict):
+    """
+    Validates parsed members section by section. Returns (valid, problems):
+    valid sections normalised to plain JSON values, and {name: reason} for
+    every expected section that is missing, unparseable or fails validation.
+    Members with no validator are kept as they are.
+    """
+    valid, problems = {}, {}
+    for name, value in members.items():
+        if name not in validators:
+            valid[name] = value
+            continue
+        adapter = validators[name][0]
+        try:
+            valid[name] = adapter.dump_python(adapter.validate_python(value), mode='json')
+        except ValidationError as e:
+            problems[name] = f"invalid: {e.errors()[0]['msg']} at {'.'.join(str(p) for p in e.errors()[0]['loc'])}"
+    for name in validators:
+        if name in valid or name in problems:
+            continue
+        problems[name] = "not valid JSON" if name in invalid_members else "missing"
+    return valid, problems
+
+
+def salvage(text: str, validators: dict):
+    """parse_members + validate_sections for a complete (or truncated) response."""
+    members, invalid_members = parse_members(text)
+    return validate_sections(members, invalid_members, validators)
+
+
+def _type_hint(annotation, description=""):
+    """Compact JSON skeleton of a type, with field descriptions as placeholders."""
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is typing.Union:
+        non_null = [a for a in args if a is not type(None)]
+        return _type_hint(non_null[0], description) if non_null else None
+    if origin in (list, typing.List):
+        return [_type_hint(args[0]) if args else "<value>"]
+    if origin in (dict, typing.Dict):
+        return {"<key>": _type_hint(args[1]) if len(args) == 2 else "<value>"}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {name: _type_hint(field.annotation, field.description or "")
+                for name, field in annotation.model_fields.items()}
+    kind = {int: "integer", float: "number", bool: "boolean"}.get(annotation, "string")
+    return f"<{kind}: {description}>" if description else f"<{kind}>"
+
+
+def schema_hints(names, validators) -> str:
+    """JSON skeleton of just the named sections, for a repair prompt."""
+    skeleton = {}
+    for name in names:
+        _, annotation, description = validators[name]
+        skeleton[name] = _type_hint(annotation, description)
+    return json.dumps(skeleton, indent=2)
+
+
+def rerequest(valid: dict, problems: dict, validators: dict, request_fn, attempts=REPAIR_ATTEMPTS):
+    """
+    Asks for the problem sections again until they validate or `attempts` run
+    out. `request_fn(problems)` must return the raw LLM text of a JSON object
+    holding just those sections. Returns the updated (valid, problems).
+    """
+    valid, problems = dict(valid), dict(problems)
+    for attempt in range(1, attempts + 1):
+        if not problems:
+            break
+        logger.info(f"Re-requesting {len(problems)} section(s) (attempt {attempt}): {', '.join(problems)}")
+        try:
+            text = request_fn(problems)
+        except Exception as e:
+            logger.error(f"Section repair request failed: {e}")
+            break
+        repaired, still_bad = salvage(text, {name: validators[name] for name in problems})
+        for name in problems:
+            if name in repaired:
+                valid[name] = repaired[name]
+        problems = {name: still_bad[name] for name in problems if name in still_bad}
+    if problems:
+        logger.warning(f"Sections still missing or invalid after repair: {', '.join(problems)}")
+    return valid, problems
@@ -0,0 +1,107 @@
+# single_flight.py - Coalesce concurrent identical LLM and search calls
+#
+# A double-clicked "Generate report", or two mentors opening the same
+# student, used to start two identical report runs. Calls are keyed by
+# (operation, enrollment, hash of the inputs): the first caller executes,
+# and callers that arrive while it is still running wait for it and get the
+# same result (or exception) instead of running again.
+
+import copy
+import threading
+import logging
+from collections import defaultdict
+
+from report_cache import fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class Flight:
+    """One in-progress execution. The leader resolves or fails it; followers wait()."""
+
+    def __init__(self, single_flight, key):
+        self._single_flight = single_flight
+        self.key = key
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def resolve(self, result):
+        # Snapshot, so the leader's caller can't change what followers receive
+        self._result = copy.deepcopy(result)
+        self._single_flight._finish(self)
+
+    def fail(self, error: BaseException):
+        self._error = error
+        self._single_flight._finish(self)
+
+    def wait(self, timeout=None):
+        """The leader's result (a copy, so callers can't affect each other), or its exception."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Timed out waiting for in-flight {self.key[0]}")
+        if self._error is not None:
+            raise self._error
+        return copy.deepcopy(self._result)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._stats = defaultdict(lambda: defaultdict(int))
+
+    def join(self, operation, enrollment_no, inputs):
+        """
+        Returns (flight, is_leader). The leader must execute the call and then
+        resolve() or fail() the flight; everyone else calls flight.wait().
+        """
+        key = (operation, str(enrollment_no or ''), fingerprint(inputs))
+        with self._lock:
+            stats = self._stats[operation]
+            stats['calls'] += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                stats['coalesced'] += 1
+                return flight, False
+            flight = self._flights[key] = Flight(self, key)
+            stats['executions'] += 1
+            return flight, True
+
+    def _finish(self, flight):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+        flight._done.set()
+
+    def do(self, operation, enrollment_no, inputs, fn):
+        """Runs fn() unless an identical call is in flight, in which case its result is shared."""
+        flight, is_leader = self.join(operation, enrollment_no, inputs)
+        if not is_leader:
+            logger.info(f"Coalesced {operation} call for '{enrollment_no}' with one already running")
+            return flight.wait()
+        try:
+            result = fn()
+        except BaseException as e:
+            flight.fail(e)
+            raise
+        flight.resolve(result)
+        return result
+
+    def get_stats(self):
+        with self._lock:
+            in_flight = defaultdict(int)
+            for operation, _, _ in self._flights:
+                in_flight[operation] += 1
+            return {
+                operation: {
+                    'calls': stats['calls'],
+                    'executions': stats['executions'],
+                    'coalesced': stats['coalesced'],
+                    'coalesced_rate': round(stats['coalesced'] / stats['calls'], 4) if stats['calls'] else 0.0,
+                    'in_flight': in_flight[operation],
+                }
+                for operation, stats in self._stats.items()
+            }
+
+
+single_flight = SingleFlight()
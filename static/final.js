@@ -10,6 +10,39 @@ function convertMarkdownToHTML(text) {
     return htmlText;
 }
 
+// --- Background jobs ---
+// Long LLM calls are queued on the server (?async=1); submitJob() returns the
+// job id and waitForJob() polls it until it finishes, passing progress along.
+const JOB_POLL_INTERVAL_MS = 1500;
+
+async function submitJob(url, options = {}) {
+    const separator = url.includes('?') ? '&' : '?';
+    const response = await fetch(`${url}${separator}async=1`, options);
+    const data = await response.json();
+    if (!response.ok || !data.job_id) {
+        throw new Error(data.error || `HTTP error! status: ${response.status}`);
+    }
+    return data.job_id;
+}
+
+async function waitForJob(jobId, onProgress) {
+    let lastVersion = null;
+    while (true) {
+        const response = await fetch(`/api/jobs/${jobId}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const job = await response.json();
+        if (job.status === 'succeeded') return job.result;
+        if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+        if (onProgress && job.version !== lastVersion) {
+            lastVersion = job.version;
+            onProgress(job.progress || {}, job);
+        }
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+}
+
 document.addEventListener('DOMContentLoaded', () => {
     const studentSelector = document.getElementById('student-selector');
     const generateReportBtn = document.getElementById('generate-report-btn');
@@ -236,6 +269,43 @@ document.addEventListener('DOMContentLoaded', () => {
             });
     }
 
+    // --- Report generation ---
+    // Runs the report as a background job. Sections appear in the job's
+    // progress as the server finishes them, so each poll paints what is
+    // ready; the spinner only covers the wait for the first section.
+    function generateReport(enrollmentNo) {
+        const spinnerText = loadingSpinner.querySelector('p');
+        const defaultSpinnerText = spinnerText ? spinnerText.textContent : '';
+        let rendered = false;
+
+        const finish = () => {
+            loadingSpinner.classList.add('hidden');
+            if (spinnerText) spinnerText.textContent = defaultSpinnerText;
+        };
+
+        submitJob(`/api/report/${enrollmentNo}`)
+            .then(jobId => waitForJob(jobId, progress => {
+                if (progress.section && spinnerText) {
+                    spinnerText.textContent = `Writing ${progress.section.replace(/_/g, ' ')}...`;
+                }
+                if (progress.report && Object.keys(progress.report).length > 0) {
+                    rendered = true;
+                    loadingSpinner.classList.add('hidden');
+                    displayNewReport(progress.report);
+                }
+            }))
+            .then(report => {
+                finish();
+                displayNewReport(report);
+            })
+            .catch(error => {
+                finish();
+                console.error('Report generation error:', error);
+                const suffix = rendered ? ' Showing the sections received so far.' : '';
+                alert(`Error generating report: ${error.message}${suffix}`);
+            });
+    }
+
     // --- Handle "Generate Report" button click ---
     generateReportBtn.addEventListener('click', () => {
         const enrollmentNo = studentSelector.value;
@@ -244,26 +314,7 @@ document.addEventListener('DOMContentLoaded', () => {
         loadingSpinner.classList.remove('hidden');
         document.querySelector('.nav-link[href="#reports"]').click();
 
-        fetch(`/api/report/${enrollmentNo}`)
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
-                return response.json();
-            })
-            .then(report => {
-                loadingSpinner.classList.add('hidden');
-                if (report.error) {
-                    alert(`Error generating report: ${report.error}`);
-                } else {
-                    displayNewReport(report);
-                }
-            })
-            .catch(error => {
-                loadingSpinner.classList.add('hidden');
-                console.error('Report generation error:', error);
-                alert(`An unexpected error occurred: ${error.message}`);
-            });
+        generateReport(enrollmentNo);
         if (enrollmentNo) {
             // Also load chat history for this student
             loadChatSessions(enrollmentNo);
@@ -300,29 +351,20 @@ document.addEventListener('DOMContentLoaded', () => {
         loadingSpinner.classList.remove('hidden');
         jobAnalysisContainer.classList.add('hidden');
 
-        fetch('/api/job-analysis', {
+        submitJob('/api/job-analysis', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ enrollment_no: enrollmentNo, job_description: jobDescription })
         })
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
-                return response.json();
-            })
-            .then(data => {
+            .then(jobId => waitForJob(jobId))
+            .then(analysis => {
                 loadingSpinner.classList.add('hidden');
-                if (data.error) {
-                    alert(`Error analyzing job application: ${data.error}`);
-                } else {
-                    displayJobAnalysis(data.data);
-                }
+                displayJobAnalysis(analysis);
             })
             .catch(error => {
                 loadingSpinner.classList.add('hidden');
                 console.error('Job analysis error:', error);
-                alert(`An unexpected error occurred: ${error.message}`);
+                alert(`Error analyzing job application: ${error.message}`);
             });
     });
 
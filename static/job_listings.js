@@ -438,7 +438,8 @@ document.addEventListener('DOMContentLoaded', () => {
             generateResumeBtn.disabled = true;
             generateResumeBtn.textContent = 'Generating...';
 
-            fetch('/api/resume/generate', {
+            // submitJob/waitForJob come from final.js
+            submitJob('/api/resume/generate', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
@@ -448,23 +449,18 @@ document.addEventListener('DOMContentLoaded', () => {
                     role: currentJobForApplication.title
                 })
             })
-                .then(response => response.json())
+                .then(jobId => waitForJob(jobId))
                 .then(data => {
                     generateResumeBtn.disabled = false;
                     generateResumeBtn.textContent = 'Generate Best Fit Resume & Apply';
-
-                    if (data.success) {
-                        applyModal.classList.add('hidden');
-                        showResumeModal(data.resume);
-                    } else {
-                        alert(`Error generating resume: ${data.error}`);
-                    }
+                    applyModal.classList.add('hidden');
+                    showResumeModal(data.resume);
                 })
                 .catch(error => {
                     generateResumeBtn.disabled = false;
                     generateResumeBtn.textContent = 'Generate Best Fit Resume & Apply';
                     console.error('Error:', error);
-                    alert('An error occurred while generating the resume.');
+                    alert(`Error generating resume: ${error.message}`);
                 });
         });
     }
@@ -37,16 +37,23 @@ document.addEventListener('DOMContentLoaded', () => {
             if (codeforcesUser) query.append('codeforces', codeforcesUser);
             if (enrollmentNo) query.append('enrollment', enrollmentNo);  // Add enrollment number
             
-            const response = await fetch(`/api/all?${query.toString()}`);
-            const data = await response.json();
-            
-            // Process and render results
-            processResults(data, {
+            const identifiers = {
                 leetcodeUser,
                 githubUser,
                 codeforcesUser,
                 enrollmentNo
-            });
+            };
+            
+            if (window.EventSource) {
+                // Paint each card as soon as its platform responds
+                await streamResults(query, identifiers);
+            } else {
+                const response = await fetch(`/api/all?${query.toString()}`);
+                const data = await response.json();
+                
+                // Process and render results
+                processResults(data, identifiers);
+            }
         } catch (error) {
             showError(resultsContainer, `Error loading profiles: ${error.message || error}`);
         } finally {
@@ -57,6 +64,61 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
     
+    // Renderers keyed by the `source` field of /api/all/stream events
+    const STREAM_RENDERERS = {
+        leetcode: (data, ids) => renderLeetCode(data, ids.leetcodeUser),
+        github: (data, ids) => renderGitHub(data, ids.githubUser),
+        codeforces: (data, ids) => renderCodeforces(data, ids.codeforcesUser),
+        ipu: (data, ids) => renderIPU(data, ids.enrollmentNo)
+    };
+    
+    function streamResults(query, identifiers) {
+        return new Promise((resolve, reject) => {
+            // One slot per requested platform keeps cards in a stable order
+            const slots = {};
+            [
+                ['leetcode', identifiers.leetcodeUser],
+                ['github', identifiers.githubUser],
+                ['codeforces', identifiers.codeforcesUser],
+                ['ipu', identifiers.enrollmentNo]
+            ].forEach(([source, identifier]) => {
+                if (!identifier) return;
+                slots[source] = document.createElement('div');
+                resultsContainer.appendChild(slots[source]);
+            });
+            
+            let hasResults = false;
+            let finished = false;
+            const source = new EventSource(`/api/all/stream?${query.toString()}`);
+            
+            source.addEventListener('profile', (event) => {
+                const payload = JSON.parse(event.data);
+                const slot = slots[payload.source];
+                if (!slot) return;
+                if (payload.success) {
+                    hasResults = true;
+                    slot.appendChild(STREAM_RENDERERS[payload.source](payload.data, identifiers));
+                } else {
+                    showError(slot, `${payload.source}: ${payload.error}`);
+                }
+            });
+            
+            source.addEventListener('done', () => {
+                finished = true;
+                source.close();
+                if (!hasResults) {
+                    showNoResultsMessage("No profile data found for the provided identifiers.");
+                }
+                resolve();
+            });
+            
+            source.onerror = () => {
+                source.close();
+                if (!finished) reject(new Error('Connection to the profile stream was lost'));
+            };
+        });
+    }
+    
     function processResults(data, identifiers) {
         let hasResults = false;
         
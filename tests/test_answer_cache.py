@@ -0,0 +1,98 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from answer_cache import SemanticAnswerCache, question_tokens
+
+ENROLLMENT = "35214811922"
+PROFILE = "profile-fp"
+
+DIFFERENT_MEANING = [
+    ("How many hard problems has he solved?", "How many easy problems has he solved?"),
+    ("Is he good at DP?", "Is he bad at DP?"),
+    ("Is he ready for placements?", "Is he not ready for placements?"),
+    ("Is he ready for placements?", "Isn't he ready for placements?"),
+    ("What should his Google preparation plan be?", "What should his Amazon preparation plan be?"),
+    ("Did he solve 100 problems?", "Did he solve 200 problems?"),
+    ("Is my CGPA improving?", "Is my CGPA declining?"),
+]
+
+PARAPHRASES = [
+    ("What is the CGPA of this student?", "What CGPA does the student have?"),
+    ("What is the CGPA of this student?", "Tell me the CGPA"),
+    ("how is my DSA?", "How is my dsa coming along"),
+    ("What are my weaknesses?", "what are my weakness"),
+]
+
+
+def _same_vector(texts):
+    # Worst case for the guards: every question embeds identically
+    return [[1.0, 0.0, 0.0]] * len(texts)
+
+
+def _distinct_vectors(texts):
+    # Unrelated random directions: near-orthogonal in 256 dimensions
+    return [np.random.default_rng(zlib.crc32(t.encode())).standard_normal(256) for t in texts]
+
+
+def _unavailable(texts):
+    raise RuntimeError("no embedding model")
+
+
+def _cache(tmp_path, embed_fn):
+    return SemanticAnswerCache(cache_file=str(tmp_path / "answer_cache.json"), embed_fn=embed_fn)
+
+
+@pytest.mark.parametrize("stored, asked", DIFFERENT_MEANING)
+def test_different_questions_do_not_share_an_answer(tmp_path, stored, asked):
+    cache = _cache(tmp_path, _same_vector)
+    cache.store(ENROLLMENT, PROFILE, stored, "cached answer", 1.0)
+    answer, _ = cache.lookup(ENROLLMENT, PROFILE, asked)
+    assert answer is None
+
+
+@pytest.mark.parametrize("stored, asked", PARAPHRASES)
+def test_paraphrase_hits_when_embeddings_are_close(tmp_path, stored, asked):
+    cache = _cache(tmp_path, _same_vector)
+    cache.store(ENROLLMENT, PROFILE, stored, "cached answer", 1.0)
+    answer, similarity = cache.lookup(ENROLLMENT, PROFILE, asked)
+    assert answer == "cached answer"
+    assert similarity >= cache.threshold
+
+
+def test_dissimilar_embeddings_miss(tmp_path):
+    cache = _cache(tmp_path, _distinct_vectors)
+    cache.store(ENROLLMENT, PROFILE, "What is the CGPA of this student?", "cached answer", 1.0)
+    answer, similarity = cache.lookup(ENROLLMENT, PROFILE, "Which projects has he built?")
+    assert answer is None
+    assert similarity < cache.threshold
+
+
+def test_without_embeddings_only_the_same_question_hits(tmp_path):
+    cache = _cache(tmp_path, _unavailable)
+    cache.store(ENROLLMENT, PROFILE, "What are my weaknesses?", "cached answer", 1.0)
+    assert cache.lookup(ENROLLMENT, PROFILE, "what are my weakness")[0] == "cached answer"
+    assert cache.lookup(ENROLLMENT, PROFILE, "What are my main weaknesses?")[0] is None
+    assert cache.get_stats()['exact_match_fallbacks'] == 2
+
+
+def test_negations_numbers_and_polarity_are_kept():
+    assert "not" in question_tokens("Isn't he ready?")
+    assert "100" in question_tokens("Did he solve 100 problems?")
+    assert "good" in question_tokens("Is he good at DP?")
+
+
+def test_other_profile_never_hits(tmp_path):
+    cache = _cache(tmp_path, _same_vector)
+    cache.store(ENROLLMENT, PROFILE, "What are my weaknesses?", "cached answer", 1.0)
+    answer, _ = cache.lookup(ENROLLMENT, "other-profile", "What are my weaknesses?")
+    assert answer is None
+
+
+def test_entries_survive_a_restart(tmp_path):
+    cache = _cache(tmp_path, _same_vector)
+    cache.store(ENROLLMENT, PROFILE, "What are my weaknesses?", "cached answer", 1.0)
+    assert not list(tmp_path.glob("*.tmp"))
+    reloaded = _cache(tmp_path, _same_vector)
+    assert reloaded.lookup(ENROLLMENT, PROFILE, "What are my weaknesses?")[0] == "cached answer"
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+import job_lease
+from batch_reports import BatchReportRunner
+
+
+class FakeRAG:
+    def __init__(self, students):
+        self.student_data = {s: {} for s in students}
+        self.generated = []
+
+    def get_cached_report(self, enrollment_no):
+        return None
+
+    def generate_structured_report(self, enrollment_no, force_refresh=False):
+        self.generated.append(enrollment_no)
+        return {'enrollment_no': enrollment_no}
+
+
+class FakeReportManager:
+    def __init__(self):
+        self.saved = []
+
+    def save_report(self, enrollment_no, report):
+        self.saved.append(enrollment_no)
+        return {'id': f"r-{len(self.saved)}"}
+
+
+@pytest.fixture
+def runners(tmp_path):
+    """Two runners over one job store, as in two gunicorn workers."""
+    rag, manager = FakeRAG(['1', '2', '3']), FakeReportManager()
+    return [BatchReportRunner(rag, manager, jobs_dir=str(tmp_path)) for _ in range(2)]
+
+
+def test_run_generates_and_saves_every_report(runners):
+    runner = runners[0]
+    job = runner.create_job(['1', '2', '2', '3'])
+    finished = runner.run(job['id'])
+    assert finished['status'] == 'completed'
+    assert finished['summary']['succeeded'] == 3
+    assert sorted(runner.report_manager.saved) == ['1', '2', '3']
+
+
+def test_job_running_elsewhere_is_not_started_again(runners):
+    first, second = runners
+    job = first.create_job(['1'])
+    first._claim(job['id'])
+    assert second.get_job(job['id'])['status'] == 'running'
+    with pytest.raises(ValueError, match="already running"):
+        second.start(job['id'])
+    with pytest.raises(ValueError, match="already running"):
+        first.run(job['id'])
+
+
+def test_abandoned_job_is_interrupted_and_resumable(runners):
+    first, second = runners
+    job = first.create_job(['1', '2'])
+    claimed = first._claim(job['id'])
+    claimed['results']['1'] = {'status': 'done', 'finished_run': 1}
+    claimed['heartbeat_at'] = time.time() - job_lease.LEASE_SECONDS - 1
+    first._save_job(claimed)
+
+    assert second.get_job(job['id'])['status'] == 'interrupted'
+    resumed = second.run(job['id'])
+    assert resumed['status'] == 'completed'
+    assert resumed['runs'] == 2
+    # Only the student that was not done is generated again
+    assert second.rag_system.generated == ['2']
@@ -0,0 +1,154 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import job_lease
+from job_queue import JobQueue, JobError, MAX_ATTEMPTS
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def store(tmp_path):
+    return str(tmp_path / "jobs")
+
+
+def make_queue(store, handler, workers=1):
+    q = JobQueue(store_dir=store, workers=workers)
+    q.register('echo', handler)
+    return q
+
+
+def write_job(store, **fields):
+    job = {'id': 'j1', 'kind': 'echo', 'status': 'queued', 'created_at': '2026-01-01T00:00:00',
+           'attempts': 0, 'payload': {'n': 1}, 'progress': {}, 'result': None, 'error': None}
+    job.update(fields)
+    os.makedirs(store, exist_ok=True)
+    with open(os.path.join(store, 'j1.json'), 'w', encoding='utf-8') as f:
+        json.dump(job, f)
+    return job
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_job_runs_and_returns_result(store):
+    q = make_queue(store, lambda payload, progress: payload['n'] * 2)
+    q.start()
+    job_id = q.submit('echo', {'n': 21})
+    assert wait_for(lambda: q.get(job_id)['status'] == 'succeeded')
+    assert q.get(job_id)['result'] == 42
+    assert 'payload' not in q.get(job_id)
+
+
+def test_job_error_message_reaches_the_client(store):
+    def fail(payload, progress):
+        raise JobError("No data found")
+    q = make_queue(store, fail)
+    q.start()
+    job_id = q.submit('echo', {})
+    assert wait_for(lambda: q.get(job_id)['status'] == 'failed')
+    assert q.get(job_id)['error'] == "No data found"
+
+
+def test_job_queued_in_two_processes_runs_once(store):
+    runs = []
+
+    def handler(payload, progress):
+        runs.append(payload)
+        time.sleep(0.2)
+
+    first, second = make_queue(store, handler), make_queue(store, handler)
+    first.start()
+    second.start()
+    job_id = first.submit('echo', {'n': 1})
+    second._queue.put(job_id)
+    assert wait_for(lambda: first.get(job_id)['status'] == 'succeeded')
+    time.sleep(0.3)
+    assert len(runs) == 1
+
+
+def test_live_lease_is_left_alone(store):
+    write_job(store, status='running', attempts=1, owner='other-host:1:abc', heartbeat_at=time.time())
+    runs = []
+    q = make_queue(store, lambda payload, progress: runs.append(payload))
+    q.start()
+    time.sleep(0.3)
+    assert runs == []
+    assert q.get('j1')['status'] == 'running'
+
+
+def test_expired_lease_is_reclaimed(store):
+    write_job(store, status='running', attempts=1, owner='other-host:1:abc',
+              heartbeat_at=time.time() - job_lease.LEASE_SECONDS - 1)
+    q = make_queue(store, lambda payload, progress: 'ok')
+    q.start()
+    assert wait_for(lambda: q.get('j1')['status'] == 'succeeded')
+    assert q.get('j1')['attempts'] == 2
+
+
+def test_queued_job_of_dead_process_is_reclaimed(store):
+    # Fresh heartbeat, but the owning process has exited
+    write_job(store, owner=f"{socket.gethostname()}:{dead_pid()}:abc", heartbeat_at=time.time())
+    q = make_queue(store, lambda payload, progress: 'ok')
+    q.start()
+    assert wait_for(lambda: q.get('j1')['status'] == 'succeeded')
+
+
+def test_running_process_reclaims_abandoned_jobs(store):
+    q = make_queue(store, lambda payload, progress: 'ok')
+    q.start()
+    write_job(store, owner=f"{socket.gethostname()}:{dead_pid()}:abc", heartbeat_at=time.time())
+    q._reclaim()
+    assert wait_for(lambda: q.get('j1')['status'] == 'succeeded')
+
+
+def test_interrupted_too_often_fails(store):
+    write_job(store, status='running', attempts=MAX_ATTEMPTS, heartbeat_at=0)
+    q = make_queue(store, lambda payload, progress: 'ok')
+    q.start()
+    job = q.get('j1')
+    assert job['status'] == 'failed'
+    assert 'interrupted' in job['error']
+
+
+def test_progress_writes_are_coalesced_and_copied(store):
+    release = threading.Event()
+
+    def handler(payload, progress):
+        partial = {'sections': []}
+        for i in range(50):
+            partial['sections'].append(i)
+            progress({'report': partial})
+        release.wait(5)
+        return 'ok'
+
+    q = make_queue(store, handler)
+    q.start()
+    job_id = q.submit('echo', {})
+    assert wait_for(lambda: len(q.get(job_id)['progress'].get('report', {}).get('sections', [])) == 50)
+    # Far fewer writes than progress calls
+    assert q.get(job_id)['version'] < 10
+    snapshot = q.get(job_id)
+    snapshot['progress']['report']['sections'].clear()
+    assert len(q.get(job_id)['progress']['report']['sections']) == 50
+    # The store catches up with the coalesced progress
+    assert wait_for(lambda: q._load(job_id)['progress'].get('report', {}).get('sections') == list(range(50)))
+    release.set()
+    assert wait_for(lambda: q.get(job_id)['status'] == 'succeeded')
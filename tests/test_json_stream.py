@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from json_stream import IncrementalJSONObjectParser, loads_tolerant, parse_array_items, parse_members
+
+
+def test_loads_tolerant_accepts_trailing_commas():
+    assert loads_tolerant('{"a": [1, 2,], "b": {"c": 3,},}') == {"a": [1, 2], "b": {"c": 3}}
+
+
+def test_loads_tolerant_accepts_raw_newlines_in_strings():
+    assert loads_tolerant('{"text": "line one\nline two\tend"}') == {"text": "line one\nline two\tend"}
+
+
+def test_loads_tolerant_keeps_commas_inside_strings():
+    assert loads_tolerant('["a,]", "b,}",]') == ["a,]", "b,}"]
+
+
+def test_loads_tolerant_still_rejects_broken_json():
+    with pytest.raises(json.JSONDecodeError):
+        loads_tolerant('{"a": [1, 2}')
+
+
+def test_members_are_returned_as_soon_as_they_close():
+    parser = IncrementalJSONObjectParser()
+    assert parser.feed('```json\n{"summary": "ok", "scores": [1,') == [("summary", "ok")]
+    assert parser.pending_key() == "scores"
+    assert parser.feed(' 2], "done": true}') == [("scores", [1, 2]), ("done", True)]
+    assert parser.finished
+
+
+def test_brackets_and_quotes_inside_strings_do_not_end_a_member():
+    text = '{"a": "has } and ] and \\" inside", "b": {"c": "[not, an, array"}}'
+    members, invalid = parse_members(text)
+    assert members == {"a": 'has } and ] and " inside', "b": {"c": "[not, an, array"}}
+    assert invalid == {}
+
+
+def test_truncated_object_keeps_the_complete_members():
+    members, invalid = parse_members('{"a": 1, "b": {"c": [1, 2], "d": "unfinish')
+    assert members == {"a": 1}
+    assert invalid == {}
+
+
+def test_malformed_member_is_kept_raw_and_others_survive():
+    members, invalid = parse_members('{"a": {"x": 1 "y": 2}, "b": [1,], "c": "ok"}')
+    assert members == {"b": [1], "c": "ok"}
+    assert invalid == {"a": '{"x": 1 "y": 2}'}
+
+
+def test_array_items_with_trailing_comma_and_prose():
+    items, invalid = parse_array_items('Here you go:\n[{"topic": "DP"}, {"topic": "Graphs"},]\nThanks')
+    assert items == [{"topic": "DP"}, {"topic": "Graphs"}]
+    assert invalid == []
+
+
+def test_truncated_array_keeps_complete_items():
+    items, invalid = parse_array_items('[{"topic": "DP"}, {"topic": "Gra')
+    assert items == [{"topic": "DP"}]
+    assert invalid == []
+
+
+def test_malformed_array_item_is_reported():
+    items, invalid = parse_array_items('[{"topic": "DP"}, {"topic" "Graphs"}, "Trees, [and] forests", 3]')
+    assert items == [{"topic": "DP"}, "Trees, [and] forests", 3]
+    assert invalid == ['{"topic" "Graphs"}']
+
+
+def test_no_array_at_all():
+    assert parse_array_items("no json here") == ([], [])
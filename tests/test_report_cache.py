@@ -0,0 +1,56 @@
+import json
+import threading
+
+import pytest
+
+from report_cache import ReportCache
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / "report_cache.json")
+
+
+def test_put_then_get(cache_file):
+    cache = ReportCache(cache_file)
+    assert cache.get("1", "k") is None
+    cache.put("1", "k", {"summary": "ok"})
+    assert cache.get("1", "k") == {"summary": "ok"}
+    assert cache.get("1", "other-key") is None
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_returned_reports_are_copies(cache_file):
+    cache = ReportCache(cache_file)
+    report = {"skills": ["python"]}
+    cache.put("1", "k", report)
+    report["skills"].append("changed by caller")
+    cache.get("1", "k")["skills"].append("changed by reader")
+    assert cache.get("1", "k") == {"skills": ["python"]}
+
+
+def test_instances_sharing_a_file_see_each_others_writes(cache_file):
+    # As two gunicorn workers would
+    first, second = ReportCache(cache_file), ReportCache(cache_file)
+    first.put("1", "k", {"n": 1})
+    second.put("2", "k", {"n": 2})
+    assert first.get("2", "k") == {"n": 2}
+    assert second.get("1", "k") == {"n": 1}
+    second.invalidate("1")
+    assert first.get("1", "k") is None
+
+
+def test_concurrent_writers_lose_nothing(cache_file):
+    caches = [ReportCache(cache_file) for _ in range(4)]
+
+    def write(i):
+        for j in range(10):
+            caches[i].put(f"{i}-{j}", "k", {"n": j})
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with open(cache_file, encoding="utf-8") as f:
+        assert len(json.load(f)) == 40
@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+import report_precompute
+from report_precompute import ACADEMIC_PARAMETER, DSA_PARAMETER, apply, precompute
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), os.pardir, "final_cleaned_student_data.json")
+
+
+@pytest.fixture(scope="module")
+def students():
+    with open(DATA_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_missing_leetcode_keeps_academic_score_and_facts(students):
+    profile = students["05414811922"]
+    assert profile["coding_profiles"]["leetcode"] is None
+    result = precompute("05414811922", profile)
+    assert result["scores"][ACADEMIC_PARAMETER] == round(profile["academic_profile"]["overall_cgpa"])
+    assert result["facts"]["cgpa"] == profile["academic_profile"]["overall_cgpa"]
+    assert "student_archetype" in result["facts"]
+    assert "leetcode_rating" not in result["facts"]
+
+
+def test_dsa_score_counts_codeforces(students):
+    result = precompute("35214811922", students["35214811922"])
+    leetcode_only = report_precompute._dsa_score(
+        report_precompute._analyze_leetcode(students["35214811922"]["coding_profiles"]["leetcode"]), {})
+    assert result["scores"][DSA_PARAMETER] > leetcode_only[0]
+    assert "Codeforces" in result["score_notes"][DSA_PARAMETER]["justification"]
+
+
+def test_no_coding_profiles_leaves_dsa_to_the_model():
+    result = precompute("1", {"academic_profile": {"overall_cgpa": 7.6}, "coding_profiles": None})
+    assert DSA_PARAMETER not in result["scores"]
+    assert result["scores"][ACADEMIC_PARAMETER] == 8
+
+
+def test_one_failing_analysis_only_drops_its_own_facts(students, monkeypatch):
+    def broken(github):
+        raise ValueError("bad github data")
+    monkeypatch.setattr(report_precompute, "_analyze_github", broken)
+    result = precompute("35214811922", students["35214811922"])
+    assert "github_rating" not in result["facts"]
+    assert {ACADEMIC_PARAMETER, DSA_PARAMETER} <= set(result["scores"])
+    assert "leetcode_rating" in result["facts"]
+
+
+PRECOMPUTED = {
+    "fields": {"name": "Student"},
+    "scores": {ACADEMIC_PARAMETER: 8, DSA_PARAMETER: 6},
+    "score_notes": {
+        ACADEMIC_PARAMETER: {"justification": "CGPA of 8.2.", "improvement_potential": "a"},
+        DSA_PARAMETER: {"justification": "LeetCode.", "improvement_potential": "b"},
+    },
+}
+
+
+def test_apply_overwrites_only_exact_parameter_names():
+    report = {"detailed_scores": [
+        {"parameter": "Academic Projects", "score": 5},
+        {"parameter": " academic excellence & consistency", "score": 3},
+        {"parameter": DSA_PARAMETER, "score": 9},
+    ]}
+    apply(report, PRECOMPUTED)
+    scores = {m["parameter"].strip().lower(): m["score"] for m in report["detailed_scores"]}
+    assert scores == {"academic projects": 5, ACADEMIC_PARAMETER.lower(): 8, DSA_PARAMETER.lower(): 6}
+    assert report["name"] == "Student"
+
+
+@pytest.mark.parametrize("detailed_scores", [[], None, [{"parameter": "Academic Projects", "score": 5}]])
+def test_apply_appends_missing_fixed_metrics(detailed_scores):
+    report = apply({"detailed_scores": detailed_scores}, PRECOMPUTED)
+    appended = {m["parameter"]: m for m in report["detailed_scores"]}
+    assert appended[ACADEMIC_PARAMETER] == {"parameter": ACADEMIC_PARAMETER, "score": 8,
+                                            "justification": "CGPA of 8.2.", "improvement_potential": "a"}
+    assert appended[DSA_PARAMETER]["score"] == 6
@@ -0,0 +1,96 @@
+import json
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from section_repair import rerequest, salvage, schema_hints, section_validators, validate_sections
+
+
+class Score(BaseModel):
+    parameter: str = Field(description="Parameter name")
+    score: int = Field(description="1-10")
+
+
+class Report(BaseModel):
+    summary: str = Field(description="Two sentences")
+    scores: List[Score] = Field(description="Scored parameters")
+    notes: Optional[List[str]] = None
+
+
+VALIDATORS = section_validators(Report)
+
+
+def test_valid_sections_are_kept_and_problems_named():
+    valid, problems = validate_sections(
+        {"summary": "ok", "scores": [{"parameter": "DSA", "score": "high"}], "extra": 1},
+        {"notes": '["unterminated'},
+        VALIDATORS,
+    )
+    assert valid == {"summary": "ok", "extra": 1}
+    assert problems["scores"].startswith("invalid:") and "score" in problems["scores"]
+    assert problems["notes"] == "not valid JSON"
+
+
+def test_missing_sections_are_reported():
+    valid, problems = validate_sections({"summary": "ok"}, {}, VALIDATORS)
+    assert problems == {"scores": "missing", "notes": "missing"}
+
+
+def test_valid_values_are_normalised_to_json():
+    valid, problems = validate_sections({"scores": [{"parameter": "DSA", "score": "7"}]}, {}, VALIDATORS)
+    assert valid["scores"] == [{"parameter": "DSA", "score": 7}]
+    assert "scores" not in problems
+
+
+def test_salvage_keeps_what_parses_in_a_truncated_response():
+    valid, problems = salvage('{"summary": "ok", "scores": [{"parameter": "DSA", "sc', VALIDATORS)
+    assert valid == {"summary": "ok"}
+    assert set(problems) == {"scores", "notes"}
+
+
+def test_schema_hints_describe_only_the_named_sections():
+    hints = json.loads(schema_hints(["scores", "notes"], VALIDATORS))
+    assert set(hints) == {"scores", "notes"}
+    assert hints["scores"] == [{"parameter": "<string: Parameter name>", "score": "<integer: 1-10>"}]
+    assert hints["notes"] == ["<string>"]
+
+
+def test_rerequest_asks_only_for_the_problem_sections_until_they_validate():
+    requests = []
+    responses = iter([
+        # First repair fixes notes but scores is still wrong
+        '{"scores": [{"parameter": "DSA"}], "notes": ["a",]}',
+        '{"scores": [{"parameter": "DSA", "score": 6}]}',
+    ])
+
+    def request_fn(problems):
+        requests.append(dict(problems))
+        return next(responses)
+
+    valid, problems = rerequest({"summary": "ok"}, {"scores": "missing", "notes": "missing"},
+                                VALIDATORS, request_fn)
+    assert problems == {}
+    assert valid == {"summary": "ok", "notes": ["a"], "scores": [{"parameter": "DSA", "score": 6}]}
+    assert [set(r) for r in requests] == [{"scores", "notes"}, {"scores"}]
+
+
+def test_rerequest_gives_up_after_the_attempts():
+    calls = []
+
+    def request_fn(problems):
+        calls.append(problems)
+        return "not json at all"
+
+    valid, problems = rerequest({}, {"summary": "missing"}, VALIDATORS, request_fn, attempts=2)
+    assert len(calls) == 2
+    assert problems == {"summary": "missing"}
+    assert valid == {}
+
+
+def test_rerequest_stops_when_the_request_fails():
+    def request_fn(problems):
+        raise TimeoutError("model timed out")
+
+    valid, problems = rerequest({"summary": "ok"}, {"scores": "missing"}, VALIDATORS, request_fn)
+    assert valid == {"summary": "ok"}
+    assert problems == {"scores": "missing"}
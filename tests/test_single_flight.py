@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+INPUTS = {"question": "What are my weaknesses?"}
+
+
+def _run_followers(flights, count, started):
+    """Joins `count` followers to a flight that is already in progress; returns their outcomes."""
+    outcomes = [None] * count
+    joined = threading.Barrier(count + 1)
+
+    def follow(i):
+        flight, is_leader = flights.join("qa", "1", INPUTS)
+        assert not is_leader
+        joined.wait()
+        try:
+            outcomes[i] = flight.wait(timeout=5)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=follow, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    joined.wait()
+    started.set()
+    return threads, outcomes
+
+
+def _leader(flights, fn):
+    started = threading.Event()
+    result = {}
+
+    def lead():
+        try:
+            result['value'] = flights.do("qa", "1", INPUTS, lambda: (started.wait(5), fn())[1])
+        except Exception as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=lead)
+    thread.start()
+    return thread, started, result
+
+
+def _wait_for_leader(flights):
+    while not flights.get_stats().get('qa', {}).get('in_flight'):
+        time.sleep(0.001)
+
+
+def test_followers_share_the_leaders_result():
+    flights = SingleFlight()
+    calls = []
+    leader, started, result = _leader(flights, lambda: calls.append(1) or {"answer": "x"})
+    _wait_for_leader(flights)
+    followers, outcomes = _run_followers(flights, 3, started)
+    for t in [leader, *followers]:
+        t.join()
+    assert calls == [1]
+    assert result['value'] == {"answer": "x"}
+    assert outcomes == [{"answer": "x"}] * 3
+    stats = flights.get_stats()['qa']
+    assert stats['calls'] == 4 and stats['executions'] == 1 and stats['coalesced'] == 3
+    assert stats['in_flight'] == 0
+
+
+def test_leader_failure_reaches_every_follower():
+    flights = SingleFlight()
+    error = RuntimeError("LLM unavailable")
+
+    def fail():
+        raise error
+
+    leader, started, result = _leader(flights, fail)
+    _wait_for_leader(flights)
+    followers, outcomes = _run_followers(flights, 2, started)
+    for t in [leader, *followers]:
+        t.join()
+    assert result['error'] is error
+    assert outcomes == [error, error]
+    # The failed flight is gone: the next call executes again
+    assert flights.do("qa", "1", INPUTS, lambda: "retried") == "retried"
+    assert flights.get_stats()['qa']['executions'] == 2
+
+
+def test_results_are_isolated_between_callers():
+    flights = SingleFlight()
+    flight, is_leader = flights.join("qa", "1", INPUTS)
+    follower, follower_is_leader = flights.join("qa", "1", INPUTS)
+    assert is_leader and not follower_is_leader
+
+    result = {"answer": "x", "sources": ["resume"]}
+    flight.resolve(result)
+    # The leader's caller changing its result after resolving doesn't leak
+    result["sources"].append("leader edit")
+
+    first, second = follower.wait(), follower.wait()
+    assert first == {"answer": "x", "sources": ["resume"]}
+    first["sources"].append("follower edit")
+    assert second["sources"] == ["resume"]
+
+
+def test_different_inputs_or_students_do_not_coalesce():
+    flights = SingleFlight()
+    _, first = flights.join("qa", "1", INPUTS)
+    _, other_student = flights.join("qa", "2", INPUTS)
+    _, other_inputs = flights.join("qa", "1", {"question": "What is my CGPA?"})
+    _, other_operation = flights.join("report", "1", INPUTS)
+    assert first and other_student and other_inputs and other_operation
+
+
+def test_wait_times_out_while_the_leader_runs():
+    flights = SingleFlight()
+    flights.join("qa", "1", INPUTS)
+    follower, _ = flights.join("qa", "1", INPUTS)
+    with pytest.raises(TimeoutError):
+        follower.wait(timeout=0.01)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from vector_index import NumpyVectorIndex, normalize, quantize_int8
+
+RNG = np.random.default_rng(7)
+VECTORS = RNG.standard_normal((40, 16)).astype(np.float32)
+IDS = [f"s{i % 4}:{i}" for i in range(40)]
+TEXTS = [f"chunk {i}" for i in range(40)]
+METADATAS = [{"enrollment_no": str(i % 4), "chunk_id": i} for i in range(40)]
+
+
+def build(path, dtype='float32'):
+    index = NumpyVectorIndex(str(path), dtype=dtype)
+    index.add(IDS, VECTORS, TEXTS, METADATAS)
+    return index
+
+
+def test_search_returns_the_nearest_documents_best_first(tmp_path):
+    index = build(tmp_path)
+    [results] = index.search([VECTORS[5]], k=3)
+    assert results[0][0].id == IDS[5]
+    assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_where_restricts_to_one_student(tmp_path):
+    index = build(tmp_path)
+    [results] = index.search([VECTORS[5]], k=50, where={"enrollment_no": "2"})
+    assert len(results) == 10
+    assert all(doc.metadata["enrollment_no"] == "2" for doc, _ in results)
+
+
+def test_int8_scores_match_float32(tmp_path):
+    exact = build(tmp_path / "f32")
+    quantized = build(tmp_path / "i8", dtype='int8')
+    queries = RNG.standard_normal((5, 16))
+    _, exact_scores = exact.score(queries)
+    _, quantized_scores = quantized.score(queries)
+    assert np.abs(exact_scores - quantized_scores).max() < 0.02
+    for exact_results, quantized_results in zip(exact.search(queries, k=1), quantized.search(queries, k=1)):
+        assert exact_results[0][0].id == quantized_results[0][0].id
+
+
+def test_quantize_int8_round_trips_within_one_step():
+    vectors = normalize(VECTORS)
+    quantized, scales = quantize_int8(vectors)
+    assert quantized.dtype == np.int8
+    assert np.abs(quantized * scales[:, None] - vectors).max() <= scales.max() / 2 + 1e-6
+
+
+@pytest.mark.parametrize("dtype", ['float32', 'int8'])
+def test_add_replaces_by_id_and_delete_removes(tmp_path, dtype):
+    index = build(tmp_path, dtype)
+    replacement = -VECTORS[3]
+    index.add([IDS[3]], [replacement], ["replaced"], [METADATAS[3]])
+    assert len(index) == 40
+    [results] = index.search([replacement], k=1)
+    assert results[0][0].page_content == "replaced"
+
+    index.delete([IDS[3], IDS[4], "unknown"])
+    assert len(index) == 38
+    assert IDS[3] not in index.ids() and IDS[4] not in index.ids()
+    [results] = index.search([VECTORS[4]], k=1)
+    assert results[0][0].id != IDS[4]
+
+
+@pytest.mark.parametrize("dtype", ['float32', 'int8'])
+def test_save_and_reload(tmp_path, dtype):
+    index = build(tmp_path, dtype)
+    index.delete([IDS[0]])
+    index.save()
+    assert NumpyVectorIndex.exists(str(tmp_path))
+    reloaded = NumpyVectorIndex.load(str(tmp_path))
+    assert reloaded.dtype == dtype
+    assert reloaded.ids() == index.ids()
+    queries = RNG.standard_normal((3, 16))
+    np.testing.assert_allclose(reloaded.score(queries)[1], index.score(queries)[1], atol=1e-6)
+    # A reloaded (memory-mapped) index can still be updated and saved again
+    reloaded.add(["new:1"], [VECTORS[0]], ["new"], [{"enrollment_no": "9"}])
+    reloaded.save()
+    assert "new:1" in NumpyVectorIndex.load(str(tmp_path)).ids()
+
+
+def test_empty_index(tmp_path):
+    index = NumpyVectorIndex(str(tmp_path))
+    assert index.search([VECTORS[0]], k=3) == [[]]
+    index.save()
+    assert len(NumpyVectorIndex.load(str(tmp_path))) == 0
+
+
+def test_unknown_dtype_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        NumpyVectorIndex(str(tmp_path), dtype='float16')
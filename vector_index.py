@@ -0,0 +1,188 @@
+# vector_index.py - Dependency-light vector index on NumPy
+#
+# Embeddings are L2-normalised and stored in a single .npy matrix (float32,
+# or int8 with a per-row scale), memory-mapped on load, with a JSON sidecar
+# holding ids, text and metadata. Similarity is a cosine via one matrix
+# product, so a batch of queries is scored in a single BLAS call.
+
+import json
+import os
+import threading
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+METADATA_FILE = "metadata.json"
+
+# Rows scored per matrix product; bounds temporary memory for big indexes
+SEARCH_BLOCK_ROWS = 65536
+
+IndexedDocument = namedtuple('IndexedDocument', 'id page_content metadata')
+
+
+def normalize(vectors) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize_int8(vectors: np.ndarray):
+    """Symmetric per-row int8 quantisation; returns (int8 matrix, float32 scales)."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+class NumpyVectorIndex:
+    """
+    A small persistent cosine-similarity index.
+
+    add()/delete() work on an in-memory copy and save() rewrites the files
+    atomically; readers that loaded the previous files keep a consistent view.
+    """
+
+    def __init__(self, path, dtype='float32'):
+        if dtype not in ('float32', 'int8'):
+            raise ValueError(f"Unsupported index dtype: {dtype}")
+        self.path = path
+        self.dtype = dtype
+        self._vectors = None  # float32 or int8 matrix (possibly memory-mapped)
+        self._scales = None   # per-row scales for int8
+        self._documents = []
+        self._lock = threading.Lock()
+
+    # --- persistence ---
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, METADATA_FILE), 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+        index = cls(path, dtype=sidecar.get('dtype', 'float32'))
+        index._documents = [IndexedDocument(d['id'], d['text'], d['metadata']) for d in sidecar['documents']]
+        if index._documents:
+            index._vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode='r')
+            if index.dtype == 'int8':
+                index._scales = np.load(os.path.join(path, SCALES_FILE))
+        return index
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, METADATA_FILE))
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            vectors = self._vectors if self._vectors is not None else np.zeros((0, 0), dtype=self.dtype)
+            self._atomic_write(VECTORS_FILE, lambda f: np.save(f, np.ascontiguousarray(vectors)))
+            if self.dtype == 'int8':
+                scales = self._scales if self._scales is not None else np.zeros(0, dtype=np.float32)
+                self._atomic_write(SCALES_FILE, lambda f: np.save(f, scales))
+            sidecar = {
+                'dtype': self.dtype,
+                'dimension': int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+                'documents': [{'id': d.id, 'text': d.page_content, 'metadata': d.metadata} for d in self._documents],
+            }
+            self._atomic_write(METADATA_FILE, lambda f: f.write(json.dumps(sidecar).encode('utf-8')))
+
+    def _atomic_write(self, name, write_fn):
+        target = os.path.join(self.path, name)
+        tmp = target + '.tmp'
+        with open(tmp, 'wb') as f:
+            write_fn(f)
+        os.replace(tmp, target)
+
+    # --- mutation ---
+
+    def __len__(self):
+        return len(self._documents)
+
+    def ids(self):
+        return [d.id for d in self._documents]
+
+    def add(self, ids, embeddings, texts, metadatas):
+        """Adds (or replaces, by id) documents with their embeddings."""
+        if not ids:
+            return
+        self.delete(ids)
+        vectors = normalize(embeddings)
+        with self._lock:
+            if self.dtype == 'int8':
+                new_rows, new_scales = quantize_int8(vectors)
+                self._scales = new_scales if self._scales is None else np.concatenate([self._scales, new_scales])
+            else:
+                new_rows = vectors
+            self._vectors = new_rows if self._vectors is None else np.concatenate([np.asarray(self._vectors), new_rows])
+            # Rebind rather than extend, so snapshots held by readers stay consistent
+            self._documents = self._documents + [IndexedDocument(i, t, m) for i, t, m in zip(ids, texts, metadatas)]
+
+    def delete(self, ids):
+        remove = set(ids)
+        with self._lock:
+            keep = [i for i, d in enumerate(self._documents) if d.id not in remove]
+            if len(keep) == len(self._documents):
+                return
+            self._documents = [self._documents[i] for i in keep]
+            self._vectors = np.asarray(self._vectors)[keep] if keep else None
+            if self._scales is not None:
+                self._scales = self._scales[keep] if keep else None
+
+    # --- search ---
+
+    def _snapshot(self, where):
+        """Consistent (documents, vectors, scales) restricted to `where`."""
+        with self._lock:
+            documents, vectors, scales = self._documents, self._vectors, self._scales
+        rows = [i for i, d in enumerate(documents)
+                if not where or all(d.metadata.get(k) == v for k, v in where.items())]
+        if vectors is None or not rows:
+            return [], None, None
+        if len(rows) < len(documents):
+            vectors = vectors[rows]
+            scales = scales[rows] if scales is not None else None
+        return [documents[i] for i in rows], vectors, scales
+
+    def documents(self, where=None):
+        """Documents whose metadata matches every key/value in `where`."""
+        return self._snapshot(where)[0]
+
+    def score(self, query_embeddings, where=None):
+        """
+        Returns (documents, scores) where scores is the cosine similarity
+        matrix (n_queries x n_documents) against every matching document.
+        """
+        queries = normalize(query_embeddings)
+        documents, vectors, scales = self._snapshot(where)
+        if not documents:
+            return [], np.zeros((len(queries), 0), dtype=np.float32)
+
+        blocks = []
+        for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            block_scores = queries @ block.T
+            if scales is not None:
+                block_scores *= scales[start:start + SEARCH_BLOCK_ROWS]
+            blocks.append(block_scores)
+        return documents, np.hstack(blocks)
+
+    def search(self, query_embeddings, k=4, where=None):
+        """
+        Batched top-k: returns one list of (IndexedDocument, score) per query,
+        best first, restricted to documents matching `where`.
+        """
+        documents, scores = self.score(query_embeddings, where)
+        if not documents:
+            return [[] for _ in range(len(scores))]
+        k = min(k, len(documents))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for q, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[q, candidates], kind='stable')]
+            results.append([(documents[i], float(scores[q, i])) for i in ordered])
+        return results
@@ -0,0 +1,8 @@
+# vector_store_config.py - Where the student vector store lives
+#
+# Shared by ingest_data.py, which writes the store, and retriever.py, which
+# reads it at query time. Kept free of imports so the web app can locate the
+# store without loading the ingestion stack (langchain_community, torch).
+
+DB_PATH = "vector_store"
+MANIFEST_FILE = "manifest.json"
@@ -0,0 +1,172 @@
+# video_ranker.py - Local relevance re-ranking for scraped YouTube results
+
+import re
+import logging
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger('video_ranker')
+
+# --- Scoring Weights ---
+# Final score is a weighted blend of text relevance and cheap priors.
+WEIGHTS = {
+    'TEXT_SIMILARITY': 0.60,
+    'CHANNEL_PRIOR': 0.20,
+    'EDUCATIONAL': 0.10,
+    'PAGE_POSITION': 0.10,
+}
+
+TITLE_BOOST = 2  # Title terms count double relative to description terms
+
+# Channels with a consistent track record for CS / programming tutorials.
+# Values are priors in [0, 1]; unknown channels get DEFAULT_CHANNEL_PRIOR.
+CHANNEL_PRIORS = {
+    "freecodecamp.org": 1.0,
+    "freecodecamp": 1.0,
+    "abdul bari": 1.0,
+    "neetcode": 1.0,
+    "mit opencourseware": 1.0,
+    "cs dojo": 0.9,
+    "take u forward": 0.9,
+    "striver": 0.9,
+    "william fiset": 0.9,
+    "traversy media": 0.9,
+    "programming with mosh": 0.9,
+    "fireship": 0.85,
+    "web dev simplified": 0.85,
+    "the net ninja": 0.85,
+    "corey schafer": 0.85,
+    "tech with tim": 0.8,
+    "gate smashers": 0.8,
+    "neso academy": 0.8,
+    "apna college": 0.8,
+    "codehelp - by babbar": 0.8,
+    "love babbar": 0.8,
+    "geeksforgeeks": 0.75,
+    "errichto algorithms": 0.75,
+    "back to back swe": 0.75,
+    "statquest with josh starmer": 0.85,
+    "sentdex": 0.75,
+    "hussein nasser": 0.8,
+    "bytebytego": 0.85,
+}
+DEFAULT_CHANNEL_PRIOR = 0.4
+
+EDUCATIONAL_TERMS = {
+    "tutorial", "course", "lesson", "guide", "explained", "learn", "beginner",
+    "beginners", "advanced", "lecture", "class", "notes", "concepts",
+    "fundamentals", "introduction", "overview", "basics", "complete", "full",
+    "interview", "patterns", "problems", "crash",
+}
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "by",
+    "is", "are", "be", "this", "that", "it", "how", "what", "you", "your",
+    "from", "at", "as", "we", "i", "my", "our", "into", "vs",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed."""
+    if not text:
+        return []
+    return [tok for tok in _TOKEN_RE.findall(text.lower()) if tok not in STOPWORDS]
+
+
+def _channel_prior(channel: str) -> float:
+    """Look up the quality prior for a channel name."""
+    return CHANNEL_PRIORS.get((channel or "").strip().lower(), DEFAULT_CHANNEL_PRIOR)
+
+
+def score_videos(candidates: List[Dict[str, Any]], query: str, topic_category: Optional[str] = None) -> np.ndarray:
+    """
+    Scores every candidate against the query in one vectorized pass.
+
+    Builds a TF-IDF matrix over the candidates' titles and descriptions (idf is
+    computed from the result page itself), takes its cosine similarity with the
+    query vector and blends that with channel-quality, educational-term and
+    page-position priors.
+
+    Args:
+        candidates (list): Video dicts with 'title', 'description' and 'channel'.
+        query (str): The topic that was searched for.
+        topic_category (str): Optional category used to widen the query terms.
+
+    Returns:
+        np.ndarray: One float score per candidate, in input order.
+    """
+    n_docs = len(candidates)
+    if n_docs == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    doc_tokens = [
+        _tokenize(video.get("title", "")) * TITLE_BOOST + _tokenize(video.get("description", ""))
+        for video in candidates
+    ]
+    query_tokens = _tokenize(query) + _tokenize(topic_category or "")
+
+    vocab = {}
+    for tokens in doc_tokens + [query_tokens]:
+        for tok in tokens:
+            vocab.setdefault(tok, len(vocab))
+
+    if not vocab:
+        return np.zeros(n_docs, dtype=np.float32)
+
+    # Term-frequency matrices (documents x vocab, and the query row)
+    tf = np.zeros((n_docs, len(vocab)), dtype=np.float32)
+    for row, tokens in enumerate(doc_tokens):
+        for tok in tokens:
+            tf[row, vocab[tok]] += 1.0
+    q_tf = np.zeros(len(vocab), dtype=np.float32)
+    for tok in query_tokens:
+        q_tf[vocab[tok]] += 1.0
+
+    # Smoothed idf over the result page, sublinear tf
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+    doc_vecs = np.log1p(tf) * idf
+    q_vec = np.log1p(q_tf) * idf
+
+    doc_norms = np.linalg.norm(doc_vecs, axis=1)
+    q_norm = np.linalg.norm(q_vec)
+    if q_norm == 0:
+        similarity = np.zeros(n_docs, dtype=np.float32)
+    else:
+        similarity = (doc_vecs @ q_vec) / (np.maximum(doc_norms, 1e-9) * q_norm)
+
+    # Priors
+    channel_prior = np.array([_channel_prior(v.get("channel", "")) for v in candidates], dtype=np.float32)
+    edu_ids = [vocab[t] for t in EDUCATIONAL_TERMS if t in vocab]
+    if edu_ids:
+        educational = np.minimum(np.count_nonzero(tf[:, edu_ids], axis=1), 3) / 3.0
+    else:
+        educational = np.zeros(n_docs, dtype=np.float32)
+    # Keep a little of YouTube's own ordering as a tie-breaker
+    position = 1.0 - np.arange(n_docs, dtype=np.float32) / max(n_docs, 1)
+
+    return (
+        WEIGHTS['TEXT_SIMILARITY'] * similarity
+        + WEIGHTS['CHANNEL_PRIOR'] * channel_prior
+        + WEIGHTS['EDUCATIONAL'] * educational
+        + WEIGHTS['PAGE_POSITION'] * position
+    ).astype(np.float32)
+
+
+def rank_videos(candidates: List[Dict[str, Any]], query: str, topic_category: Optional[str] = None,
+                max_results: int = 5) -> List[Dict[str, Any]]:
+    """Returns the top `max_results` candidates ordered by relevance score."""
+    if not candidates:
+        return []
+
+    scores = score_videos(candidates, query, topic_category)
+    # Stable sort so equal scores keep page order
+    order = np.argsort(-scores, kind="stable")[:max_results]
+    logger.debug(
+        "Ranked %d candidates for '%s'; top scores: %s",
+        len(candidates), query, [round(float(scores[i]), 3) for i in order]
+    )
+    return [candidates[i] for i in order]
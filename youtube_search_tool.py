@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from typing import Type, List, Dict, Any, Optional
 import os
 import requests
+import http_client
 import logging
 import re
 from bs4 import BeautifulSoup
@@ -10,6 +11,8 @@ import json
 import time
 import random
 import urllib.parse
+from video_ranker import rank_videos
+from single_flight import single_flight
 
 
 
@@ -52,6 +55,14 @@ class YouTubeSearchTool(BaseTool):
     
     def _run(self, query: str, max_results: int = 5, topic_category: Optional[str] = None) -> List[Dict[str, Any]]:
         """Execute the YouTube search with the given parameters"""
+        # Identical searches already running (e.g. the same topic for two reports) are shared
+        return single_flight.do(
+            "youtube_search", None,
+            {"query": query.strip().lower(), "max_results": max_results, "topic_category": topic_category},
+            lambda: self._search(query, max_results, topic_category)
+        )
+    
+    def _search(self, query: str, max_results: int = 5, topic_category: Optional[str] = None) -> List[Dict[str, Any]]:
         logger.info(f"Searching YouTube for: '{query}' (max_results={max_results}, category={topic_category})")
         
         try:
@@ -80,11 +91,10 @@ class YouTubeSearchTool(BaseTool):
             # Add a small delay to avoid being blocked
             time.sleep(random.uniform(0.5, 1.5))
             
-            response = requests.get(
+            response = http_client.get(
                 self.YOUTUBE_SEARCH_URL, 
                 params=params, 
                 headers=headers, 
-                timeout=15,
                 cookies={"CONSENT": "YES+cb.20210328-17-p0.en+FX+100"}
             )
             response.raise_for_status()
@@ -120,6 +130,7 @@ class YouTubeSearchTool(BaseTool):
                 return self._get_fallback_videos(query, max_results, topic_category)
             
             # Process results
+            candidates = []
             videos = []
             try:
                 # Navigate through the JSON structure to find video data
@@ -163,10 +174,10 @@ class YouTubeSearchTool(BaseTool):
                                         # Get the highest quality thumbnail
                                         thumbnail_url = thumbnails[-1].get('url', '')
                                 
-                                # Filter for relevance
+                                # Filter for relevance; ranking happens once the whole page is collected
                                 if self._is_relevant_video(title, description, query, topic_category):
                                     # FIXED: Removed extra spaces from URLs
-                                    videos.append({
+                                    candidates.append({
                                         "title": title,
                                         "url": f"https://www.youtube.com/watch?v={video_id}",
                                         "embed_url": f"https://www.youtube.com/embed/{video_id}",
@@ -180,12 +191,9 @@ class YouTubeSearchTool(BaseTool):
                                             topic_category
                                         )
                                     })
-                                    
-                                    if len(videos) >= max_results:
-                                        break
-                        
-                        if len(videos) >= max_results:
-                            break
+                
+                # Re-rank every relevant candidate on the page against the query
+                videos = rank_videos(candidates, query, topic_category, max_results)
             except (KeyError, IndexError, TypeError) as e:
                 logger.error(f"Error parsing YouTube data: {str(e)}")
                 return self._get_fallback_videos(query, max_results, topic_category)